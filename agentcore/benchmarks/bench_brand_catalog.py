@@ -0,0 +1,76 @@
+"""銘柄カタログのベクトル検索のベンチマーク
+
+同梱のカタログの読み込み（メモリマップ）と、好きな記録に近い候補の検索の所要時間を計測する。
+あわせて、カタログを複製して行数を増やした索引で、総当たり検索の所要時間が
+行数に応じてどう増えるかを計測する（NumPyの有無で計算方法が変わる）。
+Bedrockは呼び出さない。
+
+実行方法:
+    uv run python -m benchmarks.bench_brand_catalog [検索回数]
+"""
+
+import sys
+import time
+
+from src.models import DrinkingRecord
+from src.services.brand_catalog import BrandCatalog, VectorIndex, embed_text, np
+from src.utils.tokens import estimate_tokens
+
+ROW_COUNTS = (1_000, 10_000)
+TOP_N = 20
+
+
+def make_records() -> list[DrinkingRecord]:
+    return [
+        DrinkingRecord(
+            id=f"rec_{i}",
+            user_id="bench_user",
+            brand=brand,
+            impression=impression,
+            rating=rating,
+        )
+        for i, (brand, impression, rating) in enumerate(
+            [
+                ("獺祭 純米大吟醸", "フルーティーで華やかな香り", "非常に好き"),
+                ("新政 No.6", "酸味が爽やかで飲みやすい", "好き"),
+                ("菊正宗 上撰", "辛口すぎて合わなかった", "合わない"),
+            ]
+        )
+    ]
+
+
+def main(iterations: int) -> None:
+    start = time.perf_counter()
+    catalog = BrandCatalog.load()
+    load_ms = (time.perf_counter() - start) * 1000
+    records = make_records()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        brands = catalog.nearest(records, TOP_N)
+    search_ms = (time.perf_counter() - start) / iterations * 1000
+    section = "".join(f"- {b.brand}（{b.prefecture}、{b.style}）\n" for b in brands)
+
+    print("=" * 72)
+    print(f"銘柄カタログのベクトル検索のベンチマーク（NumPy: {'あり' if np is not None else 'なし'}）")
+    print("=" * 72)
+    print(f"カタログ {len(catalog)}銘柄: 読み込み {load_ms:.2f}ミリ秒 / 検索 {search_ms:.2f}ミリ秒")
+    print(f"上位{TOP_N}件の候補のセクション: 約{estimate_tokens(section)}トークン")
+    print(f"候補: {'、'.join(b.brand for b in brands[:10])} …")
+
+    vectors = [embed_text(b.text) for b in catalog.brands]
+    query = embed_text("獺祭 純米大吟醸 フルーティーで華やかな香り")
+    for rows in ROW_COUNTS:
+        index = VectorIndex.from_vectors(
+            [vectors[i % len(vectors)] for i in range(rows)], catalog.index.dim
+        )
+        start = time.perf_counter()
+        for _ in range(iterations):
+            index.search(query, TOP_N)
+        elapsed = (time.perf_counter() - start) / iterations * 1000
+        print(f"索引 {rows:>6}行: 総当たり検索 {elapsed:.2f}ミリ秒")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    main(n)
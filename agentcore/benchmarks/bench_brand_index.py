@@ -0,0 +1,58 @@
+"""メニューの銘柄索引のベンチマーク
+
+指定した件数のメニューで索引を構築し、表記ゆれのある銘柄名・メニュー外の銘柄名を
+メニューの表記に合わせる1件あたりの所要時間を計測する。
+
+実行方法:
+    uv run python -m benchmarks.bench_brand_index [メニューの銘柄数] [繰り返し回数]
+"""
+
+import sys
+import time
+
+from src.services.brand_index import BrandIndex
+
+STEMS = ("獺祭", "久保田", "黒龍", "十四代", "飛露喜", "新政", "而今", "田酒", "鍋島", "醸し人九平次")
+STYLES = ("純米大吟醸", "純米吟醸", "特別純米", "本醸造", "生酛 純米", "山廃")
+
+
+def build_menu(size: int) -> list[str]:
+    """銘柄と特定名称を組み合わせたメニュー"""
+    return [
+        f"{STEMS[i % len(STEMS)]} {STYLES[i // len(STEMS) % len(STYLES)]}{i // (len(STEMS) * len(STYLES)) or ''}"
+        for i in range(size)
+    ]
+
+
+QUERIES = (
+    "獺祭 純米大吟醸",  # 完全一致
+    "黒竜 純米吟醸",  # 旧字体
+    "ＮＡＢＥＳＨＩＭＡ",  # メニュー外（全角）
+    "十四代",  # 特定名称なし
+    "醸し人九平次 山廃 無濾過 生原酒",  # 末尾の特定名称が多い
+    "菊正宗 上撰",  # メニュー外
+)
+
+
+def main(size: int, iterations: int) -> None:
+    menu = build_menu(size)
+    start = time.perf_counter()
+    index = BrandIndex(menu)
+    build_seconds = time.perf_counter() - start
+
+    print("=" * 60)
+    print(f"銘柄索引のベンチマーク（メニュー {len(index)}件 × {iterations}回）")
+    print(f"索引の構築: {build_seconds * 1000:.2f}ミリ秒")
+    print("=" * 60)
+    for query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            entry = index.match(query)
+        seconds = (time.perf_counter() - start) / iterations
+        print(f"{query:>20}: {seconds * 1_000_000:6.1f}マイクロ秒 → {entry or '（除外）'}")
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    main(size, iterations)
@@ -0,0 +1,65 @@
+"""銘柄の知識ベースのベンチマーク
+
+カタログの銘柄から10件の推薦（best_recommend + 9件）の出力を作り、brand_descriptionを
+LLMに生成させる場合と知識ベースで補完する場合の推定出力トークン数を比較する。
+あわせて、知識ベースの初回の検索（ファイルを開く）と検索1件あたりの所要時間を計測する。
+Bedrockは呼び出さない。
+
+実行方法:
+    uv run python -m benchmarks.bench_brand_knowledge
+"""
+
+import json
+import time
+
+from src.services.brand_catalog import CATALOG_PATH
+from src.services.brand_knowledge import BrandKnowledge
+from src.utils.tokens import estimate_tokens
+
+
+def make_output(entries: list[dict], with_description: bool) -> str:
+    items = []
+    for i, entry in enumerate(entries[:10]):
+        item = {"brand": entry["brand"]}
+        if with_description:
+            item["brand_description"] = entry["description"]
+        item["expected_experience"] = "華やかな香りが口いっぱいに広がります"
+        if i:
+            item["category"] = "好みに近い"
+        item["match_score"] = 95 - i
+        items.append(item)
+    return json.dumps(
+        {"best_recommend": items[0], "recommendations": items[1:]}, ensure_ascii=False
+    )
+
+
+def main() -> None:
+    entries = json.loads(CATALOG_PATH.read_text(encoding="utf-8"))
+    with_description = estimate_tokens(make_output(entries, True))
+    without_description = estimate_tokens(make_output(entries, False))
+
+    knowledge = BrandKnowledge()
+    start = time.perf_counter()
+    knowledge.describe(entries[0]["brand"])
+    open_ms = (time.perf_counter() - start) * 1000
+    queries = [f"{entry['brand']} 純米吟醸" for entry in entries]
+    start = time.perf_counter()
+    found = sum(knowledge.describe(query) is not None for query in queries)
+    lookup_us = (time.perf_counter() - start) / len(queries) * 1_000_000
+
+    print("=" * 72)
+    print("銘柄の知識ベースのベンチマーク")
+    print("=" * 72)
+    print(
+        f"推薦10件の出力: 説明を生成 約{with_description}トークン / "
+        f"知識ベースで補完 約{without_description}トークン"
+        f"（{1 - without_description / with_description:.0%}削減）"
+    )
+    print(
+        f"知識ベース: 初回の検索 {open_ms:.2f}ミリ秒 / 検索 {lookup_us:.1f}マイクロ秒"
+        f"（{found}/{len(queries)}件が既知）"
+    )
+
+
+if __name__ == "__main__":
+    main()
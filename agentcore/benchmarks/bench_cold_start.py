@@ -0,0 +1,55 @@
+"""初回リクエストのレイテンシのベンチマーク
+
+新しいBedrockServiceで最初のgenerate_textにかかる時間を、
+ウォームアップなし・ありの両方で計測する。実際のBedrockを呼び出すため、
+AWS認証情報とBEDROCK_MODEL_IDの設定が必要。
+
+実行方法:
+    uv run python -m benchmarks.bench_cold_start [試行回数]
+"""
+
+import asyncio
+import sys
+import time
+
+from src.services.bedrock_service import BedrockService
+
+PROMPT = "日本酒を1つ挙げてください。銘柄名のみ答えてください。"
+
+
+async def first_request_latency(warm: bool) -> tuple[float, float]:
+    """新しいクライアントで初回リクエストのレイテンシを計測
+
+    Returns:
+        tuple[float, float]: (ウォームアップ時間, 初回リクエストのレイテンシ)
+    """
+    service = BedrockService()
+    warm_up = 0.0
+    if warm:
+        start = time.perf_counter()
+        await service.warm_up()
+        warm_up = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await service.generate_text(PROMPT, max_tokens=16, temperature=0.0)
+    return warm_up, time.perf_counter() - start
+
+
+async def run(trials: int) -> None:
+    print("=" * 60)
+    print("初回リクエストのレイテンシ（新しいクライアントごとに計測）")
+    print("=" * 60)
+    for warm in (False, True):
+        results = [await first_request_latency(warm) for _ in range(trials)]
+        latencies = sorted(r[1] for r in results)
+        warm_ups = [r[0] for r in results]
+        label = "ウォームアップあり" if warm else "ウォームアップなし"
+        print(f"{label}:")
+        print(f"  初回リクエスト 中央値: {latencies[len(latencies) // 2]:.3f}秒")
+        print(f"  初回リクエスト 最大値: {latencies[-1]:.3f}秒")
+        if warm:
+            print(f"  ウォームアップ 平均:   {sum(warm_ups) / len(warm_ups):.3f}秒")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 5))
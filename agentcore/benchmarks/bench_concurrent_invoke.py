@@ -0,0 +1,49 @@
+"""同時invokeのベンチマーク
+
+N件の`invoke`を同時に実行し、1件のみ実行した場合と所要時間を比較する。
+BedrockServiceがイベントループをブロックしなければ、N件の同時実行は
+1件とほぼ同じ時間で完了する。
+
+実行方法:
+    uv run python -m benchmarks.bench_concurrent_invoke [N] [latency秒]
+"""
+
+import asyncio
+import sys
+import time
+
+from benchmarks.stub_bedrock import StubBedrockRuntime, sample_payload
+from src import agent
+
+
+async def run(concurrency: int, latency: float) -> None:
+    stub = StubBedrockRuntime(latency=latency)
+    agent.recommendation_service.bedrock_service.bedrock_runtime = stub
+
+    # 1件のみ実行
+    start = time.perf_counter()
+    await agent.invoke(sample_payload("bench_user_0"))
+    single = time.perf_counter() - start
+
+    # N件を同時実行
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(agent.invoke(sample_payload(f"bench_user_{i}")) for i in range(concurrency))
+    )
+    concurrent = time.perf_counter() - start
+
+    errors = sum(1 for r in results if "error" in r)
+    print("=" * 60)
+    print(f"同時invokeベンチマーク（Bedrockレイテンシ: {latency:.2f}秒/回）")
+    print("=" * 60)
+    print(f"1件の所要時間:       {single:.3f}秒")
+    print(f"{concurrency}件同時の所要時間: {concurrent:.3f}秒")
+    print(f"比率（同時/1件）:    {concurrent / single:.2f}")
+    print(f"Bedrock呼び出し回数: {stub.call_count}")
+    print(f"エラー件数:          {errors}")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    asyncio.run(run(n, latency))
@@ -0,0 +1,75 @@
+"""LLM出力のJSON抽出のベンチマーク
+
+サンプルの出力（tests/llm_output_samples.py）に対して、従来の方法
+（先頭のコードブロックの行を除去して json.loads）と extract_json の
+パース成功率と1件あたりの所要時間を比較する。
+
+実行方法:
+    uv run python -m benchmarks.bench_json_extract [繰り返し回数]
+"""
+
+import json
+import sys
+import time
+from collections.abc import Callable
+from typing import Any
+
+from src.utils.json_repair import extract_json
+from tests.llm_output_samples import SAMPLES
+
+
+def legacy_parse(text: str) -> Any:
+    """従来のパース（```で始まる場合に先頭と末尾の行を除去）"""
+    text = text.strip()
+    if text.startswith("```"):
+        lines = text.split("\n")
+        text = "\n".join(lines[1:-1])
+    return json.loads(text)
+
+
+def measure(parse: Callable[[str], Any], iterations: int) -> tuple[int, float]:
+    """成功件数と1件あたりの平均所要時間（秒）を計測"""
+    succeeded = 0
+    for _, text, expected, _ in SAMPLES:
+        try:
+            succeeded += parse(text) == expected
+        except json.JSONDecodeError:
+            pass
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for _, text, _, _ in SAMPLES:
+            try:
+                parse(text)
+            except json.JSONDecodeError:
+                pass
+    elapsed = time.perf_counter() - start
+    return succeeded, elapsed / (iterations * len(SAMPLES))
+
+
+def main(iterations: int) -> None:
+    print("=" * 60)
+    print(f"JSON抽出のベンチマーク（サンプル {len(SAMPLES)}件 × {iterations}回）")
+    print("=" * 60)
+    for name, parse in (
+        ("legacy", legacy_parse),
+        ("extract_json", lambda text: extract_json(text).value),
+    ):
+        succeeded, seconds = measure(parse, iterations)
+        print(
+            f"{name:>12}: 成功 {succeeded}/{len(SAMPLES)} / "
+            f"平均 {seconds * 1_000_000:.1f}マイクロ秒/件"
+        )
+
+    print("-" * 60)
+    for name, text, _, _ in SAMPLES:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            result = extract_json(text)
+        seconds = (time.perf_counter() - start) / iterations
+        repairs = ", ".join(result.repairs) or "なし"
+        print(f"{name:>24}: {seconds * 1_000_000:7.1f}マイクロ秒 / 修復: {repairs}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,116 @@
+"""候補を分割した並列推薦（map-reduce）のベンチマーク
+
+プロンプトに載せたメニューの銘柄数に比例してレイテンシが増えるスタブを使い、
+メニューの件数ごとに、全件を1回で推薦する場合と MENU_CHUNK_SIZE 件ずつに分割して
+並列に推薦する場合の所要時間（味の好み分析を含む）を比較する。
+
+実行方法:
+    uv run python -m benchmarks.bench_menu_map_reduce [チャンクの件数] [同時呼び出し数]
+"""
+
+import asyncio
+import json
+import sys
+import time
+from typing import Any
+
+from benchmarks.stub_bedrock import StubBedrockRuntime
+from src.models import DrinkingRecord, Menu
+from src.services.recommendation_service import RecommendationService
+from src.utils.config import get_config
+
+MENU_SIZES = (40, 120, 400)
+BASE_LATENCY = 0.2  # 1回の呼び出しの固定レイテンシ（秒）
+LATENCY_PER_BRAND = 0.005  # プロンプトに載せた銘柄1件あたりのレイテンシ（秒）
+
+_MENU_HEADER = "## 利用可能なメニュー\n"
+
+
+def _texts(value: Any) -> list[str]:
+    """リクエストボディに含まれる文字列をすべて取り出す"""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [t for v in value.values() for t in _texts(v)]
+    if isinstance(value, list):
+        return [t for v in value for t in _texts(v)]
+    return []
+
+
+class MenuScaledRuntime(StubBedrockRuntime):
+    """プロンプトのメニューの銘柄から推薦を返し、銘柄数に比例して遅くなるスタブ"""
+
+    def _reply_text(self, body: dict[str, Any]) -> str:
+        text = next((t for t in _texts(body) if _MENU_HEADER in t), None)
+        if text is None:
+            return super()._reply_text(body)
+        section = text.split(_MENU_HEADER)[1].split("\n###")[0]
+        brands = [line[2:] for line in section.splitlines() if line.startswith("- ")]
+        time.sleep(LATENCY_PER_BRAND * len(brands))
+        items = [
+            {
+                "brand": brand,
+                "brand_description": "華やかな香りの純米吟醸",
+                "expected_experience": "華やかな香りが広がります",
+                "category": "好みに近い",
+                "match_score": 99 - i % 90,
+            }
+            for i, brand in enumerate(brands[:10])
+        ]
+        best = {k: v for k, v in items[0].items() if k != "category"}
+        return json.dumps({"best_recommend": best, "recommendations": items[1:]}, ensure_ascii=False)
+
+
+def make_records() -> list[DrinkingRecord]:
+    return [
+        DrinkingRecord(
+            id=f"rec_{i}",
+            user_id="bench_user",
+            brand=brand,
+            impression="華やかな香りで美味しかった",
+            rating=rating,
+        )
+        for i, (brand, rating) in enumerate(
+            [("獺祭 純米大吟醸", "非常に好き"), ("菊正宗 上撰", "合わない"), ("新政 No.6", "好き")]
+        )
+    ]
+
+
+async def measure(menu_size: int, chunk_size: int) -> tuple[float, int]:
+    """1リクエストの所要時間と呼び出し回数"""
+    config = get_config()
+    config.menu_chunk_size = chunk_size
+    service = RecommendationService()
+    runtime = MenuScaledRuntime(latency=BASE_LATENCY)
+    service.bedrock_service.bedrock_runtime = runtime
+    menu = Menu(brands=[f"銘柄{i:03d} 純米吟醸" for i in range(menu_size)])
+
+    start = time.perf_counter()
+    response = await service.generate_recommendations("bench_user", make_records(), menu)
+    elapsed = time.perf_counter() - start
+    assert response.best_recommend is not None
+    return elapsed, runtime.call_count
+
+
+async def run(chunk_size: int, concurrency: int) -> None:
+    config = get_config()
+    config.menu_shortlist_size = 0
+    config.menu_chunk_concurrency = concurrency
+    config.recommendation_cache_size = 0
+
+    print("=" * 72)
+    print(f"map-reduce推薦のベンチマーク（チャンク {chunk_size}件、同時呼び出し {concurrency}）")
+    print("=" * 72)
+    for menu_size in MENU_SIZES:
+        single, single_calls = await measure(menu_size, 0)
+        chunked, chunked_calls = await measure(menu_size, chunk_size)
+        print(
+            f"メニュー {menu_size:>4}件: 1回で推薦 {single:5.2f}秒（{single_calls}回） / "
+            f"分割 {chunked:5.2f}秒（{chunked_calls}回）"
+        )
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    asyncio.run(run(size, limit))
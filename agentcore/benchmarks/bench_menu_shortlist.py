@@ -0,0 +1,101 @@
+"""メニューの事前ランキング（候補の絞り込み）のベンチマーク
+
+銘柄と特定名称への好みを乱数で決めた仮想ユーザーについて、その好みに沿った
+飲酒履歴を生成し、メニューから好みの上位10件（理想的な推薦）を選ぶ。
+事前ランキングで上位K件に絞り込んだときに、理想的な推薦がどれだけ候補に残るか
+（再現率）を、メニューの先頭K件を渡す場合と比較する。
+あわせて、メニューのセクションの推定トークン数と採点の所要時間を計測する。
+Bedrockは呼び出さない。
+
+実行方法:
+    uv run python -m benchmarks.bench_menu_shortlist [ユーザー数] [メニューの銘柄数]
+"""
+
+import random
+import sys
+import time
+
+from src.models import DrinkingRecord
+from src.services.menu_ranker import shortlist_menu
+from src.utils.tokens import estimate_tokens
+
+STEMS = (
+    "獺祭", "久保田", "黒龍", "十四代", "飛露喜", "新政", "而今", "田酒", "鍋島", "醸し人九平次",
+    "八海山", "出羽桜", "浦霞", "菊姫", "天狗舞", "磯自慢", "写楽", "花陽浴", "風の森", "仙禽",
+    "紀土", "作", "東洋美人", "雨後の月", "賀茂鶴", "酔鯨", "司牡丹", "亀泉", "七本鎗", "松の司",
+    "玉川", "白鷹", "剣菱", "大七", "末廣", "飛良泉", "高清水", "雪の茅舎", "刈穂", "まんさくの花",
+)
+STYLES = ("純米大吟醸", "純米吟醸", "特別純米", "本醸造", "生酛 純米", "山廃 原酒")
+TOP_N = 10
+K_VALUES = (10, 20, 30, 50)
+HISTORY_SIZE = 15
+
+
+def make_user(rng: random.Random, menu_size: int) -> tuple[list[str], list[DrinkingRecord], set[str]]:
+    """メニュー・飲酒履歴・理想的な推薦（好みの上位10件）を生成"""
+    stem_affinity = {stem: rng.uniform(-1, 1) for stem in STEMS}
+    style_affinity = {style: rng.uniform(-1, 1) for style in STYLES}
+    catalog = [(stem, style) for stem in STEMS for style in STYLES]
+
+    def utility(item: tuple[str, str]) -> float:
+        return stem_affinity[item[0]] + style_affinity[item[1]]
+
+    menu_items = rng.sample(catalog, menu_size)
+    menu = [f"{stem} {style}" for stem, style in menu_items]
+    ideal = {f"{stem} {style}" for stem, style in sorted(menu_items, key=utility, reverse=True)[:TOP_N]}
+
+    records = []
+    for i, item in enumerate(rng.sample(catalog, HISTORY_SIZE)):
+        value = utility(item) + rng.gauss(0, 0.3)
+        if value > 0.8:
+            rating, impression = "非常に好き", "とても美味しかった"
+        elif value > 0:
+            rating, impression = "好き", "美味しかった"
+        elif value > -0.8:
+            rating, impression = "合わない", "好みではなかった"
+        else:
+            rating, impression = "非常に合わない", "まったく合わなかった"
+        records.append(
+            DrinkingRecord(
+                id=f"rec_{i}",
+                user_id="bench_user",
+                brand=f"{item[0]} {item[1]}",
+                impression=impression,
+                rating=rating,
+            )
+        )
+    return menu, records, ideal
+
+
+def menu_tokens(brands: list[str]) -> int:
+    return estimate_tokens("".join(f"- {brand}\n" for brand in brands))
+
+
+def main(users: int, menu_size: int) -> None:
+    rng = random.Random(0)
+    samples = [make_user(rng, menu_size) for _ in range(users)]
+
+    print("=" * 72)
+    print(f"メニューの事前ランキングのベンチマーク（{users}ユーザー、メニュー {menu_size}件）")
+    print(f"全件のメニューのセクション: 約{sum(menu_tokens(m) for m, _, _ in samples) / users:.0f}トークン")
+    print("=" * 72)
+    for k in K_VALUES:
+        head_recall = ranked_recall = 0.0
+        elapsed = 0.0
+        for menu, records, ideal in samples:
+            head_recall += len(ideal & set(menu[:k])) / len(ideal)
+            start = time.perf_counter()
+            shortlist = shortlist_menu(menu, records, k)
+            elapsed += time.perf_counter() - start
+            ranked_recall += len(ideal & set(shortlist)) / len(ideal)
+        tokens = sum(menu_tokens(menu[:k]) for menu, _, _ in samples) / users
+        print(
+            f"K={k:>3}: 再現率 先頭K件 {head_recall / users:5.1%} / 事前ランキング {ranked_recall / users:5.1%}"
+            f" / 約{tokens:.0f}トークン / 採点 {elapsed / users * 1000:.2f}ミリ秒"
+        )
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    main(n, size)
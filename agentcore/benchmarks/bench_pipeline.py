@@ -0,0 +1,49 @@
+"""推薦パイプラインのベンチマーク
+
+同じリクエストを2回呼び出し（two_call: 味の好み分析 → 推薦）と
+1回呼び出し（fused）で実行し、エンドツーエンドの所要時間を比較する。
+
+実行方法:
+    uv run python -m benchmarks.bench_pipeline [試行回数] [latency秒]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from benchmarks.stub_bedrock import StubBedrockRuntime, sample_payload
+from src import agent
+
+
+async def measure(pipeline: str, iterations: int, latency: float) -> tuple[list[float], int]:
+    stub = StubBedrockRuntime(latency=latency)
+    agent.recommendation_service.bedrock_service.bedrock_runtime = stub
+
+    durations = []
+    for i in range(iterations):
+        payload = {**sample_payload(f"bench_user_{i}"), "pipeline": pipeline}
+        start = time.perf_counter()
+        result = await agent.invoke(payload)
+        durations.append(time.perf_counter() - start)
+        assert "error" not in result, result
+    return durations, stub.call_count
+
+
+async def run(iterations: int, latency: float) -> None:
+    print("=" * 60)
+    print(f"推薦パイプラインのベンチマーク（Bedrockレイテンシ: {latency:.2f}秒/回）")
+    print("=" * 60)
+    for pipeline in ("two_call", "fused"):
+        durations, calls = await measure(pipeline, iterations, latency)
+        print(
+            f"{pipeline:>8}: 平均 {statistics.mean(durations):.3f}秒 / "
+            f"最大 {max(durations):.3f}秒 / "
+            f"Bedrock呼び出し {calls / iterations:.1f}回/リクエスト"
+        )
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    asyncio.run(run(n, latency))
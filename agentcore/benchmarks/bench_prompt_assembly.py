@@ -0,0 +1,109 @@
+"""プロンプト組み立てのマイクロベンチマーク
+
+飲酒記録が10件・1,000件・10,000件の場合に、各プロンプトの組み立て
+（トークン予算への切り詰めを含む）にかかる時間を計測する。
+組み立てが記録数に対して線形であれば、1件あたりの時間はほぼ一定になる。
+Bedrockは呼び出さない。
+
+実行方法:
+    uv run python -m benchmarks.bench_prompt_assembly [予算（0で無制限）]
+"""
+
+import sys
+import time
+from collections.abc import Callable
+
+from src.models import DrinkingRecord, Menu
+from src.services.recommendation_service import (
+    FUSED_RECOMMENDATION_TEMPLATE,
+    RECOMMENDATION_TEMPLATE,
+    TASTE_ANALYSIS_TEMPLATE,
+    RecommendationService,
+)
+from src.utils.config import get_config
+
+RECORD_COUNTS = (10, 1_000, 10_000)
+
+RATINGS = ("非常に好き", "好き", "合わない", "非常に合わない")
+
+TASTE_ANALYSIS = {
+    "preferred_tastes": ["フルーティー", "華やか"],
+    "disliked_tastes": ["辛口すぎる"],
+    "analysis_summary": "フルーティーで華やかな香りの日本酒を好む傾向があります。",
+}
+
+
+def make_records(count: int) -> list[DrinkingRecord]:
+    """ベンチマーク用の飲酒記録を作成（感想の長さを記録ごとに変える）"""
+    return [
+        DrinkingRecord(
+            id=f"rec_{i}",
+            user_id="bench_user",
+            brand=f"銘柄{i % 500}",
+            impression="フルーティーで華やかな香り。" * (1 + i % 20),
+            rating=RATINGS[i % len(RATINGS)],
+        )
+        for i in range(count)
+    ]
+
+
+def measure(fn: Callable[[], str], min_seconds: float = 0.2) -> float:
+    """1回あたりの所要時間（秒）を計測"""
+    iterations = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        iterations += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / iterations
+
+
+def run(budget: int | None) -> None:
+    config = get_config()
+    if budget is not None:
+        config.recommendation_prompt_token_budget = budget
+        config.taste_analysis_prompt_token_budget = budget
+
+    service = RecommendationService()
+    menu = Menu(brands=[f"銘柄{i}" for i in range(50)])
+
+    print("=" * 72)
+    print(
+        "プロンプト組み立てのベンチマーク（予算: "
+        f"推薦 {config.recommendation_prompt_token_budget} / "
+        f"分析 {config.taste_analysis_prompt_token_budget}、0は無制限）"
+    )
+    for template in (RECOMMENDATION_TEMPLATE, TASTE_ANALYSIS_TEMPLATE, FUSED_RECOMMENDATION_TEMPLATE):
+        print(f"  {template.name}: version={template.version}")
+    print("=" * 72)
+
+    for count in RECORD_COUNTS:
+        records = make_records(count)
+        liked, disliked = service._split_by_rating(records)
+        builders = {
+            "recommendation": lambda records=records: service._build_recommendation_prompt(
+                records, TASTE_ANALYSIS, menu, 5
+            ),
+            "taste_analysis": lambda liked=liked, disliked=disliked: (
+                service._build_taste_analysis_prompt(liked, disliked)
+            ),
+            "fused": lambda records=records: service._build_fused_prompt(records, menu),
+        }
+        for name, build in builders.items():
+            seconds = measure(build)
+            print(
+                f"{count:>6}件 {name:>15}: {seconds * 1000:9.3f}ミリ秒 / "
+                f"{seconds / count * 1_000_000:7.2f}マイクロ秒/件 / "
+                f"{len(build()):>9,}文字"
+            )
+
+
+if __name__ == "__main__":
+    import structlog
+
+    # 組み立てごとのログ出力を計測に含めない
+    structlog.configure(
+        wrapper_class=structlog.make_filtering_bound_logger(30),
+    )
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else None)
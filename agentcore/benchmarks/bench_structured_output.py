@@ -0,0 +1,99 @@
+"""構造化出力（ツール使用）のベンチマーク
+
+同じリクエストを、JSONのテキスト出力とツール使用による構造化出力で実行し、
+モデルごとのパース失敗率・レイテンシ・空の推薦結果の件数を比較する。
+テキスト出力では、一定の割合で途中で切れた出力（max_tokens到達を想定）を返す。
+
+実際のモデルでの失敗率は、稼働中のサービスの get_status()["metrics"] の
+parses / parse_failure_rate で確認できる。
+
+実行方法:
+    uv run python -m benchmarks.bench_structured_output [リクエスト数] [テキスト出力の破損率]
+"""
+
+import asyncio
+import json
+import sys
+import time
+from typing import Any
+
+from benchmarks.stub_bedrock import StubBedrockRuntime, sample_payload
+from src import agent
+from src.utils.config import get_config
+
+
+class TruncatingRuntime(StubBedrockRuntime):
+    """InvokeModel（テキスト出力）の応答を一定の割合で途中で切るスタブ"""
+
+    def __init__(self, latency: float, truncate_rate: float):
+        super().__init__(latency=latency)
+        self.truncate_rate = truncate_rate
+        self._text_replies = 0
+
+    def _reply_text(self, body: dict[str, Any]) -> str:
+        text = super()._reply_text(body)
+        # 破損率に応じて決定的に破損させる（例: 20%なら5回に1回）
+        n = self._text_replies
+        self._text_replies += 1
+        if int((n + 1) * self.truncate_rate) > int(n * self.truncate_rate):
+            return text[: len(text) * 2 // 3]
+        return text
+
+    def converse(self, modelId: str, messages: list, **kwargs: Any) -> dict:
+        # ツール使用時はスキーマに沿った入力が返るため破損させない
+        with self._lock:
+            self.call_count += 1
+        time.sleep(self.latency)
+        text = StubBedrockRuntime._reply_text(self, {"messages": messages, **kwargs})
+        name = kwargs["toolConfig"]["toolChoice"]["tool"]["name"]
+        return {
+            "output": {
+                "message": {
+                    "role": "assistant",
+                    "content": [
+                        {"toolUse": {"toolUseId": "stub", "name": name, "input": json.loads(text)}}
+                    ],
+                }
+            },
+            "stopReason": "tool_use",
+            "usage": {"inputTokens": 0, "outputTokens": 0},
+        }
+
+
+async def measure(structured: bool, requests: int, truncate_rate: float) -> None:
+    config = get_config()
+    config.bedrock_structured_output = structured
+    service = agent.recommendation_service
+    service.clear_caches()
+    bedrock = service.bedrock_service
+    bedrock.metrics = type(bedrock.metrics)()
+    bedrock.bedrock_runtime = TruncatingRuntime(latency=0.05, truncate_rate=truncate_rate)
+
+    empty = 0
+    for i in range(requests):
+        result = await agent.invoke(sample_payload(f"bench_user_{structured}_{i}"))
+        if not result.get("result", {}).get("best_recommend"):
+            empty += 1
+
+    label = "構造化出力" if structured else "テキスト出力"
+    for model_id, stats in bedrock.metrics.snapshot().items():
+        rate = stats["parse_failure_rate"]
+        print(
+            f"{label:>8} [{model_id}]: パース {stats['parses']} / "
+            f"失敗率 {rate:.1%} / p50 {stats['latency_p50']:.3f}秒 / "
+            f"空の推薦結果 {empty}/{requests}件"
+        )
+
+
+async def run(requests: int, truncate_rate: float) -> None:
+    print("=" * 72)
+    print(f"構造化出力のベンチマーク（{requests}リクエスト、テキスト出力の破損率 {truncate_rate:.0%}）")
+    print("=" * 72)
+    for structured in (False, True):
+        await measure(structured, requests, truncate_rate)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    asyncio.run(run(n, rate))
@@ -0,0 +1,123 @@
+"""ベンチマーク用のBedrock Runtimeスタブ
+
+実際のBedrockを呼び出さずに、一定のレイテンシを持つ同期クライアントを模倣する。
+"""
+
+import io
+import json
+import threading
+import time
+from typing import Any
+
+TASTE_ANALYSIS_TEXT = json.dumps(
+    {
+        "preferred_tastes": ["フルーティー", "華やか"],
+        "disliked_tastes": ["辛口すぎる"],
+        "analysis_summary": "フルーティーで華やかな香りの日本酒を好む傾向があります。",
+    },
+    ensure_ascii=False,
+)
+
+RECOMMENDATION_TEXT = json.dumps(
+    {
+        "best_recommend": {
+            "brand": "獺祭 純米大吟醸",
+            "brand_description": "山口の華やかな純米大吟醸",
+            "expected_experience": "華やかな香りが口いっぱいに広がります",
+            "match_score": 95,
+        },
+        "recommendations": [
+            {
+                "brand": "十四代 本丸",
+                "brand_description": "山形の芳醇な本醸造",
+                "expected_experience": "甘みと旨味のバランスが絶妙です",
+                "category": "好みに近い",
+                "match_score": 88,
+            },
+            {
+                "brand": "新政 No.6",
+                "brand_description": "秋田の爽やかな生酛純米",
+                "expected_experience": "爽やかな酸味で新しい発見があります",
+                "category": "新しい挑戦",
+                "match_score": 80,
+            },
+        ],
+    },
+    ensure_ascii=False,
+)
+
+FUSED_TEXT = json.dumps(
+    {"taste_profile": json.loads(TASTE_ANALYSIS_TEXT), **json.loads(RECOMMENDATION_TEXT)},
+    ensure_ascii=False,
+)
+
+
+def sample_payload(user_id: str = "bench_user") -> dict:
+    """ベンチマーク用の推薦リクエストペイロードを作成"""
+    return {
+        "type": "recommendation",
+        "user_id": user_id,
+        "drinking_records": [
+            {
+                "id": "rec_001",
+                "user_id": user_id,
+                "brand": "獺祭 純米大吟醸",
+                "impression": "フルーティーで華やかな香り。甘みと酸味のバランスが良い。",
+                "rating": "非常に好き",
+            },
+            {
+                "id": "rec_002",
+                "user_id": user_id,
+                "brand": "菊正宗 上撰",
+                "impression": "辛口すぎて自分には合わない。",
+                "rating": "合わない",
+            },
+        ],
+        "menu_brands": ["獺祭 純米大吟醸", "十四代 本丸", "新政 No.6"],
+    }
+
+
+class StubBedrockRuntime:
+    """一定のレイテンシでNova形式のレスポンスを返すbedrock-runtimeスタブ"""
+
+    def __init__(self, latency: float = 0.5):
+        self.latency = latency
+        self.call_count = 0
+        self._lock = threading.Lock()
+
+    def _reply_text(self, body: dict[str, Any]) -> str:
+        prompt = json.dumps(body, ensure_ascii=False)
+        if "taste_profile" in prompt:
+            return FUSED_TEXT
+        if "味の好みを分析してください" in prompt:
+            return TASTE_ANALYSIS_TEXT
+        return RECOMMENDATION_TEXT
+
+    def converse(self, modelId: str, messages: list, **kwargs: Any) -> dict:
+        """Converse API（toolConfigを指定した場合はツールの入力として返す）"""
+        with self._lock:
+            self.call_count += 1
+        time.sleep(self.latency)
+        text = self._reply_text({"system": kwargs.get("system"), "messages": messages})
+        tool_config = kwargs.get("toolConfig")
+        if tool_config is not None:
+            name = tool_config["toolChoice"]["tool"]["name"]
+            block = {"toolUse": {"toolUseId": "stub", "name": name, "input": json.loads(text)}}
+            stop_reason = "tool_use"
+        else:
+            block = {"text": text}
+            stop_reason = "end_turn"
+        return {
+            "output": {"message": {"role": "assistant", "content": [block]}},
+            "stopReason": stop_reason,
+            "usage": {"inputTokens": 0, "outputTokens": 0},
+        }
+
+    def invoke_model(self, modelId: str, body: str, **kwargs: Any) -> dict:
+        """同期的にスリープしてからレスポンスを返す（boto3と同じくブロッキング）"""
+        with self._lock:
+            self.call_count += 1
+        time.sleep(self.latency)
+        text = self._reply_text(json.loads(body))
+        payload = {"output": {"message": {"content": [{"text": text}]}}}
+        return {"body": io.BytesIO(json.dumps(payload).encode("utf-8"))}
@@ -1,5 +1,10 @@
 """メインエージェント - Amazon Bedrock AgentCore Runtime統合（マルチエージェント構成）"""
 
+import hashlib
+import json
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import structlog
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
 from strands import Agent
@@ -9,20 +14,36 @@ from .models import Menu, RecommendationResponse
 from .services.recommendation_service import RecommendationService
 from .services.drinking_record_service import DrinkingRecordService
 from .utils.logging import setup_logging
+from .utils.single_flight import SingleFlight
 from .utils.config import get_config
 
 # ログ設定をセットアップ
 setup_logging()
 logger = structlog.get_logger(__name__)
 
-# AgentCore Appを初期化
-app = BedrockAgentCoreApp()
-
 # サービスインスタンスをグローバルに保持
 recommendation_service = RecommendationService()
 drinking_record_service = DrinkingRecordService()
 
 
+@asynccontextmanager
+async def lifespan(app: BedrockAgentCoreApp):
+    """起動時にBedrockクライアントをウォームアップし、キープアライブを開始する"""
+    bedrock_service = recommendation_service.bedrock_service
+    try:
+        await bedrock_service.warm_up()
+    except Exception as e:
+        # ウォームアップの失敗で起動を止めない
+        logger.warning("Bedrockクライアントのウォームアップに失敗", error=str(e))
+    bedrock_service.start_keepalive()
+    yield
+    await bedrock_service.stop_keepalive()
+
+
+# AgentCore Appを初期化
+app = BedrockAgentCoreApp(lifespan=lifespan)
+
+
 class SakeRecommendationAgent:
     """日本酒推薦エージェント
 
@@ -48,7 +69,8 @@ class SakeRecommendationAgent:
         user_id: str, 
         drinking_records_data: list[dict],
         menu_brands: list[str] = None, 
-        max_recommendations: int = 10
+        max_recommendations: int = 10,
+        pipeline: str | None = None,
     ) -> dict:
         """日本酒を推薦
 
@@ -57,6 +79,7 @@ class SakeRecommendationAgent:
             drinking_records_data: 飲酒記録データのリスト
             menu_brands: メニューの銘柄リスト（任意）
             max_recommendations: 最大推薦数（互換性のため保持、実際は使用されない）
+            pipeline: 推薦パイプライン（"two_call" または "fused"、省略時は設定値）
 
         Returns:
             推薦結果の辞書
@@ -85,6 +108,7 @@ class SakeRecommendationAgent:
                 drinking_records=drinking_records,
                 menu=menu,
                 max_recommendations=max_recommendations,
+                pipeline=pipeline,
             )
 
             logger.info(
@@ -102,6 +126,45 @@ class SakeRecommendationAgent:
             raise
 
 
+    async def recommend_stream(
+        self,
+        user_id: str,
+        drinking_records_data: list[dict],
+        menu_brands: list[str] = None,
+        max_recommendations: int = 10,
+        pipeline: str | None = None,
+    ) -> AsyncIterator[dict]:
+        """日本酒を推薦（ストリーミング）
+
+        Args:
+            user_id: ユーザーID
+            drinking_records_data: 飲酒記録データのリスト
+            menu_brands: メニューの銘柄リスト（任意）
+            max_recommendations: 最大推薦数（互換性のため保持、実際は使用されない）
+            pipeline: 推薦パイプライン（"two_call" または "fused"、省略時は設定値）
+
+        Yields:
+            推薦イベントの辞書（best_recommend → recommendation... → complete）
+        """
+        logger.info("日本酒推薦（ストリーミング）を開始", user_id=user_id)
+
+        menu = Menu(brands=menu_brands) if menu_brands else None
+        drinking_records = await drinking_record_service.parse_records(
+            drinking_records_data
+        )
+
+        async for event in recommendation_service.stream_recommendations(
+            user_id=user_id,
+            drinking_records=drinking_records,
+            menu=menu,
+            max_recommendations=max_recommendations,
+            pipeline=pipeline,
+        ):
+            yield event
+
+        logger.info("日本酒推薦（ストリーミング）を完了", user_id=user_id)
+
+
 class TasteAnalysisAgent:
     """味の好み分析エージェント
 
@@ -168,13 +231,37 @@ class AgentRouter:
     def __init__(self, model: BedrockModel):
         self.recommendation_agent = SakeRecommendationAgent(model)
         self.taste_analysis_agent = TasteAnalysisAgent(model)
+        # 同時に届いた同一リクエストを1回の処理にまとめる
+        self.single_flight = SingleFlight()
         logger.info("エージェントルーターを初期化")
 
     async def route(self, request_type: str, params: dict) -> dict:
         """リクエストを適切なエージェントにルーティング
 
+        同じリクエストタイプ・ユーザー・内容のリクエストが処理中の場合は、
+        新たに処理せずに処理中の結果を待つ。
+
         Args:
-            request_type: リクエストタイプ（"recommendation" または "taste_analysis"）
+            request_type: リクエストタイプ（"recommendation"、"taste_analysis" または "cache_invalidation"）
+            params: エージェントに渡すパラメータ
+
+        Returns:
+            処理結果
+        """
+        if request_type == "cache_invalidation":
+            return await self._route(request_type, params)
+
+        content_hash = hashlib.sha256(
+            json.dumps(params, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        ).hexdigest()
+        key = (request_type, params.get("user_id"), content_hash)
+        return await self.single_flight.do(key, lambda: self._route(request_type, params))
+
+    async def _route(self, request_type: str, params: dict) -> dict:
+        """リクエストを適切なエージェントにルーティング（シングルフライトなし）
+
+        Args:
+            request_type: リクエストタイプ（"recommendation"、"taste_analysis" または "cache_invalidation"）
             params: エージェントに渡すパラメータ
 
         Returns:
@@ -201,6 +288,7 @@ class AgentRouter:
                 drinking_records_data=drinking_records_data,
                 menu_brands=params.get("menu_brands"),
                 max_recommendations=params.get("max_recommendations", 10),
+                pipeline=params.get("pipeline"),
             )
             return result
 
@@ -221,12 +309,60 @@ class AgentRouter:
             )
             return result
 
+        elif request_type == "cache_invalidation":
+            # 飲酒記録の登録・更新時に、ユーザーのキャッシュを破棄
+            user_id = params.get("user_id")
+            if not user_id:
+                return {"error": "キャッシュの破棄にはuser_idが必要です"}
+
+            recommendation_service.invalidate_user(user_id)
+            return {"invalidated": True, "user_id": user_id}
+
         else:
-            error_msg = f"不正なリクエストタイプです: {request_type}。'recommendation' または 'taste_analysis' を指定してください。"
+            error_msg = f"不正なリクエストタイプです: {request_type}。'recommendation'、'taste_analysis' または 'cache_invalidation' を指定してください。"
             logger.error("不正なリクエストタイプ", request_type=request_type)
             return {"error": error_msg}
 
 
+    async def route_stream(self, request_type: str, params: dict) -> AsyncIterator[dict]:
+        """リクエストを適切なエージェントにルーティング（ストリーミング）
+
+        推薦リクエストは結果を逐次yieldする。その他のリクエストは
+        通常の処理結果を1件のイベントとしてyieldする。
+
+        Args:
+            request_type: リクエストタイプ（"recommendation" または "taste_analysis"）
+            params: エージェントに渡すパラメータ
+
+        Yields:
+            イベントの辞書
+        """
+        if request_type != "recommendation":
+            result = await self.route(request_type, params)
+            yield {"event": "error" if "error" in result else "complete", "data": result}
+            return
+
+        user_id = params.get("user_id")
+        if not user_id:
+            yield {"event": "error", "data": {"error": "推薦にはuser_idが必要です"}}
+            return
+
+        drinking_records_data = params.get("drinking_records", [])
+        if not drinking_records_data:
+            yield {"event": "error", "data": {"error": "推薦にはdrinking_recordsが必要です"}}
+            return
+
+        logger.info("日本酒推薦エージェントを呼び出し（ストリーミング）", user_id=user_id)
+        async for event in self.recommendation_agent.recommend_stream(
+            user_id=user_id,
+            drinking_records_data=drinking_records_data,
+            menu_brands=params.get("menu_brands"),
+            max_recommendations=params.get("max_recommendations", 10),
+            pipeline=params.get("pipeline"),
+        ):
+            yield event
+
+
 def create_router() -> AgentRouter:
     """エージェントルーターを作成
 
@@ -252,8 +388,22 @@ def create_router() -> AgentRouter:
 router = create_router()
 
 
+async def _stream_invoke(request_type: str, params: dict) -> AsyncIterator[dict]:
+    """ストリーミング応答を生成し、途中のエラーをエラーイベントに変換する"""
+    try:
+        async for event in router.route_stream(request_type, params):
+            yield event
+        logger.info("エージェント応答のストリーミングを完了", request_type=request_type)
+    except Exception as e:
+        logger.error("エージェント実行でエラーが発生", error=str(e), exc_info=True)
+        yield {
+            "event": "error",
+            "data": {"error": f"エージェント処理に失敗しました: {str(e)}"},
+        }
+
+
 @app.entrypoint
-async def invoke(payload: dict) -> dict:
+async def invoke(payload: dict) -> dict | AsyncIterator[dict]:
     """AgentCore Runtimeエントリーポイント
 
     Args:
@@ -261,13 +411,22 @@ async def invoke(payload: dict) -> dict:
             - type: リクエストタイプ（必須）
                 - "recommendation": 日本酒推薦
                 - "taste_analysis": 味の好み分析
+                - "cache_invalidation": ユーザーのキャッシュを破棄（飲酒記録の登録・更新時）
             - user_id: ユーザーID（必須）
             - drinking_records: 飲酒記録データのリスト（必須）
             - menu_brands: メニュー銘柄リスト（推薦時のみ、オプション）
             - max_recommendations: 最大推薦数（推薦時のみ、オプション、デフォルト: 10）
+            - pipeline: 推薦パイプライン（推薦時のみ、オプション）
+                - "two_call": 味の好み分析と推薦を別々に呼び出す
+                - "fused": 味の好み分析と推薦を1回の呼び出しで行う（低レイテンシ）
+            - stream: trueの場合、結果をイベントとして逐次返す（オプション、デフォルト: false）
 
     Returns:
-        エージェントの応答
+        エージェントの応答。streamがtrueの場合は以下のイベントを返す非同期ジェネレーター
+            - {"event": "best_recommend", "data": {...}}: best_recommendの確定時
+            - {"event": "recommendation", "data": {...}}: 各推薦の確定時
+            - {"event": "complete", "data": {...}}: 全体結果
+            - {"event": "error", "data": {"error": "..."}}: エラー時
 
     Examples:
         推薦リクエスト:
@@ -320,8 +479,13 @@ async def invoke(payload: dict) -> dict:
             "drinking_records": payload.get("drinking_records", []),
             "menu_brands": payload.get("menu_brands"),
             "max_recommendations": payload.get("max_recommendations", 10),
+            "pipeline": payload.get("pipeline"),
         }
 
+        # ストリーミング指定時は非同期ジェネレーターを返す（AgentCoreがSSEで送信）
+        if payload.get("stream"):
+            return _stream_invoke(request_type, params)
+
         # ルーターでエージェントに振り分け
         result = await router.route(request_type, params)
 
@@ -1,149 +1,510 @@
 """Amazon Bedrock サービス"""
 
+import asyncio
 import json
+import threading
 import time
-from typing import Dict, Any
-import structlog
+from collections.abc import AsyncIterator, Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
 import boto3
-from botocore.exceptions import ClientError
+import structlog
 from botocore.config import Config
+from botocore.exceptions import ClientError
 
 from ..utils.config import get_config
+from ..utils.embedding_cache import EmbeddingCache, content_key
+from ..utils.metrics import BedrockMetrics
+from ..utils.tokens import estimate_tokens
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from .model_adapters import ModelAdapter, get_adapter
+from .rate_limiter import RateLimiter, RateLimitTimeoutError
+from .retry_policy import ErrorClass, RetryPolicy, classify_error
+from .structured_output import OutputTool
 
 logger = structlog.get_logger(__name__)
 
 
+@dataclass(frozen=True)
+class GenerationInfo:
+    """テキスト生成に応答したモデルと出力方式"""
+
+    model_id: str
+    structured: bool  # ツール使用による構造化出力で生成した場合True
+
+
+# 現在のタスクで直近に成功したテキスト生成（パース結果をモデルごとに集計するために使用）
+_last_generation: ContextVar[GenerationInfo | None] = ContextVar(
+    "bedrock_last_generation", default=None
+)
+
+
 class BedrockService:
     """Amazon Bedrock サービス"""
 
-    # リトライ設定
-    MAX_RETRIES = 2
-    RETRY_DELAY = 1.0  # 秒（固定間隔）
     TIMEOUT = 15  # 秒
 
-    def __init__(self):
+    def __init__(
+        self,
+        retry_policy: RetryPolicy | None = None,
+        rate_limiter: RateLimiter | None = None,
+        embedding_cache: EmbeddingCache | None = None,
+    ):
         config = get_config()
+        # リトライポリシー（差し替え可能）と試行単位のメトリクス
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.metrics = BedrockMetrics()
+        # モデルIDごとのRPM/TPMレート制限
+        self.rate_limiter = rate_limiter or RateLimiter()
+        # 埋め込みベクトルのコンテンツアドレス型キャッシュ
+        self.embedding_cache = (
+            embedding_cache
+            if embedding_cache is not None
+            else EmbeddingCache(config.embedding_cache_path)
+        )
+        # モデルIDごとのサーキットブレーカー
+        self._breakers: dict[str, CircuitBreaker] = {}
         # タイムアウト設定を含むboto3設定
         boto_config = Config(
             read_timeout=self.TIMEOUT,
             connect_timeout=5,
             retries={"max_attempts": 0},  # boto3の自動リトライを無効化（手動で制御）
+            max_pool_connections=config.bedrock_max_concurrency,
+            tcp_keepalive=True,
         )
-        self.bedrock_runtime = boto3.client(
+        # boto3.clientと同じデフォルトセッションを使用（認証情報の解決をwarm_upで行うため保持）
+        if boto3.DEFAULT_SESSION is None:
+            boto3.setup_default_session()
+        self._session = boto3.DEFAULT_SESSION
+        self.bedrock_runtime = self._session.client(
             "bedrock-runtime",
             region_name=config.bedrock_region,
             config=boto_config,
         )
+        # boto3は同期APIのため、専用のスレッドプールで実行してイベントループをブロックしない
+        # （boto3クライアントはスレッドセーフ）
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.bedrock_max_concurrency,
+            thread_name_prefix="bedrock",
+        )
         # model_idは毎回configから取得するため、プロパティとして定義
         self._config = config
+        # 最後にBedrockを呼び出した時刻（キープアライブの判定に使用）
+        self._last_used = time.monotonic()
+        self._keepalive_task: asyncio.Task | None = None
     
     @property
     def model_id(self) -> str:
         """現在のmodel_idを取得（常に最新のconfigを参照）"""
         return get_config().bedrock_model_id
 
-    def _build_request_body(
-        self, prompt: str, max_tokens: int, temperature: float
-    ) -> Dict[str, Any]:
-        """モデルに応じたリクエストボディを構築
+    @property
+    def model_chain(self) -> list[str]:
+        """呼び出し順のモデルIDリスト（設定のモデル → フォールバックモデル）"""
+        chain = [self.model_id]
+        for model_id in get_config().bedrock_fallback_model_ids:
+            if model_id not in chain:
+                chain.append(model_id)
+        return chain
+
+    def _breaker(self, model_id: str) -> CircuitBreaker:
+        """モデルIDごとのサーキットブレーカーを取得（初回は作成）"""
+        breaker = self._breakers.get(model_id)
+        if breaker is None:
+            breaker = self._breakers.setdefault(model_id, CircuitBreaker(model_id))
+        return breaker
+
+    def get_status(self) -> dict[str, Any]:
+        """監視用の状態を取得
+
+        Returns:
+            dict[str, Any]: モデルごとの試行メトリクス・サーキットの状態・レート制限の状態
+        """
+        return {
+            "metrics": self.metrics.snapshot(),
+            "circuits": {
+                model_id: breaker.snapshot()
+                for model_id, breaker in self._breakers.items()
+            },
+            "rate_limits": self.rate_limiter.snapshot(),
+        }
+
+    def _invoke_model_sync(self, model_id: str, body: dict[str, Any]) -> dict[str, Any]:
+        """Bedrockを同期的に呼び出し、レスポンスボディを読み込む（ワーカースレッドで実行）
 
         Args:
-            prompt: プロンプト
-            max_tokens: 最大トークン数
-            temperature: 温度パラメータ
+            model_id: モデルID
+            body: リクエストボディ
 
         Returns:
-            Dict[str, Any]: リクエストボディ
+            dict[str, Any]: パース済みのレスポンスボディ
         """
-        model_id = self.model_id.lower()
-
-        # Claude系モデル
-        if "claude" in model_id or "anthropic" in model_id:
-            return {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-                "messages": [{"role": "user", "content": prompt}],
-            }
-        
-        # Nova系モデル
-        elif "nova" in model_id:
-            return {
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": [{"text": prompt}]
-                    }
-                ],
-                "inferenceConfig": {
-                    "max_new_tokens": max_tokens,
-                    "temperature": temperature,
-                }
-            }
-        
-        # その他のモデル（デフォルト：Claude形式）
-        else:
+        self._last_used = time.monotonic()
+        response = self.bedrock_runtime.invoke_model(
+            modelId=model_id,
+            body=json.dumps(body),
+            contentType="application/json",
+            accept="application/json",
+        )
+        # StreamingBodyの読み込みもブロッキングI/Oのため、同じスレッド内で行う
+        return json.loads(response["body"].read())
+
+    async def _invoke_model(self, model_id: str, body: dict[str, Any]) -> dict[str, Any]:
+        """Bedrockを非同期に呼び出す
+
+        同期APIであるboto3の呼び出しを上限付きスレッドプールで実行し、
+        イベントループをブロックせずに結果を待機する。
+
+        Args:
+            model_id: モデルID
+            body: リクエストボディ
+
+        Returns:
+            dict[str, Any]: パース済みのレスポンスボディ
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._invoke_model_sync, model_id, body
+        )
+
+    async def _invoke_text(
+        self, model_id: str, adapter: ModelAdapter, body: dict[str, Any]
+    ) -> str:
+        """InvokeModelで呼び出し、生成テキストを返す"""
+        response_body = await self._invoke_model(model_id, body)
+        self.metrics.record_usage(model_id, adapter.extract_usage(response_body))
+        return adapter.parse_response(response_body)
+
+    def _converse_sync(
+        self,
+        model_id: str,
+        system_prompt: str | None,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        tool_config: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Converse APIを同期的に呼び出す（ワーカースレッドで実行）
+
+        プロンプトキャッシュが有効な場合は、静的なシステムプロンプトの直後にキャッシュポイントを置き、
+        2回目以降の呼び出しでプレフィックスをプロンプトキャッシュから読み込ませる。
+        """
+        self._last_used = time.monotonic()
+        kwargs: dict[str, Any] = {}
+        if system_prompt:
+            system = [{"text": system_prompt}]
+            if get_config().bedrock_prompt_caching:
+                system.append({"cachePoint": {"type": "default"}})
+            kwargs["system"] = system
+        if tool_config is not None:
+            kwargs["toolConfig"] = tool_config
+        return self.bedrock_runtime.converse(
+            modelId=model_id,
+            messages=[{"role": "user", "content": [{"text": prompt}]}],
+            inferenceConfig={"maxTokens": max_tokens, "temperature": temperature},
+            **kwargs,
+        )
+
+    async def _converse_text(
+        self,
+        model_id: str,
+        system_prompt: str | None,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        output_tool: OutputTool | None = None,
+    ) -> str:
+        """Converse APIで呼び出し、生成テキストを返す
+
+        output_toolを指定した場合はツールの呼び出しを強制し、ツールの入力をJSON文字列として返す。
+        ツールが呼び出されなかった場合は、生成されたテキストを返す。
+
+        Raises:
+            ValueError: レスポンスにツールの入力もテキストも含まれない場合
+        """
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            self._executor,
+            self._converse_sync,
+            model_id,
+            system_prompt,
+            prompt,
+            max_tokens,
+            temperature,
+            output_tool.tool_config() if output_tool is not None else None,
+        )
+
+        usage = response.get("usage", {})
+        self.metrics.record_usage(model_id, usage)
+        logger.info(
+            "Converse APIのトークン使用量",
+            model_id=model_id,
+            input_tokens=usage.get("inputTokens", 0),
+            output_tokens=usage.get("outputTokens", 0),
+            cache_read_input_tokens=usage.get("cacheReadInputTokens", 0),
+            cache_write_input_tokens=usage.get("cacheWriteInputTokens", 0),
+        )
+
+        content = response.get("output", {}).get("message", {}).get("content", [])
+        if output_tool is not None:
+            for block in content:
+                tool_use = block.get("toolUse")
+                if tool_use and tool_use.get("name") == output_tool.name:
+                    return json.dumps(tool_use.get("input", {}), ensure_ascii=False)
             logger.warning(
-                "未知のモデルIDです。Claude形式を使用します",
-                model_id=model_id
+                "ツールが呼び出されなかったため生成テキストを使用",
+                model_id=model_id,
+                tool=output_tool.name,
+                stop_reason=response.get("stopReason"),
             )
-            return {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-                "messages": [{"role": "user", "content": prompt}],
-            }
+        texts = [block["text"] for block in content if "text" in block]
+        if not texts:
+            raise ValueError("Converseレスポンスにテキストが含まれていません")
+        return "".join(texts)
+
+    def _resolve_credentials(self) -> None:
+        """AWS認証情報を解決する（ワーカースレッドで実行）"""
+        credentials = self._session.get_credentials()
+        if credentials is not None:
+            # AssumeRole等の遅延取得される認証情報もここで取得しておく
+            credentials.get_frozen_credentials()
+
+    def _open_connection(self) -> None:
+        """Bedrockへの接続を1本確立する（ワーカースレッドで実行）
+
+        同じクライアントで読み取り専用のListAsyncInvokes（1件）を呼び出す。モデルは
+        呼び出さないため課金やモデルのクォータの消費はなく、TLSハンドシェイク・署名・
+        エンドポイント解決が行われ、確立した接続はキープアライブ接続として接続プールに残る。
+        権限がなくAccessDeniedExceptionで拒否された場合も接続は確立される。
+        """
+        self._last_used = time.monotonic()
+        try:
+            self.bedrock_runtime.list_async_invokes(maxResults=1)
+        except ClientError:
+            pass
+
+    async def warm_up(
+        self, connections: int | None = None, probe: bool | None = None
+    ) -> dict[str, float]:
+        """起動時のウォームアップ
 
-    def _parse_response(self, response_body: Dict[str, Any]) -> str:
-        """モデルに応じたレスポンスをパース
+        認証情報の解決、キープアライブ接続の確立、（任意で）最小トークン数の
+        試験呼び出しを行い、初回リクエストのレイテンシを削減する。
 
         Args:
-            response_body: レスポンスボディ
+            connections: 確立する接続数（省略時は設定値）
+            probe: 試験呼び出しを行うか（省略時は設定値）
+
+        Returns:
+            dict[str, float]: 各フェーズの所要時間（秒）
+        """
+        config = get_config()
+        connections = (
+            connections if connections is not None else config.bedrock_warmup_connections
+        )
+        probe = probe if probe is not None else config.bedrock_warmup_probe
+        loop = asyncio.get_running_loop()
+        timings: dict[str, float] = {}
+
+        started = time.monotonic()
+        await loop.run_in_executor(self._executor, self._resolve_credentials)
+        timings["credentials"] = time.monotonic() - started
+
+        # 接続の確立はモデルを呼び出さないため、モデルのレート制限の枠は使わない
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(self._executor, self._open_connection)
+                for _ in range(min(connections, config.bedrock_max_concurrency))
+            ),
+            return_exceptions=True,
+        )
+        timings["connections"] = time.monotonic() - started
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            logger.warning(
+                "接続の事前確立に失敗",
+                failed=len(failures),
+                error=str(failures[0]),
+            )
+
+        if probe:
+            started = time.monotonic()
+            try:
+                body = get_adapter(self.model_id).build_request("ping", 1, 0.0)
+                await self.rate_limiter.acquire(
+                    self.model_id, estimate_tokens("ping") + 1, max_wait=0
+                )
+                await self._invoke_model(self.model_id, body)
+            except Exception as e:
+                logger.warning("試験呼び出しに失敗", model_id=self.model_id, error=str(e))
+            timings["probe"] = time.monotonic() - started
+
+        logger.info(
+            "Bedrockクライアントのウォームアップを完了",
+            model_id=self.model_id,
+            connections=len(results) - len(failures),
+            **{f"{phase}_seconds": round(t, 3) for phase, t in timings.items()},
+        )
+        return timings
+
+    def start_keepalive(self, interval: float | None = None) -> None:
+        """アイドル時に接続プールを維持する定期タスクを開始
+
+        直近`interval`秒間Bedrockを呼び出していない場合に接続を張り直し、
+        アイドルタイムアウトで接続プールが空になるのを防ぐ。
+
+        Args:
+            interval: 実行間隔（秒、省略時は設定値。0以下の場合は開始しない）
+        """
+        config = get_config()
+        interval = interval if interval is not None else config.bedrock_keepalive_interval
+        if interval <= 0 or self._keepalive_task is not None:
+            return
+
+        async def keepalive() -> None:
+            while True:
+                await asyncio.sleep(interval)
+                if time.monotonic() - self._last_used < interval:
+                    continue
+                try:
+                    await self.warm_up(probe=False)
+                except Exception as e:
+                    logger.warning("キープアライブに失敗", error=str(e))
+
+        self._keepalive_task = asyncio.create_task(keepalive())
+        logger.info("キープアライブを開始", interval=interval)
+
+    async def stop_keepalive(self) -> None:
+        """キープアライブの定期タスクを停止"""
+        task, self._keepalive_task = self._keepalive_task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _invoke_hedged(
+        self,
+        model_id: str,
+        call: Callable[[], Awaitable[str]],
+        estimated_tokens: int,
+    ) -> str:
+        """Bedrockを呼び出し、遅い場合は同一リクエストをもう1件送る（ヘッジ）
+
+        ヘッジが有効で、呼び出しが直近の成功レイテンシのパーセンタイルを超えても
+        完了しない場合に2件目を送信し、先に成功した応答を採用する。
+        2件目もレート制限の枠を消費し、枠が即座に取れない場合は送信しない。
+        boto3の同期呼び出しは中断できないため、採用されなかった呼び出しの結果は破棄される。
+
+        Args:
+            model_id: モデルID
+            call: Bedrockを1回呼び出して生成テキストを返す関数
+            estimated_tokens: レート制限用の推定トークン数
 
         Returns:
             str: 生成されたテキスト
+        """
+        config = get_config()
+        threshold = None
+        if config.bedrock_hedging_enabled:
+            threshold = self.metrics.success_latency_percentile(
+                model_id,
+                config.bedrock_hedging_percentile,
+                min_samples=config.bedrock_hedging_min_samples,
+            )
+        if threshold is None:
+            return await call()
 
-        Raises:
-            ValueError: レスポンスのパースに失敗した場合
+        primary = asyncio.ensure_future(call())
+        pending = {primary}
+        first_error: BaseException | None = None
+        # 呼び出し元がキャンセルされた場合も、未完了の呼び出しを残さない
+        try:
+            done, _ = await asyncio.wait(pending, timeout=threshold)
+            if done:
+                return primary.result()
+
+            try:
+                await self.rate_limiter.acquire(model_id, estimated_tokens, max_wait=0)
+            except RateLimitTimeoutError:
+                logger.info("レート制限の枠がないためヘッジを送信しません", model_id=model_id)
+                return await primary
+
+            logger.info(
+                "ヘッジリクエストを送信", model_id=model_id, threshold=round(threshold, 3)
+            )
+            hedge = asyncio.ensure_future(call())
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        self.metrics.record_hedge(model_id, won=task is hedge)
+                        return task.result()
+                    first_error = first_error or task.exception()
+            self.metrics.record_hedge(model_id, won=False)
+            raise first_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def last_generation(self) -> GenerationInfo:
+        """現在のタスクで直近に成功したテキスト生成の情報
+
+        まだ生成していない場合は、設定のモデルによるテキスト出力とみなす。
         """
-        model_id = self.model_id.lower()
-
-        # Claude系モデル
-        if "claude" in model_id or "anthropic" in model_id:
-            if "content" not in response_body or not response_body["content"]:
-                raise ValueError("Bedrockレスポンスにcontentフィールドがありません")
-            return response_body["content"][0]["text"]
-        
-        # Nova系モデル
-        elif "nova" in model_id:
-            if "output" not in response_body or "message" not in response_body["output"]:
-                raise ValueError("Bedrockレスポンスにoutput.messageフィールドがありません")
-            message = response_body["output"]["message"]
-            if "content" not in message or not message["content"]:
-                raise ValueError("Bedrockレスポンスにoutput.message.contentフィールドがありません")
-            return message["content"][0]["text"]
-        
-        # その他のモデル（デフォルト：Claude形式）
-        else:
-            if "content" not in response_body or not response_body["content"]:
-                raise ValueError("Bedrockレスポンスにcontentフィールドがありません")
-            return response_body["content"][0]["text"]
+        info = _last_generation.get()
+        return info if info is not None else GenerationInfo(self.model_id, False)
+
+    @staticmethod
+    def _join_prompt(system_prompt: str | None, prompt: str) -> str:
+        """システムプロンプトとプロンプトを1つのプロンプトに連結"""
+        if not system_prompt:
+            return prompt
+        return f"{system_prompt}\n\n{prompt}"
 
     async def generate_text(
-        self, prompt: str, max_tokens: int = 2000, temperature: float = 0.7
+        self,
+        prompt: str,
+        max_tokens: int = 2000,
+        temperature: float = 0.7,
+        system_prompt: str | None = None,
+        output_tool: OutputTool | None = None,
     ) -> str:
-        """テキスト生成（リトライ機能付き）
+        """テキスト生成（リトライ・フォールバック機能付き）
+
+        設定のモデルから順に、サーキットが閉じているモデルで生成を試みる。
+        モデルが失敗した場合、またはサーキットが開いた場合は次のフォールバックモデルへ切り替える。
+
+        system_promptを指定し、プロンプトキャッシュが有効な場合はConverse APIを使用し、
+        system_promptをキャッシュ対象のシステムブロックとして送信する。
+        無効な場合はsystem_promptをpromptの前に連結してInvokeModelで送信する。
+
+        output_toolを指定し、構造化出力が有効かつモデルがツール使用に対応している場合は、
+        Converse APIでツールの呼び出しを強制し、ツールの入力（JSON文字列）を返す。
+        応答したモデルと出力方式は`last_generation()`で取得できる。
 
         Args:
-            prompt: プロンプト
+            prompt: プロンプト（リクエストごとに変わる部分）
             max_tokens: 最大トークン数
             temperature: 温度パラメータ
+            system_prompt: 静的なシステムプロンプト（任意）
+            output_tool: 出力スキーマを入力とするツール（任意）
 
         Returns:
             str: 生成されたテキスト
 
         Raises:
             ClientError: Bedrock APIエラー
+            CircuitOpenError: すべてのモデルのサーキットが開いている場合
             Exception: その他のエラー
         """
         logger.info(
@@ -154,112 +515,300 @@ class BedrockService:
             temperature=temperature,
         )
 
-        last_error = None
-        for attempt in range(self.MAX_RETRIES + 1):
+        deadline = time.monotonic() + self.retry_policy.deadline
+        last_error: Exception | None = None
+        for model_id in self.model_chain:
+            breaker = self._breaker(model_id)
+            if not breaker.allow_request():
+                logger.warning("サーキットが開いているためモデルをスキップ", model_id=model_id)
+                continue
+            if last_error is not None:
+                logger.warning("フォールバックモデルに切り替え", model_id=model_id)
+            probe = breaker.state == CircuitState.HALF_OPEN
             try:
-                # モデルに応じたリクエストボディを構築
-                body = self._build_request_body(prompt, max_tokens, temperature)
+                return await self._generate_with_retries(
+                    model_id,
+                    breaker,
+                    prompt,
+                    max_tokens,
+                    temperature,
+                    deadline,
+                    system_prompt,
+                    output_tool,
+                )
+            except Exception as e:
+                last_error = e
+            finally:
+                # 結果を記録せずに終わった試験呼び出しでも枠を解放する
+                if probe:
+                    breaker.release_probe()
+
+        if last_error is not None:
+            raise last_error
+        raise CircuitOpenError("利用可能なBedrockモデルがありません（すべてのサーキットが開いています）")
+
+    async def _generate_with_retries(
+        self,
+        model_id: str,
+        breaker: CircuitBreaker,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        deadline: float,
+        system_prompt: str | None = None,
+        output_tool: OutputTool | None = None,
+    ) -> str:
+        """1つのモデルでテキスト生成をリトライ付きで実行
+
+        Args:
+            model_id: モデルID
+            breaker: モデルのサーキットブレーカー
+            prompt: プロンプト
+            max_tokens: 最大トークン数
+            temperature: 温度パラメータ
+            deadline: リクエスト全体の期限（time.monotonic()基準）
+            system_prompt: 静的なシステムプロンプト（任意）
+            output_tool: 出力スキーマを入力とするツール（任意）
 
+        Returns:
+            str: 生成されたテキスト
+        """
+        config = get_config()
+        adapter = get_adapter(model_id)
+        structured = (
+            output_tool is not None
+            and config.bedrock_structured_output
+            and adapter.supports_tool_use
+        )
+        if structured:
+            # Converse API（ツールの呼び出しを強制して構造化出力を受け取る）
+            def call() -> Awaitable[str]:
+                return self._converse_text(
+                    model_id, system_prompt, prompt, max_tokens, temperature, output_tool
+                )
+        elif system_prompt is not None and config.bedrock_prompt_caching:
+            # Converse API（システムプロンプトをプロンプトキャッシュの対象にする）
+            def call() -> Awaitable[str]:
+                return self._converse_text(
+                    model_id, system_prompt, prompt, max_tokens, temperature
+                )
+        else:
+            body = adapter.build_request(
+                self._join_prompt(system_prompt, prompt), max_tokens, temperature
+            )
+
+            def call() -> Awaitable[str]:
+                return self._invoke_text(model_id, adapter, body)
+
+        # 入力の推定トークン数 + 最大出力トークン数をTPMの消費量とする
+        estimated_tokens = (
+            estimate_tokens(system_prompt or "") + estimate_tokens(prompt) + max_tokens
+        )
+        attempt = 0
+        while True:
+            attempt += 1
+            # レート制限の枠を取得（待機時間はレイテンシに含めない）
+            await self.rate_limiter.acquire(model_id, estimated_tokens)
+            started = time.monotonic()
+            try:
                 logger.debug(
                     "Bedrock呼び出しを実行",
-                    attempt=attempt + 1,
-                    max_attempts=self.MAX_RETRIES + 1,
-                    model_id=self.model_id,
+                    attempt=attempt,
+                    model_id=model_id,
                 )
 
-                # Bedrockを呼び出し（タイムアウト設定済み）
-                response = self.bedrock_runtime.invoke_model(
-                    modelId=self.model_id,
-                    body=json.dumps(body),
-                    contentType="application/json",
-                    accept="application/json",
+                # Bedrockを呼び出し（タイムアウト設定済み、ワーカースレッドで実行）
+                generated_text = await self._invoke_hedged(
+                    model_id, call, estimated_tokens
                 )
 
-                # レスポンスをパース
-                response_body = json.loads(response["body"].read())
-                
-                # モデルに応じたレスポンスをパース
-                generated_text = self._parse_response(response_body)
-
+                latency = time.monotonic() - started
+                self.metrics.record_attempt(model_id, attempt, latency, "success")
+                breaker.record_success(latency)
+                _last_generation.set(GenerationInfo(model_id, structured))
                 logger.info(
                     "テキスト生成を完了",
-                    model_id=self.model_id,
+                    model_id=model_id,
                     response_length=len(generated_text),
-                    attempt=attempt + 1,
+                    attempt=attempt,
+                    latency=round(latency, 3),
+                    structured=structured,
                 )
                 return generated_text
 
-            except ClientError as e:
-                last_error = e
-                error_code = e.response.get("Error", {}).get("Code", "Unknown")
-                error_message = e.response.get("Error", {}).get("Message", str(e))
-                
-                # エラーメッセージに応じた追加情報を提供
-                additional_info = ""
-                if "AccessDeniedException" in error_code:
-                    additional_info = " (ヒント: AWS SCPでモデルへのアクセスが拒否されています。許可されているモデルを使用してください)"
-                elif "ValidationException" in error_code and "inference profile" in error_message:
-                    additional_info = " (ヒント: Novaモデルは inference profile ARN を使用してください。例: us.amazon.nova-lite-v1:0)"
-                
-                logger.warning(
-                    "Bedrock呼び出しでClientErrorが発生",
-                    model_id=self.model_id,
-                    error_code=error_code,
-                    error_message=error_message + additional_info,
-                    attempt=attempt + 1,
-                    max_attempts=self.MAX_RETRIES + 1,
-                )
-
-                # 最後の試行でない場合はリトライ
-                if attempt < self.MAX_RETRIES:
-                    logger.info(
-                        "リトライを実行",
-                        retry_delay=self.RETRY_DELAY,
-                        next_attempt=attempt + 2,
+            except Exception as e:
+                latency = time.monotonic() - started
+                error_class = classify_error(e)
+                self.metrics.record_attempt(model_id, attempt, latency, error_class.value)
+                # リクエスト起因のエラーはモデルの健全性に含めない
+                if error_class != ErrorClass.CLIENT:
+                    breaker.record_failure()
+
+                if isinstance(e, ClientError):
+                    error_code = e.response.get("Error", {}).get("Code", "Unknown")
+                    error_message = e.response.get("Error", {}).get("Message", str(e))
+
+                    # エラーメッセージに応じた追加情報を提供
+                    additional_info = ""
+                    if "AccessDeniedException" in error_code:
+                        additional_info = " (ヒント: AWS SCPでモデルへのアクセスが拒否されています。許可されているモデルを使用してください)"
+                    elif "ValidationException" in error_code and "inference profile" in error_message:
+                        additional_info = " (ヒント: Novaモデルは inference profile ARN を使用してください。例: us.amazon.nova-lite-v1:0)"
+
+                    logger.warning(
+                        "Bedrock呼び出しでClientErrorが発生",
+                        model_id=model_id,
+                        error_code=error_code,
+                        error_message=error_message + additional_info,
+                        error_class=error_class.value,
+                        attempt=attempt,
+                        latency=round(latency, 3),
                     )
-                    time.sleep(self.RETRY_DELAY)
-                    continue
                 else:
-                    logger.error(
-                        "Bedrock呼び出しが最大リトライ回数に達しました",
-                        model_id=self.model_id,
-                        error_code=error_code,
-                        total_attempts=self.MAX_RETRIES + 1,
+                    logger.warning(
+                        "テキスト生成で予期しないエラーが発生",
+                        model_id=model_id,
+                        error=str(e),
+                        error_type=type(e).__name__,
+                        error_class=error_class.value,
+                        attempt=attempt,
+                        latency=round(latency, 3),
                     )
+
+                # サーキットが開いた場合はリトライせずフォールバックへ
+                if breaker.state != CircuitState.CLOSED:
                     raise
 
-            except Exception as e:
-                last_error = e
-                logger.warning(
-                    "テキスト生成で予期しないエラーが発生",
-                    model_id=self.model_id,
-                    error=str(e),
-                    error_type=type(e).__name__,
-                    attempt=attempt + 1,
-                    max_attempts=self.MAX_RETRIES + 1,
+                # エラー分類・試行回数・残り時間からリトライ可否を判定
+                delay = self.retry_policy.next_delay(
+                    error_class,
+                    attempt,
+                    remaining=deadline - time.monotonic(),
+                    last_latency=latency,
                 )
-
-                # 最後の試行でない場合はリトライ
-                if attempt < self.MAX_RETRIES:
-                    logger.info(
-                        "リトライを実行",
-                        retry_delay=self.RETRY_DELAY,
-                        next_attempt=attempt + 2,
-                    )
-                    time.sleep(self.RETRY_DELAY)
-                    continue
-                else:
+                if delay is None:
                     logger.error(
-                        "テキスト生成が最大リトライ回数に達しました",
-                        model_id=self.model_id,
-                        total_attempts=self.MAX_RETRIES + 1,
+                        "Bedrock呼び出しのリトライを打ち切りました",
+                        model_id=model_id,
+                        error_class=error_class.value,
+                        total_attempts=attempt,
                     )
                     raise
 
-        # ここには到達しないはずだが、念のため
-        if last_error:
-            raise last_error
-        raise Exception("テキスト生成に失敗しました")
+                logger.info(
+                    "リトライを実行",
+                    retry_delay=round(delay, 3),
+                    next_attempt=attempt + 1,
+                    error_class=error_class.value,
+                )
+                await asyncio.sleep(delay)
+
+    async def generate_text_stream(
+        self,
+        prompt: str,
+        max_tokens: int = 2000,
+        temperature: float = 0.7,
+        system_prompt: str | None = None,
+    ) -> AsyncIterator[str]:
+        """テキストをストリーミング生成
+
+        InvokeModelWithResponseStreamを使用し、生成されたテキストの差分を
+        受信した順にyieldする。ストリームは途中から再開できないため、
+        リトライは行わない。
+
+        Args:
+            prompt: プロンプト
+            max_tokens: 最大トークン数
+            temperature: 温度パラメータ
+            system_prompt: 静的なシステムプロンプト（任意、promptの前に連結）
+
+        Yields:
+            str: 生成されたテキストの差分
+
+        Raises:
+            ClientError: Bedrock APIエラー
+        """
+        # サーキットが閉じている最初のモデルを使用（ストリーム途中での切り替えは行わない）
+        model_id = next(
+            (m for m in self.model_chain if self._breaker(m).allow_request()), None
+        )
+        if model_id is None:
+            raise CircuitOpenError("利用可能なBedrockモデルがありません（すべてのサーキットが開いています）")
+        breaker = self._breaker(model_id)
+        probe = breaker.state == CircuitState.HALF_OPEN
+        prompt = self._join_prompt(system_prompt, prompt)
+        logger.info(
+            "ストリーミング生成を開始",
+            model_id=model_id,
+            prompt_length=len(prompt),
+            max_tokens=max_tokens,
+        )
+
+        adapter = get_adapter(model_id)
+        body = adapter.build_request(prompt, max_tokens, temperature)
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def pump() -> None:
+            """ワーカースレッドでストリームを読み、イベントループのキューへ転送"""
+            try:
+                response = self.bedrock_runtime.invoke_model_with_response_stream(
+                    modelId=model_id,
+                    body=json.dumps(body),
+                    contentType="application/json",
+                    accept="application/json",
+                )
+                for event in response["body"]:
+                    if stop.is_set():
+                        break
+                    chunk = event.get("chunk")
+                    if not chunk:
+                        continue
+                    text = adapter.decode_stream_chunk(json.loads(chunk["bytes"]))
+                    if text:
+                        loop.call_soon_threadsafe(queue.put_nowait, text)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        response_length = 0
+        try:
+            await self.rate_limiter.acquire(model_id, estimate_tokens(prompt) + max_tokens)
+            started = time.monotonic()
+            loop.run_in_executor(self._executor, pump)
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    if classify_error(item) != ErrorClass.CLIENT:
+                        breaker.record_failure()
+                    logger.error(
+                        "ストリーミング生成でエラーが発生",
+                        model_id=model_id,
+                        error=str(item),
+                        error_type=type(item).__name__,
+                    )
+                    raise item
+                response_length += len(item)
+                yield item
+            breaker.record_success(time.monotonic() - started)
+        finally:
+            # 呼び出し側が途中で読み捨てた場合もワーカースレッドを止め、
+            # 結果を記録せずに終わった試験呼び出しの枠を解放する
+            stop.set()
+            if probe:
+                breaker.release_probe()
+
+        _last_generation.set(GenerationInfo(model_id, False))
+        logger.info(
+            "ストリーミング生成を完了",
+            model_id=model_id,
+            response_length=response_length,
+        )
 
     async def generate_embeddings(self, text: str) -> list:
         """テキスト埋め込みを生成
@@ -270,30 +819,58 @@ class BedrockService:
         Returns:
             list: 埋め込みベクトル
         """
-        logger.info("埋め込み生成を開始", text_length=len(text))
+        embeddings = await self.generate_embeddings_batch([text])
+        return embeddings[0]
 
-        try:
-            # Titan Embeddings用のリクエストボディ
-            body = {"inputText": text}
-
-            # Bedrockを呼び出し
-            response = self.bedrock_runtime.invoke_model(
-                modelId="amazon.titan-embed-text-v1",
-                body=json.dumps(body),
-                contentType="application/json",
-                accept="application/json",
-            )
+    async def generate_embeddings_batch(self, texts: list[str]) -> list[list[float]]:
+        """複数テキストの埋め込みをまとめて生成
 
-            # レスポンスをパース
-            response_body = json.loads(response["body"].read())
-            embeddings = response_body["embedding"]
+        同一テキストはコンテンツハッシュで重複排除し、キャッシュにないものだけを
+        同時呼び出し数の上限付きで並列に生成する。
 
-            logger.info("埋め込み生成を完了", embedding_dimension=len(embeddings))
-            return embeddings
+        Args:
+            texts: 埋め込み対象のテキストのリスト
 
+        Returns:
+            list[list[float]]: 入力と同じ順序の埋め込みベクトル
+        """
+        config = get_config()
+        model_id = config.bedrock_embedding_model_id
+        keys = [content_key(model_id, text) for text in texts]
+
+        # キャッシュにない一意なテキストのみを生成対象にする
+        pending: dict[bytes, str] = {}
+        for key, text in zip(keys, texts, strict=True):
+            if key not in pending and self.embedding_cache.get(key) is None:
+                pending[key] = text
+
+        logger.info(
+            "埋め込み生成を開始",
+            model_id=model_id,
+            text_count=len(texts),
+            unique_misses=len(pending),
+        )
+
+        semaphore = asyncio.Semaphore(max(1, config.embedding_max_concurrency))
+
+        async def embed(key: bytes, text: str) -> None:
+            async with semaphore:
+                await self.rate_limiter.acquire(model_id, estimate_tokens(text))
+                response_body = await self._invoke_model(model_id, {"inputText": text})
+            self.embedding_cache.put(key, response_body["embedding"])
+
+        try:
+            await asyncio.gather(*(embed(key, text) for key, text in pending.items()))
         except ClientError as e:
             logger.error("Bedrock埋め込み生成でエラーが発生", error=str(e))
             raise
         except Exception as e:
             logger.error("埋め込み生成でエラーが発生", error=str(e))
             raise
+
+        embeddings = [self.embedding_cache.get(key) for key in keys]
+        logger.info(
+            "埋め込み生成を完了",
+            embedding_dimension=len(embeddings[0]) if embeddings else 0,
+        )
+        return embeddings
@@ -0,0 +1,315 @@
+"""日本酒の銘柄カタログと候補の銘柄のベクトル検索
+
+メニューが指定されない場合に、LLMが候補の銘柄を一から考えるのではなく、
+同梱のカタログからユーザーの好きな記録に近い銘柄を検索して候補として渡す。
+
+カタログ（src/data/brand_catalog.json）の各銘柄は、銘柄名・産地・特定名称・説明の
+文字バイグラムを特徴ハッシュで固定次元に写したベクトル（L2正規化）で表す。
+ベクトルはfloat32の行列としてファイル（src/data/brand_vectors.f32）に保存し、
+メモリマップで読み込む。検索は内積による総当たりで、NumPyがあれば行列演算で、
+なければ純Pythonで計算する。埋め込みの計算にBedrockは呼び出さない。
+
+ベクトルのファイル形式（リトルエンディアン）:
+    マジック（4バイト） + 行数（uint32） + 次元数（uint32）
+    + カタログのSHA-256ダイジェストの先頭16バイト + float32 × 行数 × 次元数
+
+カタログを変更した場合は、以下でベクトルのファイルを再生成する。
+    uv run python -m src.services.brand_catalog
+"""
+
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+from ..models import DrinkingRecord, Rating
+from .brand_index import BrandIndex, fold_brand
+
+try:
+    import numpy as np
+except ImportError:  # NumPyがない環境では純Pythonで計算する
+    np = None
+
+logger = structlog.get_logger(__name__)
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+CATALOG_PATH = DATA_DIR / "brand_catalog.json"
+VECTORS_PATH = DATA_DIR / "brand_vectors.f32"
+
+EMBEDDING_DIM = 256
+
+_MAGIC = b"SKBV"
+_HEADER = struct.Struct("<4sII16s")
+
+# 好きな記録の重み（検索のクエリベクトルの合成に使用）
+_LIKED_WEIGHTS: dict[str, float] = {
+    Rating.VERY_GOOD.value: 2.0,
+    Rating.GOOD.value: 1.0,
+}
+
+
+@dataclass(frozen=True)
+class CatalogBrand:
+    """カタログの銘柄"""
+
+    brand: str
+    prefecture: str
+    style: str
+    description: str
+
+    @property
+    def text(self) -> str:
+        """埋め込みの対象とするテキスト"""
+        return f"{self.brand} {self.prefecture} {self.style} {self.description}"
+
+
+def embed_text(text: str, dim: int = EMBEDDING_DIM) -> array:
+    """テキストの文字バイグラムを特徴ハッシュで写したベクトル（L2正規化済み）
+
+    Args:
+        text: 埋め込み対象のテキスト
+        dim: 次元数
+
+    Returns:
+        array: float32のベクトル（特徴がない場合はゼロベクトル）
+    """
+    vector = array("f", bytes(4 * dim))
+    for word in text.split():
+        folded = fold_brand(word)
+        grams = [folded[i : i + 2] for i in range(len(folded) - 1)] or [folded]
+        for gram in grams:
+            if not gram:
+                continue
+            h = zlib.crc32(gram.encode("utf-8"))
+            vector[h % dim] += 1.0 if h & 0x80000000 else -1.0
+    return _normalize(vector)
+
+
+def _normalize(vector: array) -> array:
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm > 0:
+        for i, v in enumerate(vector):
+            vector[i] = v / norm
+    return vector
+
+
+class VectorIndex:
+    """float32の行列に対する内積の総当たり検索"""
+
+    def __init__(self, matrix: Any, rows: int, dim: int, owner: Any = None):
+        # matrix: NumPyの配列、またはfloat32のmemoryview / array（行優先で連続）
+        self._matrix = matrix
+        self.rows = rows
+        self.dim = dim
+        self._owner = owner  # メモリマップの場合は閉じないよう参照を保持する
+
+    @classmethod
+    def from_vectors(cls, vectors: list[array], dim: int) -> "VectorIndex":
+        """メモリ上のベクトルから作成"""
+        flat = array("f")
+        for vector in vectors:
+            flat.extend(vector)
+        if np is not None:
+            matrix = np.frombuffer(flat, dtype=np.float32).reshape(len(vectors), dim)
+            return cls(matrix, len(vectors), dim)
+        return cls(flat, len(vectors), dim)
+
+    @classmethod
+    def open(cls, path: Path, digest: bytes) -> "VectorIndex | None":
+        """ベクトルのファイルをメモリマップで開く
+
+        Args:
+            path: ファイルのパス
+            digest: カタログのダイジェスト（ファイルの内容と一致しない場合は古いとみなす）
+
+        Returns:
+            VectorIndex | None: 索引（ファイルがない・古い・壊れている場合はNone）
+        """
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if len(mapped) < _HEADER.size:
+            return None
+        magic, rows, dim, stored = _HEADER.unpack_from(mapped)
+        if magic != _MAGIC or stored != digest or len(mapped) != _HEADER.size + 4 * rows * dim:
+            return None
+        if np is not None:
+            matrix = np.frombuffer(mapped, dtype="<f4", count=rows * dim, offset=_HEADER.size)
+            return cls(matrix.reshape(rows, dim), rows, dim, owner=mapped)
+        if sys.byteorder == "little":
+            matrix = memoryview(mapped)[_HEADER.size :].cast("f")
+            return cls(matrix, rows, dim, owner=mapped)
+        # ビッグエンディアンの環境ではメモリに読み込んで変換する
+        values = array("f", mapped[_HEADER.size :])
+        values.byteswap()
+        return cls(values, rows, dim)
+
+    def search(
+        self, query: array, k: int, exclude: Iterable[int] = ()
+    ) -> list[tuple[int, float]]:
+        """内積の大きい上位k件の行を検索
+
+        Args:
+            query: クエリベクトル
+            k: 件数
+            exclude: 除外する行
+
+        Returns:
+            list[tuple[int, float]]: (行, 内積) のリスト（内積の大きい順、同点は行の順）
+        """
+        excluded = set(exclude)
+        if np is not None:
+            scores = (self._matrix @ np.frombuffer(query, dtype=np.float32)).tolist()
+        else:
+            # クエリの非ゼロの次元だけで内積を計算する
+            nonzero = [(i, v) for i, v in enumerate(query) if v]
+            matrix = self._matrix
+            dim = self.dim
+            scores = [
+                sum(matrix[base + i] * v for i, v in nonzero)
+                for base in range(0, self.rows * dim, dim)
+            ]
+        candidates = ((score, -row) for row, score in enumerate(scores) if row not in excluded)
+        return [(-neg, score) for score, neg in heapq.nlargest(k, candidates)]
+
+
+def write_vectors(path: Path, vectors: list[array], dim: int, digest: bytes) -> None:
+    """ベクトルのファイルを書き出す"""
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(vectors), dim, digest))
+        for vector in vectors:
+            values = array("f", vector)
+            if sys.byteorder != "little":
+                values.byteswap()
+            f.write(values.tobytes())
+
+
+class BrandCatalog:
+    """銘柄カタログと、その埋め込みの索引"""
+
+    def __init__(self, brands: list[CatalogBrand], index: VectorIndex):
+        self.brands = brands
+        self.index = index
+
+    def __len__(self) -> int:
+        return len(self.brands)
+
+    @classmethod
+    def load(
+        cls, catalog_path: Path = CATALOG_PATH, vectors_path: Path = VECTORS_PATH
+    ) -> "BrandCatalog":
+        """カタログとベクトルのファイルを読み込む
+
+        ベクトルのファイルがない、またはカタログと一致しない場合は、
+        メモリ上でベクトルを計算する。
+        """
+        raw = Path(catalog_path).read_bytes()
+        brands = [CatalogBrand(**entry) for entry in json.loads(raw)]
+        digest = _catalog_digest(raw)
+        index = VectorIndex.open(Path(vectors_path), digest)
+        if index is None or index.rows != len(brands) or index.dim != EMBEDDING_DIM:
+            logger.warning(
+                "銘柄ベクトルのファイルがないかカタログと一致しません。メモリ上で計算します",
+                path=str(vectors_path),
+            )
+            index = VectorIndex.from_vectors([embed_text(b.text) for b in brands], EMBEDDING_DIM)
+        logger.info(
+            "銘柄カタログを読み込み",
+            brand_count=len(brands),
+            dimension=index.dim,
+            numpy=np is not None,
+        )
+        return cls(brands, index)
+
+    def nearest(self, records: list[DrinkingRecord], n: int) -> list[CatalogBrand]:
+        """好きな記録に近い銘柄を検索
+
+        好きな記録（銘柄名と感想）の埋め込みを評価で重み付けして合成したベクトルに
+        内積が近い順にn件を返す。合わなかった記録と同じ銘柄は除外する。
+
+        Args:
+            records: 飲酒履歴
+            n: 件数
+
+        Returns:
+            list[CatalogBrand]: 近い順の銘柄（好きな記録がない場合は空）
+        """
+        query = array("f", bytes(4 * self.index.dim))
+        disliked = []
+        for record in records:
+            weight = _LIKED_WEIGHTS.get(record.rating)
+            if weight is None:
+                disliked.append(record.brand)
+                continue
+            vector = embed_text(f"{record.brand} {record.impression}", self.index.dim)
+            for i, v in enumerate(vector):
+                query[i] += weight * v
+        if n <= 0 or not any(query):
+            return []
+
+        disliked_index = BrandIndex(disliked)
+        exclude = [
+            row for row, entry in enumerate(self.brands) if disliked_index.match(entry.brand)
+        ]
+        hits = self.index.search(_normalize(query), n, exclude)
+        return [self.brands[row] for row, _ in hits]
+
+
+def _catalog_digest(raw: bytes) -> bytes:
+    return hashlib.sha256(raw).digest()[:16]
+
+
+_catalog: BrandCatalog | None = None
+_catalog_failed = False
+_catalog_lock = threading.Lock()
+
+
+def get_brand_catalog() -> BrandCatalog | None:
+    """同梱の銘柄カタログ（初回呼び出し時に読み込み、読み込めない場合はNone）
+
+    読み込みに失敗した場合はそれを記録し、以降のリクエストでは読み込みを再試行しない。
+    """
+    global _catalog, _catalog_failed
+    if _catalog is None and not _catalog_failed:
+        with _catalog_lock:
+            if _catalog is None and not _catalog_failed:
+                try:
+                    _catalog = BrandCatalog.load()
+                except (OSError, ValueError, TypeError) as e:
+                    logger.error("銘柄カタログの読み込みに失敗", error=str(e))
+                    _catalog_failed = True
+    return _catalog
+
+
+def build_vectors(
+    catalog_path: Path = CATALOG_PATH, vectors_path: Path = VECTORS_PATH
+) -> int:
+    """カタログからベクトルのファイルを生成
+
+    Returns:
+        int: 銘柄数
+    """
+    raw = Path(catalog_path).read_bytes()
+    brands = [CatalogBrand(**entry) for entry in json.loads(raw)]
+    vectors = [embed_text(b.text) for b in brands]
+    write_vectors(Path(vectors_path), vectors, EMBEDDING_DIM, _catalog_digest(raw))
+    return len(brands)
+
+
+if __name__ == "__main__":
+    count = build_vectors()
+    print(f"{VECTORS_PATH} を生成しました（{count}銘柄 × {EMBEDDING_DIM}次元）")
@@ -0,0 +1,150 @@
+"""正規化した銘柄名によるメニューの索引
+
+LLMが返す銘柄名は、メニューの表記と全角・半角、旧字体、カタカナ・ひらがな、
+「純米大吟醸」などの特定名称の有無が異なることがある。メニューの各銘柄を
+正規化したキーで索引し、返された銘柄名をメニューの表記に合わせる（見つからなければ除外する）。
+LLMは呼び出さない。
+"""
+
+import bisect
+import re
+import unicodedata
+from collections.abc import Iterable
+
+from .history_compaction import normalize_brand
+
+# 旧字体・異体字 → 新字体
+_KANJI_VARIANTS = str.maketrans(
+    {
+        "釀": "醸", "眞": "真", "澤": "沢", "櫻": "桜", "龍": "竜", "髙": "高",
+        "國": "国", "寳": "宝", "萬": "万", "壽": "寿", "藏": "蔵", "嶋": "島",
+        "邊": "辺", "邉": "辺", "﨑": "崎", "濱": "浜", "廣": "広", "德": "徳",
+        "惠": "恵", "榮": "栄", "黑": "黒", "彌": "弥", "來": "来", "會": "会",
+        "淸": "清", "與": "与", "靈": "霊", "驛": "駅", "縣": "県",
+        "ヶ": "け", "ヵ": "か",
+    }
+)
+
+# カタカナ → ひらがな（ァ〜ヶの範囲を0x60ずらす）
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(ord("ァ"), ord("ヴ") + 1)}
+
+# 銘柄名の末尾に付く特定名称・製法・精米歩合など（長いものから順に取り除く）
+STYLE_SUFFIXES: tuple[str, ...] = (
+    "純米大吟醸", "特別本醸造", "純米吟醸", "特別純米", "生酛純米", "山廃純米",
+    "大吟醸", "本醸造", "生原酒", "無濾過", "ひやおろし", "普通酒",
+    "吟醸", "純米", "生酛", "きもと", "山廃", "原酒", "生酒", "生詰", "にごり",
+    "超辛口", "辛口", "特撰", "上撰", "佳撰",
+)
+
+# 末尾の精米歩合・数字（「45」「50%」など）
+_TRAILING_NUMBER = re.compile(r"[0-9]+%?$")
+
+# 前方一致で照合する最短の文字数（短すぎる語で別の銘柄に一致させない）
+_MIN_PREFIX_CHARS = 2
+
+
+def fold_brand(brand: str) -> str:
+    """照合用に銘柄名を正規化
+
+    NFKC正規化・大文字小文字・空白に加えて、記号、カタカナとひらがな、
+    旧字体と新字体の違いを無視する。
+    """
+    text = normalize_brand(brand).translate(_KANJI_VARIANTS).translate(_KATAKANA_TO_HIRAGANA)
+    return "".join(c for c in text if unicodedata.category(c)[0] not in "PS")
+
+
+def brand_stem(folded: str) -> str:
+    """正規化した銘柄名から末尾の特定名称・精米歩合を取り除いた語幹"""
+    return _stripped_forms(folded)[-1]
+
+
+def _stripped_forms(folded: str) -> list[str]:
+    """末尾の特定名称・精米歩合を1つずつ取り除いた形（元の形から語幹まで）"""
+    forms = [folded]
+    while True:
+        stripped = _TRAILING_NUMBER.sub("", forms[-1])
+        for suffix in STYLE_SUFFIXES:
+            if stripped.endswith(suffix):
+                stripped = stripped[: -len(suffix)]
+                break
+        if stripped == forms[-1] or not stripped:
+            return forms
+        forms.append(stripped)
+
+
+class BrandIndex:
+    """メニューの銘柄を正規化したキーで引く索引
+
+    照合は以下の順に行い、最初に見つかったメニューの表記を返す。
+
+    1. 正規化した銘柄名の完全一致（末尾の特定名称を1つずつ外した形を含む）
+    2. 特定名称・精米歩合を除いた語幹の一致
+    3. 語幹の前方一致（返された銘柄名がメニューの表記より短い・長い場合の両方）
+
+    同じ段階で複数の候補がある場合は、語幹が短いもの、メニューで先に
+    記載されたものを優先する。
+    """
+
+    def __init__(self, brands: Iterable[str]):
+        self._exact: dict[str, str] = {}
+        self._stems: dict[str, str] = {}
+        for brand in brands:
+            entry = brand.strip()
+            folded = fold_brand(entry)
+            if not folded:
+                continue
+            self._exact.setdefault(folded, entry)
+            self._stems.setdefault(brand_stem(folded), entry)
+        # 前方一致の探索用に語幹をソートしておく（同順位はメニューの記載順で選ぶ）
+        self._sorted_stems = sorted(self._stems)
+        self._order = {stem: i for i, stem in enumerate(self._stems)}
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def match(self, brand: str) -> str | None:
+        """銘柄名に対応するメニューの表記を返す
+
+        Args:
+            brand: LLMが返した銘柄名
+
+        Returns:
+            str | None: メニューの表記（メニューにない場合はNone）
+        """
+        folded = fold_brand(brand)
+        if not folded:
+            return None
+        entry = self._exact.get(folded)
+        if entry is not None:
+            return entry
+
+        # 末尾の特定名称を1つずつ外しながら完全一致を探す（「山廃 無濾過 生原酒」→「山廃」）
+        forms = _stripped_forms(folded)
+        for form in forms[1:]:
+            entry = self._exact.get(form)
+            if entry is not None:
+                return entry
+
+        stem = forms[-1]
+        entry = self._stems.get(stem)
+        if entry is not None:
+            return entry
+        if len(stem) < _MIN_PREFIX_CHARS:
+            return None
+
+        # メニューの語幹が、返された銘柄名の語幹で始まる（「獺祭」→「獺祭 磨き二割三分」）
+        stems = self._sorted_stems
+        i = bisect.bisect_left(stems, stem)
+        candidates = []
+        while i < len(stems) and stems[i].startswith(stem):
+            candidates.append(stems[i])
+            i += 1
+        if candidates:
+            return self._stems[min(candidates, key=lambda key: (len(key), self._order[key]))]
+
+        # 返された銘柄名の語幹が、メニューの語幹で始まる（「久保田 千寿 特別」→「久保田 千寿」）
+        for end in range(len(stem) - 1, _MIN_PREFIX_CHARS - 1, -1):
+            entry = self._stems.get(stem[:end])
+            if entry is not None:
+                return entry
+        return None
@@ -0,0 +1,160 @@
+"""銘柄の説明（brand_description）の知識ベース
+
+brand_descriptionはユーザーに依存しない銘柄の客観的な説明のため、LLMに毎回
+生成させる代わりに、同梱の読み取り専用のSQLiteファイル（src/data/brand_knowledge.sqlite）
+から引く。ファイルは初回の参照時に開き、正規化した銘柄名をキーに検索する。
+
+キーは銘柄カタログ（src/data/brand_catalog.json）の銘柄名をfold_brandで正規化したもの。
+正規化した銘柄名、または末尾の特定名称・精米歩合を除いた語幹（「獺祭 純米大吟醸45」→「獺祭」）
+がキーと一致する場合だけ説明を返す。先頭が同じだけの別の銘柄に説明を付けないよう、
+前方一致では引かない。
+
+カタログを変更した場合は、以下で知識ベースを再生成する。
+    uv run python -m src.services.brand_knowledge
+"""
+
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import structlog
+
+from .brand_catalog import CATALOG_PATH, DATA_DIR
+from .brand_index import brand_stem, fold_brand
+
+logger = structlog.get_logger(__name__)
+
+KNOWLEDGE_PATH = DATA_DIR / "brand_knowledge.sqlite"
+
+# 検索結果を保持する銘柄名の上限（メニューやLLMの出力の銘柄名で際限なく増えないようにする）
+MEMO_MAX_ENTRIES = 1024
+
+_SCHEMA = """
+CREATE TABLE brands (
+    key TEXT PRIMARY KEY,
+    brand TEXT NOT NULL,
+    description TEXT NOT NULL
+) WITHOUT ROWID
+"""
+
+
+def _lookup_keys(brand: str) -> list[str]:
+    """銘柄名から検索するキー（正規化した銘柄名と語幹）"""
+    folded = fold_brand(brand)
+    return sorted({folded, brand_stem(folded)} - {""})
+
+
+class BrandKnowledge:
+    """銘柄の説明の知識ベース（読み取り専用のSQLite）"""
+
+    def __init__(self, path: Path = KNOWLEDGE_PATH, memo_max_entries: int = MEMO_MAX_ENTRIES):
+        self.path = Path(path)
+        self.memo_max_entries = memo_max_entries
+        self._connection: sqlite3.Connection | None = None
+        self._unavailable = False
+        self._lock = threading.Lock()
+        # 正規化した銘柄名 → 説明（LRU。知識ベースにない銘柄はNone）
+        self._descriptions: OrderedDict[str, str | None] = OrderedDict()
+
+    def _connect(self) -> sqlite3.Connection | None:
+        if self._connection is None and not self._unavailable:
+            try:
+                if not self.path.is_file():
+                    raise FileNotFoundError(str(self.path))
+                uri = f"{self.path.resolve().as_uri()}?mode=ro&immutable=1"
+                self._connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+                logger.info("銘柄の知識ベースを読み込み", path=str(self.path))
+            except (OSError, sqlite3.Error) as e:
+                logger.error("銘柄の知識ベースの読み込みに失敗", path=str(self.path), error=str(e))
+                self._unavailable = True
+        return self._connection
+
+    def describe(self, brand: str) -> str | None:
+        """銘柄の説明
+
+        Args:
+            brand: 銘柄名（表記ゆれ・特定名称を含んでよい）
+
+        Returns:
+            str | None: 説明（知識ベースにない場合はNone）
+        """
+        key = fold_brand(brand)
+        if not key:
+            return None
+        with self._lock:
+            if key in self._descriptions:
+                self._descriptions.move_to_end(key)
+                return self._descriptions[key]
+            connection = self._connect()
+            if connection is None:
+                return None
+            keys = _lookup_keys(brand)
+            try:
+                row = connection.execute(
+                    f"SELECT description FROM brands WHERE key IN ({','.join('?' * len(keys))})"
+                    " ORDER BY length(key) DESC LIMIT 1",
+                    keys,
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning("銘柄の知識ベースの検索に失敗", brand=brand, error=str(e))
+                return None
+            description = row[0] if row else None
+            if self.memo_max_entries > 0:
+                self._descriptions[key] = description
+                if len(self._descriptions) > self.memo_max_entries:
+                    self._descriptions.popitem(last=False)
+            return description
+
+    def knows_all(self, brands: list[str]) -> bool:
+        """すべての銘柄の説明が知識ベースにあるか（銘柄が空の場合はFalse）"""
+        return bool(brands) and all(self.describe(brand) for brand in brands)
+
+
+_knowledge: BrandKnowledge | None = None
+_knowledge_lock = threading.Lock()
+
+
+def get_brand_knowledge() -> BrandKnowledge:
+    """同梱の銘柄の知識ベース（ファイルは初回の参照時に開く）"""
+    global _knowledge
+    if _knowledge is None:
+        with _knowledge_lock:
+            if _knowledge is None:
+                _knowledge = BrandKnowledge()
+    return _knowledge
+
+
+def build_knowledge_base(
+    catalog_path: Path = CATALOG_PATH, path: Path = KNOWLEDGE_PATH
+) -> int:
+    """銘柄カタログから知識ベースのファイルを生成
+
+    Returns:
+        int: 登録した銘柄数
+    """
+    entries = json.loads(Path(catalog_path).read_text(encoding="utf-8"))
+    path = Path(path)
+    path.unlink(missing_ok=True)
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute(_SCHEMA)
+        connection.executemany(
+            "INSERT OR IGNORE INTO brands (key, brand, description) VALUES (?, ?, ?)",
+            [
+                (fold_brand(entry["brand"]), entry["brand"], entry["description"])
+                for entry in entries
+            ],
+        )
+        connection.commit()
+        connection.execute("VACUUM")
+        count = connection.execute("SELECT count(*) FROM brands").fetchone()[0]
+    finally:
+        connection.close()
+    return count
+
+
+if __name__ == "__main__":
+    count = build_knowledge_base()
+    print(f"{KNOWLEDGE_PATH} を生成しました（{count}銘柄）")
@@ -0,0 +1,175 @@
+"""Bedrockモデル単位のサーキットブレーカー
+
+直近の呼び出し結果（エラー・低速呼び出し）の割合に応じて、
+closed → open → half_open → closed の状態遷移を行う。
+"""
+
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from enum import Enum
+from typing import Any
+
+import structlog
+
+from ..utils.config import get_config
+
+logger = structlog.get_logger(__name__)
+
+
+class CircuitState(str, Enum):
+    """サーキットの状態"""
+
+    CLOSED = "closed"  # 通常（呼び出しを許可）
+    OPEN = "open"  # 遮断中（呼び出しを拒否）
+    HALF_OPEN = "half_open"  # 試験中（限られた呼び出しのみ許可）
+
+
+class CircuitOpenError(Exception):
+    """利用可能なモデルがすべて遮断されている場合のエラー"""
+
+
+class CircuitBreaker:
+    """エラー率とレイテンシに基づくサーキットブレーカー
+
+    直近`window_size`件の呼び出しのうち、失敗または`slow_call_seconds`を超えた
+    呼び出しの割合が`failure_rate_threshold`以上になるとopenに遷移する。
+    `open_seconds`経過後はhalf_openとなり、試験呼び出しが成功すればclosedに、
+    失敗すれば再びopenに戻る。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float | None = None,
+        slow_call_seconds: float | None = None,
+        window_size: int | None = None,
+        min_calls: int | None = None,
+        open_seconds: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        config = get_config()
+        self.name = name
+        self.failure_rate_threshold = (
+            failure_rate_threshold
+            if failure_rate_threshold is not None
+            else config.bedrock_circuit_failure_rate
+        )
+        self.slow_call_seconds = (
+            slow_call_seconds
+            if slow_call_seconds is not None
+            else config.bedrock_circuit_slow_call_seconds
+        )
+        self.min_calls = min_calls if min_calls is not None else config.bedrock_circuit_min_calls
+        self.open_seconds = (
+            open_seconds if open_seconds is not None else config.bedrock_circuit_open_seconds
+        )
+        self._window: deque[bool] = deque(
+            maxlen=window_size if window_size is not None else config.bedrock_circuit_window
+        )
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> CircuitState:
+        """現在の状態（open期間が過ぎていればhalf_open）"""
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def allow_request(self) -> bool:
+        """呼び出しを許可するかを判定
+
+        half_open状態では、同時に1件の試験呼び出しのみを許可する。
+
+        Returns:
+            bool: 許可する場合True
+        """
+        with self._lock:
+            self._refresh()
+            if self._state == CircuitState.CLOSED:
+                return True
+            if self._state == CircuitState.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def release_probe(self) -> None:
+        """結果を記録せずに終わった試験呼び出しの枠を解放
+
+        リクエスト起因のエラー・レート制限の待機の打ち切り・キャンセル・
+        ストリームの読み捨てなど、成功・失敗のどちらも記録しない終わり方でも
+        half_openの試験呼び出しの枠が塞がったままにならないよう、呼び出し側で必ず呼ぶ。
+        half_open以外の状態では何もしない。
+        """
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record_success(self, latency: float) -> None:
+        """成功した呼び出しを記録（低速な呼び出しは失敗として扱う）"""
+        if latency > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN:
+                self._window.clear()
+                self._transition(CircuitState.CLOSED)
+            self._window.append(True)
+
+    def record_failure(self) -> None:
+        """失敗した呼び出しを記録"""
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN:
+                self._open()
+                return
+            self._window.append(False)
+            if self._state == CircuitState.CLOSED and self._should_open():
+                self._open()
+
+    def snapshot(self) -> dict[str, Any]:
+        """監視用の状態を取得"""
+        with self._lock:
+            self._refresh()
+            calls = len(self._window)
+            failures = calls - sum(self._window)
+            return {
+                "state": self._state.value,
+                "calls": calls,
+                "failure_rate": failures / calls if calls else 0.0,
+            }
+
+    def _should_open(self) -> bool:
+        calls = len(self._window)
+        if calls < self.min_calls:
+            return False
+        failures = calls - sum(self._window)
+        return failures / calls >= self.failure_rate_threshold
+
+    def _open(self) -> None:
+        self._opened_at = self._clock()
+        self._probe_in_flight = False
+        self._transition(CircuitState.OPEN)
+
+    def _refresh(self) -> None:
+        if (
+            self._state == CircuitState.OPEN
+            and self._clock() - self._opened_at >= self.open_seconds
+        ):
+            self._probe_in_flight = False
+            self._transition(CircuitState.HALF_OPEN)
+
+    def _transition(self, state: CircuitState) -> None:
+        if self._state == state:
+            return
+        logger.warning(
+            "サーキットの状態が変化",
+            model_id=self.name,
+            from_state=self._state.value,
+            to_state=state.value,
+        )
+        self._state = state
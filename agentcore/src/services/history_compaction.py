@@ -0,0 +1,145 @@
+"""飲酒履歴の集約（プロンプトに載せる前の圧縮）
+
+同じ銘柄を何度も記録するユーザーの履歴をそのまま並べると、プロンプトが記録数に比例して
+大きくなる。正規化した銘柄名が同じ記録を1件にまとめ、記録回数・評価の内訳・最新の感想を
+保持する。長い感想は、味に関する語を含む文節を優先して抜き出す（LLMは呼び出さない）。
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+
+from ..models import DrinkingRecord, Rating
+
+# 味の特徴を表す語（文節の重要度の判定に使用。表記ゆれを含む）
+TASTE_KEYWORDS: tuple[str, ...] = (
+    "甘", "あま", "辛", "から", "酸", "すっぱ", "旨", "うま", "苦", "にが", "渋",
+    "香", "かお", "フルーティ", "華やか", "吟醸", "果実", "米",
+    "すっきり", "スッキリ", "さっぱり", "淡麗", "濃醇", "芳醇", "濃", "軽", "重",
+    "キレ", "きれ", "コク", "こく", "まろやか", "やわらか", "柔らか", "爽やか", "爽快",
+    "ドライ", "余韻", "後味", "口当たり", "喉ごし", "のどごし", "飲みやす", "飲み口",
+    "熟成", "冷", "燗", "刺激", "アルコール", "雑味", "クセ", "癖", "酸味", "ガス",
+)
+
+# 文節の区切り（区切り文字は直前の文節に含める）
+_CLAUSE_PATTERN = re.compile(r"[^。、．，！？!?,\n]+[。、．，！？!?,\n]*")
+
+_OMISSION = "…"
+
+
+@dataclass
+class CompactedRecord:
+    """同じ銘柄の記録を集約したエントリー"""
+
+    brand: str  # 最新の記録の銘柄名
+    count: int  # 記録回数
+    ratings: Counter  # 評価ごとの記録回数
+    impression: str  # 最新の感想（長い場合は要点を抜き出したもの）
+
+    @property
+    def rating_summary(self) -> str:
+        """評価の内訳（1件のみの場合は評価そのもの）"""
+        if self.count == 1:
+            return next(iter(self.ratings))
+        return ", ".join(
+            f"{rating.value}×{self.ratings[rating.value]}"
+            for rating in Rating
+            if self.ratings[rating.value]
+        )
+
+
+def normalize_brand(brand: str) -> str:
+    """集約用に銘柄名を正規化（NFKC・大文字小文字・空白の違いを無視）"""
+    return "".join(unicodedata.normalize("NFKC", brand).casefold().split())
+
+
+def extract_key_phrases(text: str, limit: int) -> str:
+    """長い感想から味に関する文節を抜き出す
+
+    味に関する語を多く含む文節から順に、上限文字数に収まる範囲で採用し、
+    元の順序で連結する。省いた箇所には…を入れる。
+
+    Args:
+        text: 感想
+        limit: 上限文字数（0以下の場合は抜き出さない）
+
+    Returns:
+        str: 抜き出した感想（上限以内の場合はそのまま）
+    """
+    if limit <= 0 or len(text) <= limit:
+        return text
+
+    clauses = _CLAUSE_PATTERN.findall(text)
+    scores = [sum(1 for keyword in TASTE_KEYWORDS if keyword in c) for c in clauses]
+    ranked = sorted(
+        (i for i, score in enumerate(scores) if score > 0),
+        key=lambda i: (-scores[i], i),
+    )
+
+    selected: list[int] = []
+    seen: set[str] = set()
+    length = 0
+    for index in ranked:
+        clause = clauses[index].strip()
+        if clause in seen:
+            continue
+        # 区切りの…（先頭・末尾を含めて文節数+1個まで）の分も含めて上限に収める
+        cost = len(clause) + len(_OMISSION)
+        if length + cost + len(_OMISSION) > limit:
+            continue
+        selected.append(index)
+        seen.add(clause)
+        length += cost
+
+    if not selected:
+        # 味に関する文節がない、または1文節で上限を超える場合は先頭から切り詰める
+        return text[: limit - 1] + _OMISSION
+
+    parts: list[str] = []
+    previous = -1
+    for index in sorted(selected):
+        if index != previous + 1:
+            parts.append(_OMISSION)
+        parts.append(clauses[index].strip())
+        previous = index
+    if previous != len(clauses) - 1:
+        parts.append(_OMISSION)
+    return "".join(parts)
+
+
+def compact_history(
+    records: list[DrinkingRecord], impression_limit: int
+) -> list[CompactedRecord]:
+    """正規化した銘柄名が同じ記録を1件に集約
+
+    入力は古い順とし、集約後のエントリーも各銘柄の最新の記録の位置で古い順に並べる
+    （トークン予算を超える場合に新しい記録が優先されるようにするため）。
+
+    Args:
+        records: 飲酒記録（古い順）
+        impression_limit: 感想の上限文字数（0以下の場合は抜き出さない）
+
+    Returns:
+        list[CompactedRecord]: 集約したエントリー（古い順）
+    """
+    groups: dict[str, list[DrinkingRecord]] = {}
+    for record in records:
+        key = normalize_brand(record.brand)
+        # 最新の記録の位置で並べるため、既存のキーは末尾に移動する
+        group = groups.pop(key, [])
+        group.append(record)
+        groups[key] = group
+
+    compacted = []
+    for group in groups.values():
+        latest = group[-1]
+        compacted.append(
+            CompactedRecord(
+                brand=latest.brand,
+                count=len(group),
+                ratings=Counter(Rating(r.rating).value for r in group),
+                impression=extract_key_phrases(latest.impression, impression_limit),
+            )
+        )
+    return compacted
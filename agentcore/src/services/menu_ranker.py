@@ -0,0 +1,156 @@
+"""メニューの銘柄の事前ランキング（プロンプトに載せる候補の絞り込み）
+
+100件を超えるメニューをすべてプロンプトに並べると、入力トークンとレイテンシが
+メニューの件数に比例して増える。飲酒履歴と照らしてメニューの各銘柄を採点し、
+上位K件だけをLLMに渡す。採点は決定的で、LLMは呼び出さない。
+
+各記録について、評価の重み（好き: 正、合わない: 負）に以下の類似度を掛けて合計する。
+
+- 銘柄名の一致: 語幹（特定名称を除いた銘柄名）の完全一致、前方一致、文字バイグラムの類似
+- 特定名称・製法の一致: 純米・吟醸・生酛などの語の集合の類似度
+"""
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from ..models import DrinkingRecord, Rating
+from .brand_index import brand_stem, fold_brand
+
+# 評価ごとの重み
+RATING_WEIGHTS: dict[str, float] = {
+    Rating.VERY_GOOD.value: 2.0,
+    Rating.GOOD.value: 1.0,
+    Rating.BAD.value: -1.0,
+    Rating.VERY_BAD.value: -2.0,
+}
+
+# 特定名称・製法・味わいを表す語（表記ゆれ → 代表の語）
+STYLE_TOKENS: dict[str, str] = {
+    "大吟醸": "大吟醸",
+    "吟醸": "吟醸",
+    "純米": "純米",
+    "本醸造": "本醸造",
+    "生酛": "生酛",
+    "きもと": "生酛",
+    "山廃": "山廃",
+    "原酒": "原酒",
+    "生酒": "生酒",
+    "生詰": "生詰",
+    "無濾過": "無濾過",
+    "にごり": "にごり",
+    "ひやおろし": "ひやおろし",
+    "貴醸酒": "貴醸酒",
+    "発泡": "発泡",
+    "スパークリング": "発泡",
+    "辛口": "辛口",
+    "甘口": "甘口",
+    "熟成": "熟成",
+    "古酒": "熟成",
+}
+_FOLDED_STYLE_TOKENS = tuple((fold_brand(k), v) for k, v in STYLE_TOKENS.items())
+
+# 類似度の重み
+_STEM_PREFIX_SIMILARITY = 0.8  # 語幹の前方一致（「獺祭」と「獺祭 磨き二割三分」）
+_MIN_BIGRAM_SIMILARITY = 0.5  # これ未満の文字バイグラムの類似は無視する
+_STYLE_WEIGHT = 0.5  # 特定名称・製法の語の集合の類似度（Jaccard係数）の重み
+
+# 新しい記録ほど重くする（最も古い記録の重みの下限）
+_OLDEST_RECORD_WEIGHT = 0.5
+
+
+@dataclass(frozen=True)
+class _Profile:
+    """採点用に正規化した銘柄名"""
+
+    stem: str
+    bigrams: frozenset[str]
+    styles: frozenset[str]
+
+
+def _profile(brand: str, extra: str = "") -> _Profile:
+    folded = fold_brand(brand)
+    stem = brand_stem(folded)
+    text = folded + fold_brand(extra)
+    return _Profile(
+        stem=stem,
+        bigrams=frozenset(stem[i : i + 2] for i in range(len(stem) - 1)) or frozenset([stem]),
+        styles=frozenset(v for k, v in _FOLDED_STYLE_TOKENS if k in text),
+    )
+
+
+def _brand_similarity(a: _Profile, b: _Profile) -> float:
+    """語幹の類似度（0〜1）"""
+    if a.stem == b.stem:
+        return 1.0
+    if len(a.stem) >= 2 and len(b.stem) >= 2 and (
+        a.stem.startswith(b.stem) or b.stem.startswith(a.stem)
+    ):
+        return _STEM_PREFIX_SIMILARITY
+    similarity = len(a.bigrams & b.bigrams) / len(a.bigrams | b.bigrams)
+    return similarity if similarity >= _MIN_BIGRAM_SIMILARITY else 0.0
+
+
+def _style_similarity(a: _Profile, b: _Profile) -> float:
+    """特定名称・製法の語の集合の類似度（0〜1）"""
+    union = a.styles | b.styles
+    return len(a.styles & b.styles) / len(union) if union else 0.0
+
+
+def score_menu(
+    brands: Iterable[str], records: list[DrinkingRecord]
+) -> list[tuple[str, float]]:
+    """メニューの各銘柄を飲酒履歴と照らして採点
+
+    Args:
+        brands: メニューの銘柄
+        records: 飲酒履歴（古い順）
+
+    Returns:
+        list[tuple[str, float]]: (銘柄, スコア) のリスト（スコアの高い順、同点はメニューの記載順）
+    """
+    # 同じ銘柄名・特定名称の記録は重みを合算し、メニューとの照合を1回にする
+    weights: dict[_Profile, float] = {}
+    n = len(records)
+    for i, record in enumerate(records):
+        weight = RATING_WEIGHTS.get(record.rating, 0.0)
+        if weight:
+            recency = _OLDEST_RECORD_WEIGHT + (1 - _OLDEST_RECORD_WEIGHT) * (i + 1) / n
+            profile = _profile(record.brand, record.impression)
+            weights[profile] = weights.get(profile, 0.0) + weight * recency
+    weighted = [(weight, profile) for profile, weight in weights.items() if weight]
+
+    scored = []
+    seen: set[str] = set()
+    for brand in brands:
+        entry = brand.strip()
+        if not entry or entry in seen:
+            continue
+        seen.add(entry)
+        menu_profile = _profile(entry)
+        score = 0.0
+        for weight, record_profile in weighted:
+            similarity = _brand_similarity(menu_profile, record_profile)
+            similarity += _STYLE_WEIGHT * _style_similarity(menu_profile, record_profile)
+            score += weight * similarity
+        scored.append((entry, score))
+
+    # sortedは安定なので、同点はメニューの記載順になる
+    return sorted(scored, key=lambda item: -item[1])
+
+
+def shortlist_menu(
+    brands: list[str], records: list[DrinkingRecord], k: int
+) -> list[str]:
+    """飲酒履歴に合う上位K件の銘柄を選ぶ
+
+    Args:
+        brands: メニューの銘柄
+        records: 飲酒履歴（古い順）
+        k: 選ぶ件数（0以下、またはメニューがK件以下の場合は絞り込まない）
+
+    Returns:
+        list[str]: 選んだ銘柄（スコアの高い順。絞り込まない場合はメニューのまま）
+    """
+    if k <= 0 or len(brands) <= k:
+        return brands
+    return [brand for brand, _ in score_menu(brands, records)[:k]]
@@ -0,0 +1,329 @@
+"""Bedrockモデルファミリーごとのアダプター
+
+モデルごとに異なるInvokeModelのリクエスト形式・レスポンス形式・トークン使用量・
+ストリーミングチャンクの形式を吸収する。
+アダプターはモデルIDごとに一度だけ解決され、以降はキャッシュされる。
+
+新しいモデルファミリーは、ModelAdapterを継承したクラスを
+`register_adapter()`で登録すれば、BedrockServiceを変更せずに利用できる。
+抽象メソッドを実装していないアダプターはインスタンス化の時点でTypeErrorになる。
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+class ModelAdapter(ABC):
+    """モデルファミリーのアダプター（抽象基底クラス）
+
+    `patterns`のいずれかがモデルID（小文字化済み）に含まれる場合にマッチする。
+    トークン使用量はConverse APIと同じキー（inputTokens, outputTokens,
+    cacheReadInputTokens, cacheWriteInputTokens）に正規化して返す。
+    `supports_tool_use`は、Converse APIで特定のツールの呼び出しを強制できる
+    （toolChoiceにtoolを指定できる）モデルファミリーの場合にTrueとする。
+    """
+
+    family: str = ""
+    patterns: tuple[str, ...] = ()
+    supports_tool_use: bool = False
+
+    def matches(self, model_id: str) -> bool:
+        """モデルIDがこのアダプターの対象か判定
+
+        Args:
+            model_id: 小文字化済みのモデルID
+
+        Returns:
+            bool: 対象の場合True
+        """
+        return any(pattern in model_id for pattern in self.patterns)
+
+    @abstractmethod
+    def build_request(
+        self, prompt: str, max_tokens: int, temperature: float
+    ) -> dict[str, Any]:
+        """リクエストボディを構築"""
+
+    @abstractmethod
+    def parse_response(self, response_body: dict[str, Any]) -> str:
+        """レスポンスボディから生成テキストを取り出す
+
+        Raises:
+            ValueError: レスポンスのパースに失敗した場合
+        """
+
+    def extract_usage(self, response_body: dict[str, Any]) -> dict[str, int]:
+        """レスポンスボディからトークン使用量を取り出す"""
+        return {}
+
+    @abstractmethod
+    def decode_stream_chunk(self, chunk: dict[str, Any]) -> str:
+        """ストリーミングチャンク（デコード済みJSON）からテキスト差分を取り出す
+
+        Returns:
+            str: テキスト差分（テキストを含まないチャンクの場合は空文字列）
+        """
+
+
+class ClaudeAdapter(ModelAdapter):
+    """Anthropic Claude（Messages API形式）"""
+
+    family = "claude"
+    patterns = ("claude", "anthropic")
+    supports_tool_use = True
+
+    def build_request(
+        self, prompt: str, max_tokens: int, temperature: float
+    ) -> dict[str, Any]:
+        return {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+
+    def parse_response(self, response_body: dict[str, Any]) -> str:
+        if "content" not in response_body or not response_body["content"]:
+            raise ValueError("Bedrockレスポンスにcontentフィールドがありません")
+        return response_body["content"][0]["text"]
+
+    def extract_usage(self, response_body: dict[str, Any]) -> dict[str, int]:
+        usage = response_body.get("usage", {})
+        return {
+            "inputTokens": usage.get("input_tokens", 0),
+            "outputTokens": usage.get("output_tokens", 0),
+            "cacheReadInputTokens": usage.get("cache_read_input_tokens", 0),
+            "cacheWriteInputTokens": usage.get("cache_creation_input_tokens", 0),
+        }
+
+    def decode_stream_chunk(self, chunk: dict[str, Any]) -> str:
+        if chunk.get("type") == "content_block_delta":
+            return chunk.get("delta", {}).get("text", "")
+        return ""
+
+
+class NovaAdapter(ModelAdapter):
+    """Amazon Nova"""
+
+    family = "nova"
+    patterns = ("nova",)
+    supports_tool_use = True
+
+    def build_request(
+        self, prompt: str, max_tokens: int, temperature: float
+    ) -> dict[str, Any]:
+        return {
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [{"text": prompt}]
+                }
+            ],
+            "inferenceConfig": {
+                "max_new_tokens": max_tokens,
+                "temperature": temperature,
+            }
+        }
+
+    def parse_response(self, response_body: dict[str, Any]) -> str:
+        if "output" not in response_body or "message" not in response_body["output"]:
+            raise ValueError("Bedrockレスポンスにoutput.messageフィールドがありません")
+        message = response_body["output"]["message"]
+        if "content" not in message or not message["content"]:
+            raise ValueError("Bedrockレスポンスにoutput.message.contentフィールドがありません")
+        return message["content"][0]["text"]
+
+    def extract_usage(self, response_body: dict[str, Any]) -> dict[str, int]:
+        usage = response_body.get("usage", {})
+        return {
+            "inputTokens": usage.get("inputTokens", 0),
+            "outputTokens": usage.get("outputTokens", 0),
+            "cacheReadInputTokens": usage.get("cacheReadInputTokenCount", 0),
+            "cacheWriteInputTokens": usage.get("cacheWriteInputTokenCount", 0),
+        }
+
+    def decode_stream_chunk(self, chunk: dict[str, Any]) -> str:
+        delta = chunk.get("contentBlockDelta", {}).get("delta", {})
+        return delta.get("text", "")
+
+
+class LlamaAdapter(ModelAdapter):
+    """Meta Llama 3系"""
+
+    family = "llama"
+    patterns = ("meta.llama", "llama")
+
+    def build_request(
+        self, prompt: str, max_tokens: int, temperature: float
+    ) -> dict[str, Any]:
+        formatted = (
+            "<|begin_of_text|><|start_header_id|>user<|end_header_id|>\n\n"
+            f"{prompt}<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n\n"
+        )
+        return {
+            "prompt": formatted,
+            "max_gen_len": max_tokens,
+            "temperature": temperature,
+        }
+
+    def parse_response(self, response_body: dict[str, Any]) -> str:
+        if "generation" not in response_body:
+            raise ValueError("Bedrockレスポンスにgenerationフィールドがありません")
+        return response_body["generation"]
+
+    def extract_usage(self, response_body: dict[str, Any]) -> dict[str, int]:
+        return {
+            "inputTokens": response_body.get("prompt_token_count", 0),
+            "outputTokens": response_body.get("generation_token_count", 0),
+        }
+
+    def decode_stream_chunk(self, chunk: dict[str, Any]) -> str:
+        return chunk.get("generation", "") or ""
+
+
+class MistralAdapter(ModelAdapter):
+    """Mistral AI（テキスト補完形式）"""
+
+    family = "mistral"
+    patterns = ("mistral",)
+
+    def build_request(
+        self, prompt: str, max_tokens: int, temperature: float
+    ) -> dict[str, Any]:
+        return {
+            "prompt": f"<s>[INST] {prompt} [/INST]",
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+
+    def parse_response(self, response_body: dict[str, Any]) -> str:
+        outputs = response_body.get("outputs")
+        if not outputs:
+            raise ValueError("Bedrockレスポンスにoutputsフィールドがありません")
+        return outputs[0]["text"]
+
+    def decode_stream_chunk(self, chunk: dict[str, Any]) -> str:
+        outputs = chunk.get("outputs") or [{}]
+        return outputs[0].get("text", "")
+
+
+class TitanTextAdapter(ModelAdapter):
+    """Amazon Titan Text"""
+
+    family = "titan-text"
+    patterns = ("titan-text", "titan-tg1")
+
+    def build_request(
+        self, prompt: str, max_tokens: int, temperature: float
+    ) -> dict[str, Any]:
+        return {
+            "inputText": prompt,
+            "textGenerationConfig": {
+                "maxTokenCount": max_tokens,
+                "temperature": temperature,
+            },
+        }
+
+    def parse_response(self, response_body: dict[str, Any]) -> str:
+        results = response_body.get("results")
+        if not results:
+            raise ValueError("Bedrockレスポンスにresultsフィールドがありません")
+        return results[0]["outputText"]
+
+    def extract_usage(self, response_body: dict[str, Any]) -> dict[str, int]:
+        results = response_body.get("results") or [{}]
+        return {
+            "inputTokens": response_body.get("inputTextTokenCount", 0),
+            "outputTokens": results[0].get("tokenCount", 0),
+        }
+
+    def decode_stream_chunk(self, chunk: dict[str, Any]) -> str:
+        return chunk.get("outputText", "") or ""
+
+
+class ModelAdapterRegistry:
+    """モデルIDからアダプターを解決するレジストリ
+
+    後から登録したアダプターほど優先される。
+    どのアダプターにもマッチしないモデルIDにはデフォルト（Claude形式）を使用する。
+    """
+
+    def __init__(self, default: ModelAdapter | None = None):
+        self._adapters: list[ModelAdapter] = []
+        self._default = default or ClaudeAdapter()
+        self._resolved: dict[str, ModelAdapter] = {}
+        self._lock = threading.Lock()
+
+    def register(self, adapter: ModelAdapter) -> None:
+        """アダプターを登録（解決済みのキャッシュは破棄される）
+
+        Args:
+            adapter: 登録するアダプター
+        """
+        with self._lock:
+            self._adapters.insert(0, adapter)
+            self._resolved.clear()
+
+    def resolve(self, model_id: str) -> ModelAdapter:
+        """モデルIDに対応するアダプターを取得
+
+        Args:
+            model_id: モデルID（推論プロファイルIDやARNも可）
+
+        Returns:
+            ModelAdapter: 対応するアダプター
+        """
+        adapter = self._resolved.get(model_id)
+        if adapter is not None:
+            return adapter
+
+        with self._lock:
+            normalized = model_id.lower()
+            adapter = next(
+                (a for a in self._adapters if a.matches(normalized)), None
+            )
+            if adapter is None:
+                logger.warning(
+                    "未知のモデルIDです。Claude形式を使用します",
+                    model_id=model_id,
+                )
+                adapter = self._default
+            self._resolved[model_id] = adapter
+        return adapter
+
+
+_registry = ModelAdapterRegistry()
+for _adapter in (
+    ClaudeAdapter(),
+    NovaAdapter(),
+    LlamaAdapter(),
+    MistralAdapter(),
+    TitanTextAdapter(),
+):
+    _registry.register(_adapter)
+
+
+def register_adapter(adapter: ModelAdapter) -> None:
+    """デフォルトのレジストリにアダプターを登録
+
+    Args:
+        adapter: 登録するアダプター
+    """
+    _registry.register(adapter)
+
+
+def get_adapter(model_id: str) -> ModelAdapter:
+    """デフォルトのレジストリからアダプターを取得
+
+    Args:
+        model_id: モデルID
+
+    Returns:
+        ModelAdapter: 対応するアダプター
+    """
+    return _registry.resolve(model_id)
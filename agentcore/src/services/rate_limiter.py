@@ -0,0 +1,222 @@
+"""Bedrock呼び出しのクライアント側レート制限
+
+モデルIDごとに、リクエスト数/分（RPM）と推定トークン数/分（TPM）の
+2つのトークンバケットを持ち、待機中の呼び出しをFIFO順に通過させる。
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import structlog
+
+from ..utils.config import get_config
+
+logger = structlog.get_logger(__name__)
+
+
+class RateLimitTimeoutError(Exception):
+    """レート制限の待機が上限時間を超えた場合のエラー"""
+
+
+class TokenBucket:
+    """1分あたりの上限に基づくトークンバケット"""
+
+    def __init__(self, per_minute: int, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(per_minute)
+        self.refill_rate = per_minute / 60.0  # 1秒あたりの補充量
+        self._tokens = float(per_minute)
+        self._clock = clock
+        self._updated_at = clock()
+
+    @property
+    def available(self) -> float:
+        """現在利用可能なトークン数"""
+        self._refill()
+        return self._tokens
+
+    def time_until(self, amount: float) -> float:
+        """指定量が利用可能になるまでの時間（秒）"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self._tokens >= amount:
+            return 0.0
+        return (amount - self._tokens) / self.refill_rate
+
+    def take(self, amount: float) -> None:
+        """トークンを消費"""
+        self._refill()
+        self._tokens -= min(amount, self.capacity)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_rate)
+
+
+class ModelRateLimiter:
+    """1モデル分のRPM/TPMレート制限
+
+    asyncio.Lockは取得待ちの順に解放されるため、待機中の呼び出しはFIFO順に通過する。
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ):
+        self.model_id = model_id
+        self._requests = TokenBucket(requests_per_minute, clock)
+        self._tokens = TokenBucket(tokens_per_minute, clock)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = asyncio.Lock()
+        self.waiting = 0
+        self.total_wait = 0.0
+        self.timeouts = 0
+
+    async def acquire(self, tokens: int, max_wait: float) -> float:
+        """リクエスト1件と推定トークン数分の枠を取得
+
+        Args:
+            tokens: 推定トークン数（入力 + 最大出力）
+            max_wait: 最大待機時間（秒）
+
+        Returns:
+            float: 実際に待機した時間（秒）
+
+        Raises:
+            RateLimitTimeoutError: 最大待機時間内に枠を取得できない場合
+        """
+        started = self._clock()
+        self.waiting += 1
+        try:
+            if self._lock.locked():
+                try:
+                    await asyncio.wait_for(self._lock.acquire(), timeout=max_wait)
+                except TimeoutError:
+                    self._timeout(tokens, max_wait)
+            else:
+                await self._lock.acquire()
+
+            try:
+                while True:
+                    wait = max(
+                        self._requests.time_until(1), self._tokens.time_until(tokens)
+                    )
+                    if wait <= 0:
+                        self._requests.take(1)
+                        self._tokens.take(tokens)
+                        break
+                    if self._clock() - started + wait > max_wait:
+                        self._timeout(tokens, max_wait)
+                    await self._sleep(wait)
+            finally:
+                self._lock.release()
+        finally:
+            self.waiting -= 1
+
+        waited = self._clock() - started
+        self.total_wait += waited
+        if waited > 0:
+            logger.info(
+                "レート制限により待機",
+                model_id=self.model_id,
+                waited=round(waited, 3),
+                estimated_tokens=tokens,
+            )
+        return waited
+
+    def snapshot(self) -> dict[str, Any]:
+        """監視用の状態を取得"""
+        return {
+            "available_requests": round(self._requests.available, 2),
+            "available_tokens": round(self._tokens.available, 2),
+            "waiting": self.waiting,
+            "total_wait": round(self.total_wait, 3),
+            "timeouts": self.timeouts,
+        }
+
+    def _timeout(self, tokens: int, max_wait: float) -> None:
+        self.timeouts += 1
+        logger.warning(
+            "レート制限の待機が上限時間を超えました",
+            model_id=self.model_id,
+            estimated_tokens=tokens,
+            max_wait=max_wait,
+        )
+        raise RateLimitTimeoutError(
+            f"レート制限の待機が上限時間（{max_wait}秒）を超えました: {self.model_id}"
+        )
+
+
+class RateLimiter:
+    """モデルIDごとのレート制限"""
+
+    def __init__(
+        self,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+        max_wait: float | None = None,
+    ):
+        config = get_config()
+        self.requests_per_minute = (
+            requests_per_minute
+            if requests_per_minute is not None
+            else config.bedrock_requests_per_minute
+        )
+        self.tokens_per_minute = (
+            tokens_per_minute
+            if tokens_per_minute is not None
+            else config.bedrock_tokens_per_minute
+        )
+        self.max_wait = (
+            max_wait if max_wait is not None else config.bedrock_rate_limit_max_wait
+        )
+        self._limiters: dict[str, ModelRateLimiter] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """レート制限が有効か（RPM・TPMのいずれかが0以下なら無効）"""
+        return self.requests_per_minute > 0 and self.tokens_per_minute > 0
+
+    async def acquire(
+        self, model_id: str, tokens: int, max_wait: float | None = None
+    ) -> float:
+        """モデルIDの枠を取得
+
+        Args:
+            model_id: モデルID
+            tokens: 推定トークン数
+            max_wait: 最大待機時間（秒、省略時は設定値）
+
+        Returns:
+            float: 実際に待機した時間（秒）
+
+        Raises:
+            RateLimitTimeoutError: 最大待機時間内に枠を取得できない場合
+        """
+        if not self.enabled:
+            return 0.0
+        limiter = self._limiters.get(model_id)
+        if limiter is None:
+            limiter = self._limiters.setdefault(
+                model_id,
+                ModelRateLimiter(
+                    model_id, self.requests_per_minute, self.tokens_per_minute
+                ),
+            )
+        return await limiter.acquire(
+            tokens, self.max_wait if max_wait is None else max_wait
+        )
+
+    def snapshot(self) -> dict[str, Any]:
+        """監視用の状態を取得"""
+        return {
+            model_id: limiter.snapshot() for model_id, limiter in self._limiters.items()
+        }
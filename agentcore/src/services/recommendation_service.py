@@ -1,191 +1,40 @@
 """推薦サービス"""
 
-from typing import Any
+import asyncio
+import hashlib
+import json
+from typing import Any, AsyncIterator
 
 import structlog
 
 from ..models import DrinkingRecord, Menu, Recommendation, BestRecommendation, RecommendationResponse
+from ..utils.config import get_config
+from ..utils.json_repair import extract_json
+from ..utils.json_stream import IncrementalJsonParser
+from ..utils.lru_cache import LRUTTLCache
+from ..utils.prompt_budget import FittedLines, fit_lines
+from ..utils.prompt_template import PromptTemplate
+from ..utils.tokens import estimate_tokens
 from .bedrock_service import BedrockService
+from .brand_catalog import CatalogBrand, get_brand_catalog
+from .brand_index import BrandIndex
+from .brand_knowledge import get_brand_knowledge
+from .history_compaction import compact_history, normalize_brand
+from .menu_ranker import shortlist_menu
+from .structured_output import (
+    FUSED_RECOMMENDATION_TOOL,
+    RECOMMENDATION_FOLLOW_UP_TOOL,
+    RECOMMENDATION_TOOL,
+    TASTE_ANALYSIS_TOOL,
+    OutputTool,
+    without_brand_description,
+)
+from .taste_profile_cache import TasteProfileCache, record_digest
 
 logger = structlog.get_logger(__name__)
 
-
-class RecommendationService:
-    """日本酒推薦サービス"""
-
-    def __init__(self):
-        self.bedrock_service = BedrockService()
-
-    async def generate_recommendations(
-        self,
-        user_id: str,
-        drinking_records: list[DrinkingRecord],
-        menu: Menu | None = None,
-        max_recommendations: int = 5,
-    ) -> RecommendationResponse:
-        """推薦を生成
-
-        Args:
-            user_id: ユーザーID
-            drinking_records: 飲酒履歴
-            menu: メニュー情報
-            max_recommendations: 最大推薦数（未使用、互換性のため保持）
-
-        Returns:
-            RecommendationResponse: 推薦レスポンス（best_recommend + recommendations最大9件）
-        """
-        logger.info(
-            "推薦生成を開始", user_id=user_id, record_count=len(drinking_records)
-        )
-
-        # 飲酒履歴0件の場合は空の推薦レスポンスを返す（エラーではない）
-        if not drinking_records:
-            logger.info(
-                "飲酒履歴が0件のため、空の推薦レスポンスを返します", user_id=user_id
-            )
-            return RecommendationResponse(
-                best_recommend=None,
-                recommendations=[],
-                metadata="飲酒記録がありません。まずは飲んだお酒を記録してください"
-            )
-
-        # 味の好み分析
-        taste_analysis = await self.analyze_taste_preference(user_id, drinking_records)
-
-        # 推薦プロンプトを構築
-        prompt = self._build_recommendation_prompt(
-            drinking_records=drinking_records,
-            taste_analysis=taste_analysis,
-            menu=menu,
-            max_recommendations=max_recommendations,
-        )
-
-        # Bedrockで推薦を生成
-        response = await self.bedrock_service.generate_text(prompt)
-
-        # レスポンスをパース
-        recommendation_response = self._parse_recommendations(response)
-
-        logger.info(
-            "推薦生成を完了", 
-            user_id=user_id, 
-            has_best_recommend=recommendation_response.best_recommend is not None,
-            recommendation_count=len(recommendation_response.recommendations)
-        )
-        return recommendation_response
-
-    async def analyze_taste_preference(
-        self, user_id: str, drinking_records: list[DrinkingRecord]
-    ) -> dict[str, Any]:
-        """味の好み分析
-
-        Args:
-            user_id: ユーザーID
-            drinking_records: 飲酒履歴
-
-        Returns:
-            Dict[str, Any]: 味の好み分析結果
-        """
-        if not drinking_records:
-            return {
-                "preferred_tastes": [],
-                "disliked_tastes": [],
-                "rating_distribution": {},
-                "analysis_summary": "飲酒履歴がないため、分析できません。",
-            }
-
-        # 評価別に分類
-        from ..models import Rating
-
-        liked_records = [
-            r
-            for r in drinking_records
-            if r.rating in [Rating.VERY_GOOD.value, Rating.GOOD.value]
-        ]
-        disliked_records = [
-            r
-            for r in drinking_records
-            if r.rating in [Rating.BAD.value, Rating.VERY_BAD.value]
-        ]
-
-        # 味の好み分析プロンプトを構築
-        prompt = self._build_taste_analysis_prompt(liked_records, disliked_records)
-
-        # Bedrockで分析を実行
-        response = await self.bedrock_service.generate_text(prompt)
-
-        # 分析結果をパース
-        analysis = self._parse_taste_analysis(response, drinking_records)
-
-        return analysis
-
-    def _build_recommendation_prompt(
-        self,
-        drinking_records: list[DrinkingRecord],
-        taste_analysis: dict[str, Any],
-        menu: Menu | None,
-        max_recommendations: int,
-    ) -> str:
-        """推薦プロンプトを構築
-        
-        Args:
-            drinking_records: 飲酒履歴
-            taste_analysis: 味の好み分析結果
-            menu: メニュー情報（任意）
-            max_recommendations: 最大推薦数
-            
-        Returns:
-            str: 推薦生成用プロンプト
-        """
-
-        prompt = """あなたは日本酒の専門家です。ユーザーの飲酒履歴と味の好みに基づいて、最適な日本酒を推薦してください。
-
-## ユーザーの味の好み分析
-"""
-        
-        # 好み分析の詳細を追加
-        prompt += f"要約: {taste_analysis.get('analysis_summary', '分析データなし')}\n"
-        
-        preferred_tastes = taste_analysis.get('preferred_tastes', [])
-        if preferred_tastes:
-            prompt += f"好む味の特徴: {', '.join(preferred_tastes)}\n"
-        
-        disliked_tastes = taste_analysis.get('disliked_tastes', [])
-        if disliked_tastes:
-            prompt += f"避けるべき味の特徴: {', '.join(disliked_tastes)}\n"
-
-        prompt += "\n## 飲酒履歴（最新10件）\n"
-
-        # 最新の飲酒履歴を追加
-        recent_records = drinking_records[-10:] if drinking_records else []
-        if recent_records:
-            for record in recent_records:
-                prompt += f"- {record.brand}: {record.rating} - {record.impression}\n"
-        else:
-            prompt += "（飲酒履歴なし）\n"
-
-        # メニュー制約の説明文を準備
-        menu_constraint = ""
-        if menu and menu.brands:
-            prompt += "\n## 利用可能なメニュー\n"
-            for brand in menu.brands:
-                prompt += f"- {brand}\n"
-            menu_constraint = """
-### 【最重要】銘柄選択の制約
-**メニュー制約**: 推薦するすべての銘柄（best_recommendとrecommendations）は、
-上記の「利用可能なメニュー」に記載されている銘柄から**必ず**選択してください。
-メニュー外の銘柄は絶対に推薦しないでください。
-"""
-        else:
-            menu_constraint = """
-### 銘柄選択
-メニューが提供されていないため、日本酒の専門知識に基づいて、
-ユーザーの好みに合う適切な銘柄を推薦してください。
-"""
-
-        prompt += f"""
-## 推薦要件
-{menu_constraint}
+# 推薦生成の静的な指示（リクエスト間で共通のため、プロンプトキャッシュの対象になる）
+_RECOMMENDATION_INSTRUCTIONS = """## 推薦要件
 
 ### 推薦の構成
 推薦は以下の構成で提供してください：
@@ -194,13 +43,11 @@ class RecommendationService:
    - マッチ度の目安: 90以上
    - ユーザーの過去の高評価銘柄と類似した特徴を持つ
    - 確実に満足できる安定した選択肢
-   - {'**メニュー内の銘柄から必ず選択すること**' if menu and menu.brands else ''}
 
 2. **recommendations**: 残りの推薦（最大9件、各銘柄に動的なカテゴリー）
    - ユーザーの好みを広げる選択肢や新しい味覚体験への挑戦
    - 各推薦には推薦理由や特徴を表現する簡潔なカテゴリー名を付与
    - マッチ度の高い順に並べる
-   - {'**すべての推薦をメニュー内の銘柄から必ず選択すること**' if menu and menu.brands else ''}
 
 ### カテゴリー生成ルール
 recommendationsの各銘柄には、推薦理由や特徴を表現する簡潔なカテゴリー名を付けてください：
@@ -248,63 +95,49 @@ recommendationsの各銘柄には、推薦理由や特徴を表現する簡潔
 ## 出力形式
 以下のJSON形式で出力してください。他のテキストは含めないでください：
 
-{{
-  "best_recommend": {{
+{
+  "best_recommend": {
     "brand": "銘柄名",
     "brand_description": "銘柄の説明",
     "expected_experience": "期待される体験",
     "match_score": 95
-  }},
+  },
   "recommendations": [
-    {{
+    {
       "brand": "銘柄名1",
       "brand_description": "銘柄の説明",
       "expected_experience": "期待される体験",
       "category": "新しい挑戦",
       "match_score": 88
-    }},
-    {{
+    },
+    {
       "brand": "銘柄名2",
       "brand_description": "銘柄の説明",
       "expected_experience": "期待される体験",
       "category": "好みに近い",
       "match_score": 85
-    }},
-    {{
+    },
+    {
       "brand": "銘柄名3",
       "brand_description": "銘柄の説明",
       "expected_experience": "期待される体験",
       "category": "意外な発見",
       "match_score": 82
-    }}
+    }
     // ... 最大9件まで
   ]
-}}
-"""
-
-        return prompt
-
-    def _build_taste_analysis_prompt(
-        self,
-        liked_records: list[DrinkingRecord],
-        disliked_records: list[DrinkingRecord],
-    ) -> str:
-        """味の好み分析プロンプトを構築"""
-
-        prompt = """あなたは日本酒の専門家です。ユーザーの飲酒履歴から味の好みを分析してください。
-
-## 好きな日本酒の記録
+}
 """
 
-        for record in liked_records:
-            prompt += f"- {record.brand} ({record.rating}): {record.impression}\n"
+RECOMMENDATION_SYSTEM_PROMPT = """あなたは日本酒の専門家です。ユーザーの飲酒履歴と味の好みに基づいて、最適な日本酒を推薦してください。
+ユーザーの味の好み分析・飲酒履歴・メニュー・銘柄選択の制約はユーザーメッセージで与えられます。
 
-        prompt += "\n## 合わなかった日本酒の記録\n"
+""" + _RECOMMENDATION_INSTRUCTIONS
 
-        for record in disliked_records:
-            prompt += f"- {record.brand} ({record.rating}): {record.impression}\n"
+# 味の好み分析の静的な指示
+TASTE_ANALYSIS_SYSTEM_PROMPT = """あなたは日本酒の専門家です。ユーザーの飲酒履歴から味の好みを分析してください。
+好きな日本酒の記録と合わなかった日本酒の記録はユーザーメッセージで与えられます。
 
-        prompt += """
 ## 分析要件
 ユーザーの味の好みを以下の観点で分析してください：
 - 好む味の特徴（甘口/辛口、フルーティ/スッキリなど）
@@ -319,146 +152,1530 @@ recommendationsの各銘柄には、推薦理由や特徴を表現する簡潔
 }
 """
 
-        return prompt
+# 前回の分析結果に追加の記録を反映する（差分更新）の静的な指示
+TASTE_PROFILE_UPDATE_SYSTEM_PROMPT = """あなたは日本酒の専門家です。ユーザーの味の好みの前回の分析結果と、その後に追加された飲酒記録から、味の好みの分析結果を更新してください。
+前回の分析結果と追加された記録はユーザーメッセージで与えられます。
+
+## 更新要件
+- 追加された記録が前回の傾向と一致する場合は、前回の分析結果を維持してください
+- 新しい傾向が見られる場合は、好む味の特徴・避けるべき味の特徴・要約に反映してください
+- 前回の分析結果の内容は、追加された記録と矛盾しない限り残してください
+
+## 出力形式（JSON）
+{
+  "preferred_tastes": ["好む味の特徴のリスト"],
+  "disliked_tastes": ["避けるべき味の特徴のリスト"],
+  "analysis_summary": "味の好みの要約（200文字以内）"
+}
+"""
+
+# 味の好み分析と推薦を1回の呼び出しで行う（fusedモード）の静的な指示
+FUSED_RECOMMENDATION_SYSTEM_PROMPT = """あなたは日本酒の専門家です。ユーザーの飲酒履歴から味の好みを分析し、その分析に基づいて最適な日本酒を推薦してください。
+好きな日本酒の記録・合わなかった日本酒の記録・メニュー・銘柄選択の制約はユーザーメッセージで与えられます。
+
+## 味の好み分析
+まず、ユーザーの味の好みを以下の観点で分析してください：
+- 好む味の特徴（甘口/辛口、フルーティ/スッキリなど）
+- 避けるべき味の特徴
+- 好みの傾向の要約（200文字以内）
+
+分析結果は、出力するJSONのトップレベルに"taste_profile"フィールドとして含めてください：
+"taste_profile": {
+  "preferred_tastes": ["好む味の特徴のリスト"],
+  "disliked_tastes": ["避けるべき味の特徴のリスト"],
+  "analysis_summary": "味の好みの要約（200文字以内）"
+}
+
+""" + _RECOMMENDATION_INSTRUCTIONS
+
+
+# リクエストごとに変わる部分のテンプレート（インポート時に静的セグメントとスロットに分割）
+RECOMMENDATION_TEMPLATE = PromptTemplate(
+    "recommendation",
+    RECOMMENDATION_SYSTEM_PROMPT,
+    "## ユーザーの味の好み分析\n"
+    "要約: {summary}\n"
+    "{taste_details}"
+    "\n## 飲酒履歴（最新10件）\n"
+    "{history}"
+    "{menu_section}"
+    "{menu_constraint}",
+)
+
+TASTE_ANALYSIS_TEMPLATE = PromptTemplate(
+    "taste_analysis",
+    TASTE_ANALYSIS_SYSTEM_PROMPT,
+    "## 好きな日本酒の記録\n"
+    "{liked}"
+    "\n## 合わなかった日本酒の記録\n"
+    "{disliked}",
+)
+
+TASTE_PROFILE_UPDATE_TEMPLATE = PromptTemplate(
+    "taste_profile_update",
+    TASTE_PROFILE_UPDATE_SYSTEM_PROMPT,
+    "## 前回の分析結果\n"
+    "要約: {summary}\n"
+    "{taste_details}"
+    "\n## 追加された記録\n"
+    "{records}",
+)
+
+FUSED_RECOMMENDATION_TEMPLATE = PromptTemplate(
+    "fused",
+    FUSED_RECOMMENDATION_SYSTEM_PROMPT,
+    "## 好きな日本酒の記録\n"
+    "{liked}"
+    "\n## 合わなかった日本酒の記録\n"
+    "{disliked}"
+    "{menu_section}"
+    "{menu_constraint}",
+)
+
+# 不足している推薦だけを依頼する追加の呼び出し（元のプロンプトの後ろに依頼を付け足す）
+RECOMMENDATION_FOLLOW_UP_TEMPLATE = PromptTemplate(
+    "recommendation_follow_up",
+    RECOMMENDATION_SYSTEM_PROMPT,
+    "{prompt}"
+    "\n## 不足している推薦の依頼\n"
+    "前回の出力が途中で切れたか不正な項目を含んでいたため、推薦が不足しています。\n"
+    "以下の銘柄は推薦済みのため、これらと重複しない銘柄を選んでください：\n"
+    "{brands}"
+    "{request}"
+    "依頼した項目以外（味の好み分析など）は出力しないでください。\n",
+)
+
+# チャンクごとの推薦を統合する際、best_recommend以外に回した推薦のカテゴリー
+_MERGED_BEST_CATEGORY = "好みに近い"
+
+# 追加の呼び出しで依頼する1件あたりの出力トークン数
+_FOLLOW_UP_MAX_TOKENS_PER_ITEM = 300
+
+_MENU_HEADER = "\n## 利用可能なメニュー\n"
+
+_MENU_CONSTRAINT = """
+### 【最重要】銘柄選択の制約
+**メニュー制約**: 推薦するすべての銘柄（best_recommendとrecommendations）は、
+上記の「利用可能なメニュー」に記載されている銘柄から**必ず**選択してください。
+メニュー外の銘柄は絶対に推薦しないでください。
+"""
+
+_NO_MENU_CONSTRAINT = """
+### 銘柄選択
+メニューが提供されていないため、日本酒の専門知識に基づいて、
+ユーザーの好みに合う適切な銘柄を推薦してください。
+"""
+
+_CATALOG_HEADER = "\n## 候補の銘柄\n"
+
+_CATALOG_CONSTRAINT = """
+### 【最重要】銘柄選択の制約
+メニューが提供されていないため、上記の「候補の銘柄」から、ユーザーの好みに合う銘柄を
+選択してください。候補外の銘柄は推薦しないでください。
+銘柄名は候補の表記のまま（括弧内の産地・特定名称を除いて）出力してください。
+"""
+
+# 候補の銘柄の説明がすべて知識ベースにある場合に追加する指示（説明の生成を省く）
+_DESCRIPTION_OMITTED = """
+### brand_descriptionの省略
+候補の銘柄の説明はシステムで補完するため、brand_descriptionは出力しないでください。
+"""
+
+# 味の好み分析のパースに失敗した場合の要約（キャッシュしない）
+_TASTE_ANALYSIS_FALLBACK_SUMMARY = "味の好みを分析中です。"
+
+# 推薦パイプライン
+PIPELINE_TWO_CALL = "two_call"  # 味の好み分析 → 推薦の2回呼び出し
+PIPELINE_FUSED = "fused"  # 味の好み分析と推薦を1回の呼び出しで行う
+
+
+def _join_lines(lines: list[str | None]) -> str:
+    """予算内に収めた記録の行を連結（除外した記録は飛ばす）"""
+    return "".join(line for line in lines if line is not None)
+
+
+def _follow_up_request(need_best: bool, count: int) -> str:
+    """追加の呼び出しで依頼する項目の指示"""
+    if need_best and count > 0:
+        return f"best_recommendを1件と、recommendationsを{count}件だけ出力してください。\n"
+    if need_best:
+        return "best_recommendを1件だけ出力してください。recommendationsは空の配列にしてください。\n"
+    return f"recommendationsを{count}件だけ出力してください。best_recommendは出力しないでください。\n"
+
+
+def _taste_details(analysis: dict[str, Any]) -> str:
+    """味の好み分析結果の好む・避けるべき味の特徴の行を構築"""
+    lines = []
+    preferred_tastes = analysis.get("preferred_tastes", [])
+    if preferred_tastes:
+        lines.append(f"好む味の特徴: {', '.join(preferred_tastes)}\n")
+    disliked_tastes = analysis.get("disliked_tastes", [])
+    if disliked_tastes:
+        lines.append(f"避けるべき味の特徴: {', '.join(disliked_tastes)}\n")
+    return "".join(lines)
+
+
+def _fixed_tokens(template: PromptTemplate, values: dict[str, str]) -> int:
+    """記録の行以外（システムプロンプト・静的セグメント・記録以外のスロット）の推定トークン数"""
+    return template.static_tokens + sum(map(estimate_tokens, values.values()))
+
+
+def _remaining_budget(budget: int, fixed_tokens: int) -> int:
+    """記録の行に使えるトークン数（0は無制限）
+
+    固定部分だけで予算を使い切った場合も無制限にならないよう、1以上に切り上げる
+    （記録の行はすべて除外される）。
+    """
+    return max(1, budget - fixed_tokens) if budget > 0 else 0
+
+
+class RecommendationService:
+    """日本酒推薦サービス"""
+
+    def __init__(self):
+        self.bedrock_service = BedrockService()
+        self.taste_profile_cache = TasteProfileCache()
+        config = get_config()
+        self.result_cache = LRUTTLCache(
+            max_entries=config.recommendation_cache_size, ttl=config.cache_ttl
+        )
+
+    def clear_caches(self) -> None:
+        """サービスが保持するキャッシュをすべて破棄"""
+        self.taste_profile_cache.clear()
+        self.result_cache.clear()
+
+    def invalidate_user(self, user_id: str) -> None:
+        """ユーザーの推薦結果のキャッシュを破棄（飲酒記録が更新された場合など）
+
+        味の好み分析結果のキャッシュは記録の指紋で追加・変更を検出し、
+        差分更新に使うため破棄しない。
 
-    def _parse_recommendations(self, response: str) -> RecommendationResponse:
-        """推薦レスポンスをパース
-        
         Args:
-            response: BedrockからのJSONレスポンス
-            
-        Returns:
-            RecommendationResponse: パースされた推薦レスポンス（best_recommend + recommendations最大9件）
+            user_id: ユーザーID
         """
-        import json
-        
-        try:
-            # JSONレスポンスをパース
-            # マークダウンのコードブロックを除去
-            response_clean = response.strip()
-            if response_clean.startswith("```"):
-                # ```json ... ``` の形式の場合
-                lines = response_clean.split("\n")
-                response_clean = "\n".join(lines[1:-1])
-            
-            data = json.loads(response_clean)
-            
-            # best_recommendをパース
-            best_recommend = None
-            best_recommend_data = data.get("best_recommend")
-            if best_recommend_data:
-                try:
-                    best_recommend = BestRecommendation(
-                        brand=best_recommend_data.get("brand", ""),
-                        brand_description=best_recommend_data.get("brand_description", ""),
-                        expected_experience=best_recommend_data.get("expected_experience", ""),
-                        match_score=best_recommend_data.get("match_score", 0),
-                    )
-                    logger.info("best_recommendのパースに成功", brand=best_recommend.brand)
-                except Exception as e:
-                    logger.warning("best_recommendのパースに失敗", error=str(e), data=best_recommend_data)
-            
-            # recommendationsをパース
-            recommendations_data = data.get("recommendations", [])
-            
-            if not isinstance(recommendations_data, list):
-                logger.warning("推薦データがリスト形式ではありません")
-                recommendations_data = []
-            
-            recommendations = []
-            for item in recommendations_data:
-                try:
-                    # 必須フィールドの取得
-                    brand = item.get("brand", "")
-                    brand_description = item.get("brand_description", "")
-                    expected_experience = item.get("expected_experience", "")
-                    category = item.get("category", "")
-                    match_score = item.get("match_score", 0)
-                    
-                    # バリデーション: 銘柄名（1-64文字）
-                    if not brand or len(brand) > 64:
-                        logger.warning("銘柄名が不正", brand=brand)
-                        continue
-                    
-                    # バリデーション: 銘柄説明（1-50文字）
-                    if not brand_description or len(brand_description) > 50:
-                        logger.warning("銘柄説明が不正", brand_description_length=len(brand_description) if brand_description else 0)
-                        # 50文字を超える場合は切り詰める
-                        if brand_description and len(brand_description) > 50:
-                            brand_description = brand_description[:47] + "..."
-                        elif not brand_description:
-                            continue
-                    
-                    # バリデーション: 期待される体験（1-50文字）
-                    if not expected_experience or len(expected_experience) > 50:
-                        logger.warning("期待される体験が不正", expected_experience_length=len(expected_experience) if expected_experience else 0)
-                        # 50文字を超える場合は切り詰める
-                        if expected_experience and len(expected_experience) > 50:
-                            expected_experience = expected_experience[:47] + "..."
-                        elif not expected_experience:
-                            continue
-                    
-                    # バリデーション: カテゴリー（1-10文字）
-                    if not category or len(category) < 1 or len(category) > 10:
-                        logger.warning(
-                            "カテゴリーが範囲外です。デフォルト値を設定します",
-                            category=category,
-                            category_length=len(category) if category else 0
-                        )
-                        # デフォルトカテゴリーを設定
-                        category = "おすすめ"
-                    
-                    # バリデーション: マッチ度（1-100の範囲）
-                    if not isinstance(match_score, int) or match_score < 1 or match_score > 100:
-                        logger.warning("マッチ度が不正", match_score=match_score)
-                        continue
-                    
-                    # Recommendationモデルに変換
-                    recommendation = Recommendation(
-                        brand=brand,
-                        brand_description=brand_description,
-                        expected_experience=expected_experience,
-                        category=category,
-                        match_score=match_score,
-                    )
-                    recommendations.append(recommendation)
-                    
-                except Exception as e:
-                    logger.warning("推薦アイテムのパースに失敗", error=str(e), item=item)
-                    continue
-            
-            # マッチ度の高い順にソート
-            recommendations.sort(key=lambda x: x.match_score, reverse=True)
-            
-            # 最大9件に制限（best_recommend 1件 + recommendations 9件 = 合計10件）
-            recommendations = recommendations[:9]
-            
-            logger.info(
-                "推薦結果のパースに成功", 
-                has_best_recommend=best_recommend is not None,
-                recommendation_count=len(recommendations)
-            )
-            
-            return RecommendationResponse(
-                best_recommend=best_recommend,
-                recommendations=recommendations
-            )
-            
-        except (json.JSONDecodeError, KeyError) as e:
-            logger.error("推薦レスポンスのパースに失敗", error=str(e), response=response[:200])
-            return RecommendationResponse(
-                best_recommend=None,
-                recommendations=[]
-            )
+        removed = self.result_cache.invalidate_user(user_id)
+        logger.info("ユーザーのキャッシュを破棄", user_id=user_id, removed_results=removed)
+
+    async def generate_recommendations(
+        self,
+        user_id: str,
+        drinking_records: list[DrinkingRecord],
+        menu: Menu | None = None,
+        max_recommendations: int = 5,
+        pipeline: str | None = None,
+    ) -> RecommendationResponse:
+        """推薦を生成
+
+        Args:
+            user_id: ユーザーID
+            drinking_records: 飲酒履歴
+            menu: メニュー情報
+            max_recommendations: 最大推薦数（未使用、互換性のため保持）
+            pipeline: 推薦パイプライン（"two_call" または "fused"、省略時は設定値）
+
+        Returns:
+            RecommendationResponse: 推薦レスポンス（best_recommend + recommendations最大9件）
+        """
+        logger.info(
+            "推薦生成を開始", user_id=user_id, record_count=len(drinking_records)
+        )
+
+        # 飲酒履歴0件の場合は空の推薦レスポンスを返す（エラーではない）
+        if not drinking_records:
+            logger.info(
+                "飲酒履歴が0件のため、空の推薦レスポンスを返します", user_id=user_id
+            )
+            return RecommendationResponse(
+                best_recommend=None,
+                recommendations=[],
+                metadata="飲酒記録がありません。まずは飲んだお酒を記録してください"
+            )
+
+        # 同じ履歴・メニュー・モデルの推薦結果がキャッシュにあれば再利用
+        pipeline = self._resolve_pipeline(pipeline)
+        cache_key = self._result_cache_key(user_id, drinking_records, menu, pipeline)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            logger.info(
+                "推薦結果のキャッシュを使用",
+                user_id=user_id,
+                **self.result_cache.stats(),
+            )
+            return cached.model_copy(deep=True)
+
+        candidates = self._prompt_candidates(menu, drinking_records)
+        chunked = self._should_chunk(candidates)
+        if pipeline == PIPELINE_FUSED and not chunked:
+            # 味の好み分析と推薦を1回の呼び出しで生成
+            recommendation_response, _ = await self.generate_fused(
+                user_id, drinking_records, menu, candidates
+            )
+        else:
+            if pipeline == PIPELINE_FUSED:
+                # 分割した推薦は1回の呼び出しにまとめられないため、味の好み分析を先に行う
+                logger.info(
+                    "候補が多いため、味の好み分析と分割した推薦を別々に生成",
+                    candidate_count=len(candidates),
+                )
+            # 味の好み分析
+            taste_analysis = await self.analyze_taste_preference(
+                user_id, drinking_records
+            )
+
+            if chunked:
+                # 候補が多い場合は分割して並列に推薦し、結果を統合
+                recommendation_response = await self._recommend_in_chunks(
+                    drinking_records, taste_analysis, candidates, max_recommendations
+                )
+            else:
+                # 絞り込んだ候補をそのまま渡す（プロンプトの組み立てで再度採点・検索しない）
+                recommendation_response = await self._recommend_single(
+                    drinking_records,
+                    taste_analysis,
+                    Menu(brands=candidates) if menu and menu.brands else None,
+                    max_recommendations,
+                    candidates,
+                )
+            recommendation_response = self._enforce_menu(
+                recommendation_response, self._grounding_menu(menu, candidates)
+            )
+
+        # パースに失敗した（推薦が空の）結果はキャッシュしない
+        if recommendation_response.best_recommend or recommendation_response.recommendations:
+            self.result_cache.put(
+                cache_key, recommendation_response.model_copy(deep=True), user_id=user_id
+            )
+
+        logger.info(
+            "推薦生成を完了", 
+            user_id=user_id, 
+            has_best_recommend=recommendation_response.best_recommend is not None,
+            recommendation_count=len(recommendation_response.recommendations)
+        )
+        return recommendation_response
+
+    async def _recommend_single(
+        self,
+        drinking_records: list[DrinkingRecord],
+        taste_analysis: dict[str, Any],
+        menu: Menu | None,
+        max_recommendations: int,
+        candidates: list[str] | list[CatalogBrand] | None = None,
+    ) -> RecommendationResponse:
+        """味の好み分析結果から1回の呼び出しで推薦を生成
+
+        出力が途中で切れていた、または不正な項目を除いた場合は、不足分だけを追加で依頼する。
+        """
+        # 推薦プロンプトを構築
+        prompt = self._build_recommendation_prompt(
+            drinking_records=drinking_records,
+            taste_analysis=taste_analysis,
+            menu=menu,
+            max_recommendations=max_recommendations,
+            candidates=candidates,
+        )
+
+        # Bedrockで推薦を生成
+        response = await self.bedrock_service.generate_text(
+            prompt,
+            system_prompt=RECOMMENDATION_SYSTEM_PROMPT,
+            output_tool=self._output_tool(RECOMMENDATION_TOOL, prompt),
+        )
+
+        # レスポンスをパースし、欠けた推薦があれば不足分だけを追加で依頼
+        recommendation_response, incomplete = self._parse_recommendation_output(response)
+        return await self._request_missing_recommendations(
+            recommendation_response,
+            incomplete,
+            prompt,
+            RECOMMENDATION_SYSTEM_PROMPT,
+            menu,
+        )
+
+    async def _recommend_in_chunks(
+        self,
+        drinking_records: list[DrinkingRecord],
+        taste_analysis: dict[str, Any],
+        candidates: list[str] | list[CatalogBrand],
+        max_recommendations: int,
+    ) -> RecommendationResponse:
+        """候補の銘柄を分割して並列に推薦し、結果を統合（map-reduce）
+
+        候補をMENU_CHUNK_SIZE件以下のチャンクに分け、チャンクごとの推薦を
+        同時呼び出し数の上限付きで並列に生成する。各チャンクの結果はマッチ度で統合し、
+        best_recommendと上位9件を選ぶ（統合ではLLMを呼び出さない）。
+        失敗したチャンクは除いて統合し、すべて失敗した場合のみ例外を送出する。
+
+        Args:
+            drinking_records: 飲酒履歴
+            taste_analysis: 味の好み分析結果
+            candidates: 候補の銘柄（メニューの銘柄、または銘柄カタログの候補）
+            max_recommendations: 最大推薦数（未使用、互換性のため保持）
+
+        Returns:
+            RecommendationResponse: 統合した推薦レスポンス
+        """
+        config = get_config()
+        # 各チャンクに上位・下位の候補が偏らないよう、順位を交互に振り分ける
+        chunk_count = -(-len(candidates) // config.menu_chunk_size)
+        chunks = [candidates[i::chunk_count] for i in range(chunk_count)]
+        semaphore = asyncio.Semaphore(max(1, config.menu_chunk_concurrency))
+        logger.info(
+            "候補を分割して推薦を生成",
+            candidate_count=len(candidates),
+            chunk_count=chunk_count,
+            concurrency=config.menu_chunk_concurrency,
+        )
+
+        async def recommend_chunk(
+            chunk: list[str] | list[CatalogBrand],
+        ) -> RecommendationResponse:
+            # カタログの候補は産地・特定名称を含む「候補の銘柄」として載せる
+            from_catalog = any(isinstance(b, CatalogBrand) for b in chunk)
+            chunk_menu = Menu(
+                brands=[b.brand if isinstance(b, CatalogBrand) else b for b in chunk]
+            )
+            async with semaphore:
+                prompt = self._build_recommendation_prompt(
+                    drinking_records=drinking_records,
+                    taste_analysis=taste_analysis,
+                    menu=None if from_catalog else chunk_menu,
+                    max_recommendations=max_recommendations,
+                    candidates=chunk,
+                )
+                response = await self.bedrock_service.generate_text(
+                    prompt,
+                    system_prompt=RECOMMENDATION_SYSTEM_PROMPT,
+                    output_tool=self._output_tool(RECOMMENDATION_TOOL, prompt),
+                )
+            return self._enforce_menu(self._parse_recommendations(response), chunk_menu)
+
+        results = await asyncio.gather(
+            *(recommend_chunk(chunk) for chunk in chunks), return_exceptions=True
+        )
+        responses = [r for r in results if isinstance(r, RecommendationResponse)]
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            logger.warning(
+                "一部のチャンクの推薦に失敗",
+                failed_chunks=len(errors),
+                chunk_count=chunk_count,
+                error=str(errors[0]),
+            )
+            if not responses:
+                raise errors[0]
+        return self._merge_chunk_responses(responses)
+
+    def _merge_chunk_responses(
+        self, responses: list[RecommendationResponse]
+    ) -> RecommendationResponse:
+        """チャンクごとの推薦をマッチ度で統合
+
+        各チャンクのbest_recommendのうちマッチ度が最も高いものをbest_recommendとし、
+        残りのbest_recommendと推薦からマッチ度の高い9件をrecommendationsとする。
+        """
+        bests = sorted(
+            (r.best_recommend for r in responses if r.best_recommend is not None),
+            key=lambda x: x.match_score,
+            reverse=True,
+        )
+        pool = [r for response in responses for r in response.recommendations]
+        pool.extend(
+            Recommendation(
+                brand=best.brand,
+                brand_description=best.brand_description,
+                expected_experience=best.expected_experience,
+                category=_MERGED_BEST_CATEGORY,
+                match_score=best.match_score,
+            )
+            for best in bests[1:]
+        )
+        pool.sort(key=lambda x: x.match_score, reverse=True)
+
+        best_recommend = bests[0] if bests else None
+        if best_recommend is None and pool:
+            top = pool.pop(0)
+            best_recommend = BestRecommendation(
+                brand=top.brand,
+                brand_description=top.brand_description,
+                expected_experience=top.expected_experience,
+                match_score=top.match_score,
+            )
+
+        seen = {normalize_brand(best_recommend.brand)} if best_recommend else set()
+        recommendations = []
+        for recommendation in pool:
+            key = normalize_brand(recommendation.brand)
+            if key not in seen:
+                seen.add(key)
+                recommendations.append(recommendation)
+        return RecommendationResponse(
+            best_recommend=best_recommend, recommendations=recommendations[:9]
+        )
+
+    async def generate_fused(
+        self,
+        user_id: str,
+        drinking_records: list[DrinkingRecord],
+        menu: Menu | None = None,
+        candidates: list[str] | list[CatalogBrand] | None = None,
+    ) -> tuple[RecommendationResponse, dict[str, Any]]:
+        """味の好み分析と推薦を1回のBedrock呼び出しで生成
+
+        1つのJSONで返された結果を、既存の推薦レスポンスと味の好み分析結果の形式に分割する。
+
+        Args:
+            user_id: ユーザーID
+            drinking_records: 飲酒履歴（1件以上）
+            menu: メニュー情報
+            candidates: プロンプトに載せる候補（省略時はメニュー・飲酒履歴から求める）
+
+        Returns:
+            tuple[RecommendationResponse, dict[str, Any]]: 推薦レスポンスと味の好み分析結果
+        """
+        logger.info("推薦生成（fused）を開始", user_id=user_id)
+
+        if candidates is None:
+            candidates = self._prompt_candidates(menu, drinking_records)
+        prompt = self._build_fused_prompt(drinking_records, menu, candidates)
+        response = await self.bedrock_service.generate_text(
+            prompt,
+            system_prompt=FUSED_RECOMMENDATION_SYSTEM_PROMPT,
+            output_tool=self._output_tool(FUSED_RECOMMENDATION_TOOL, prompt),
+        )
+
+        recommendation_response, incomplete = self._parse_recommendation_output(response)
+        taste_analysis = self._parse_taste_analysis(
+            response, drinking_records, key="taste_profile"
+        )
+        self._store_taste_profile(user_id, drinking_records, taste_analysis)
+        recommendation_response = await self._request_missing_recommendations(
+            recommendation_response,
+            incomplete,
+            prompt,
+            FUSED_RECOMMENDATION_SYSTEM_PROMPT,
+            menu,
+        )
+        recommendation_response = self._enforce_menu(
+            recommendation_response, self._grounding_menu(menu, candidates)
+        )
+        return recommendation_response, taste_analysis
+
+    def _result_cache_key(
+        self,
+        user_id: str,
+        drinking_records: list[DrinkingRecord],
+        menu: Menu | None,
+        pipeline: str,
+    ) -> tuple[str, ...]:
+        """推薦結果のキャッシュキーを計算
+
+        飲酒履歴は記録の内容と順序（最新10件の選択に影響する）から、
+        メニューは銘柄の空白を正規化した集合（順序・重複を無視）から計算する。
+        プロンプトを変更した場合に古い結果を使わないよう、テンプレートのバージョンも含める。
+        """
+        history = hashlib.sha256(
+            "\n".join(record_digest(r) for r in drinking_records).encode("utf-8")
+        ).hexdigest()
+        brands = sorted(
+            {" ".join(brand.split()) for brand in (menu.brands if menu else [])} - {""}
+        )
+        menu_key = hashlib.sha256("\n".join(brands).encode("utf-8")).hexdigest()
+        template = (
+            FUSED_RECOMMENDATION_TEMPLATE
+            if pipeline == PIPELINE_FUSED
+            else RECOMMENDATION_TEMPLATE
+        )
+        return (
+            user_id,
+            history,
+            menu_key,
+            self.bedrock_service.model_id,
+            pipeline,
+            template.version,
+        )
+
+    def _resolve_pipeline(self, pipeline: str | None) -> str:
+        """推薦パイプラインを決定（未指定・不正な値の場合は設定値）"""
+        if pipeline in (PIPELINE_TWO_CALL, PIPELINE_FUSED):
+            return pipeline
+        if pipeline is not None:
+            logger.warning("不正な推薦パイプラインです。設定値を使用します", pipeline=pipeline)
+        configured = get_config().recommendation_pipeline
+        return PIPELINE_FUSED if configured == PIPELINE_FUSED else PIPELINE_TWO_CALL
+
+    async def stream_recommendations(
+        self,
+        user_id: str,
+        drinking_records: list[DrinkingRecord],
+        menu: Menu | None = None,
+        max_recommendations: int = 5,
+        pipeline: str | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """推薦をストリーミング生成
+
+        Bedrockのレスポンスストリームを逐次パースし、best_recommendが完成した時点、
+        および各推薦アイテムが完成した時点でイベントとしてyieldする。
+        最後に、ソート済みの全体結果を含む完了イベントをyieldする。
+
+        Args:
+            user_id: ユーザーID
+            drinking_records: 飲酒履歴
+            menu: メニュー情報
+            max_recommendations: 最大推薦数（未使用、互換性のため保持）
+            pipeline: 推薦パイプライン（"two_call" または "fused"、省略時は設定値）
+
+        Yields:
+            dict[str, Any]: イベント
+                - {"event": "best_recommend", "data": BestRecommendationの辞書}
+                - {"event": "recommendation", "data": Recommendationの辞書}
+                - {"event": "complete", "data": RecommendationResponseの辞書}
+        """
+        logger.info(
+            "ストリーミング推薦生成を開始",
+            user_id=user_id,
+            record_count=len(drinking_records),
+        )
+
+        # 飲酒履歴0件の場合は空の推薦レスポンスのみを返す
+        if not drinking_records:
+            response = RecommendationResponse(
+                best_recommend=None,
+                recommendations=[],
+                metadata="飲酒記録がありません。まずは飲んだお酒を記録してください"
+            )
+            yield {"event": "complete", "data": response.dict()}
+            return
+
+        candidates = self._prompt_candidates(menu, drinking_records)
+        grounding_menu = self._grounding_menu(menu, candidates)
+        if self._should_chunk(candidates):
+            # 分割した推薦は統合するまで順位が決まらないため、統合後にまとめて返す
+            logger.info(
+                "候補が多いため、分割して推薦した結果をまとめて返します",
+                candidate_count=len(candidates),
+            )
+            taste_analysis = await self.analyze_taste_preference(
+                user_id, drinking_records
+            )
+            response = self._enforce_menu(
+                await self._recommend_in_chunks(
+                    drinking_records, taste_analysis, candidates, max_recommendations
+                ),
+                grounding_menu,
+            )
+            if response.best_recommend is not None:
+                yield {"event": "best_recommend", "data": response.best_recommend.dict()}
+            for recommendation in response.recommendations:
+                yield {"event": "recommendation", "data": recommendation.dict()}
+            yield {"event": "complete", "data": response.dict()}
+            return
+
+        if self._resolve_pipeline(pipeline) == PIPELINE_FUSED:
+            prompt = self._build_fused_prompt(drinking_records, menu, candidates)
+            system_prompt = FUSED_RECOMMENDATION_SYSTEM_PROMPT
+        else:
+            taste_analysis = await self.analyze_taste_preference(
+                user_id, drinking_records
+            )
+            prompt = self._build_recommendation_prompt(
+                drinking_records=drinking_records,
+                taste_analysis=taste_analysis,
+                menu=menu,
+                max_recommendations=max_recommendations,
+                candidates=candidates,
+            )
+            system_prompt = RECOMMENDATION_SYSTEM_PROMPT
+
+        parser = IncrementalJsonParser()
+        menu_index = self._menu_index(grounding_menu)
+        seen_brands: set[str] = set()
+        best_recommend: BestRecommendation | None = None
+        recommendations: list[Recommendation] = []
+
+        async for chunk in self.bedrock_service.generate_text_stream(
+            prompt, system_prompt=system_prompt
+        ):
+            for key, data in parser.feed(chunk):
+                if key == "best_recommend" and best_recommend is None:
+                    best_recommend = self._snap_to_menu(
+                        self._parse_best_recommend_item(data), menu_index, seen_brands
+                    )
+                    if best_recommend is not None:
+                        yield {"event": "best_recommend", "data": best_recommend.dict()}
+                elif key == "recommendations" and len(recommendations) < 9:
+                    recommendation = self._snap_to_menu(
+                        self._parse_recommendation_item(data), menu_index, seen_brands
+                    )
+                    if recommendation is not None:
+                        recommendations.append(recommendation)
+                        yield {"event": "recommendation", "data": recommendation.dict()}
+
+        if best_recommend is None and not recommendations:
+            # 逐次パースで何も取り出せなかった場合は全文パースにフォールバック
+            response = self._enforce_menu(
+                self._parse_recommendations(parser.text), grounding_menu
+            )
+            if response.best_recommend is not None:
+                yield {"event": "best_recommend", "data": response.best_recommend.dict()}
+            for recommendation in response.recommendations:
+                yield {"event": "recommendation", "data": recommendation.dict()}
+        else:
+            recommendations.sort(key=lambda x: x.match_score, reverse=True)
+            response = RecommendationResponse(
+                best_recommend=best_recommend,
+                recommendations=recommendations,
+            )
+
+        logger.info(
+            "ストリーミング推薦生成を完了",
+            user_id=user_id,
+            has_best_recommend=response.best_recommend is not None,
+            recommendation_count=len(response.recommendations),
+        )
+        yield {"event": "complete", "data": response.dict()}
+
+    async def analyze_taste_preference(
+        self, user_id: str, drinking_records: list[DrinkingRecord]
+    ) -> dict[str, Any]:
+        """味の好み分析
+
+        Args:
+            user_id: ユーザーID
+            drinking_records: 飲酒履歴
+
+        Returns:
+            Dict[str, Any]: 味の好み分析結果
+        """
+        if not drinking_records:
+            return {
+                "preferred_tastes": [],
+                "disliked_tastes": [],
+                "rating_distribution": {},
+                "analysis_summary": "飲酒履歴がないため、分析できません。",
+            }
+
+        cached = self.taste_profile_cache.lookup(user_id, drinking_records)
+        if cached.kind == "hit":
+            # 記録が変わっていなければ前回の分析結果をそのまま使う
+            logger.info("味の好み分析のキャッシュを使用", user_id=user_id)
+            return dict(cached.previous.analysis)
+
+        if cached.kind == "incremental":
+            # 数件の追加のみの場合は、前回の分析結果に追加分を反映する
+            logger.info(
+                "味の好み分析を差分更新",
+                user_id=user_id,
+                new_record_count=len(cached.new_records),
+            )
+            prompt = self._build_taste_profile_update_prompt(
+                cached.previous.analysis, cached.new_records
+            )
+            system_prompt = TASTE_PROFILE_UPDATE_SYSTEM_PROMPT
+        else:
+            # 評価別に分類
+            liked_records, disliked_records = self._split_by_rating(drinking_records)
+
+            # 味の好み分析プロンプトを構築
+            prompt = self._build_taste_analysis_prompt(liked_records, disliked_records)
+            system_prompt = TASTE_ANALYSIS_SYSTEM_PROMPT
+
+        # Bedrockで分析を実行
+        response = await self.bedrock_service.generate_text(
+            prompt, system_prompt=system_prompt, output_tool=TASTE_ANALYSIS_TOOL
+        )
+
+        # 分析結果をパース
+        analysis = self._parse_taste_analysis(response, drinking_records)
+        self._store_taste_profile(user_id, drinking_records, analysis)
+
+        return analysis
+
+    def _store_taste_profile(
+        self,
+        user_id: str,
+        drinking_records: list[DrinkingRecord],
+        analysis: dict[str, Any],
+    ) -> None:
+        """分析結果をキャッシュ（パースに失敗した結果はキャッシュしない）"""
+        if analysis.get("analysis_summary") == _TASTE_ANALYSIS_FALLBACK_SUMMARY:
+            return
+        self.taste_profile_cache.store(user_id, drinking_records, dict(analysis))
+
+    def _split_by_rating(
+        self, drinking_records: list[DrinkingRecord]
+    ) -> tuple[list[DrinkingRecord], list[DrinkingRecord]]:
+        """飲酒履歴を好きな記録と合わなかった記録に分類"""
+        from ..models import Rating
+
+        liked_records = [
+            r
+            for r in drinking_records
+            if r.rating in [Rating.VERY_GOOD.value, Rating.GOOD.value]
+        ]
+        disliked_records = [
+            r
+            for r in drinking_records
+            if r.rating in [Rating.BAD.value, Rating.VERY_BAD.value]
+        ]
+        return liked_records, disliked_records
+
+    def _build_recommendation_prompt(
+        self,
+        drinking_records: list[DrinkingRecord],
+        taste_analysis: dict[str, Any],
+        menu: Menu | None,
+        max_recommendations: int,
+        candidates: list[str] | list[CatalogBrand] | None = None,
+    ) -> str:
+        """推薦プロンプト（リクエストごとに変わる部分）を構築
+
+        静的な指示はRECOMMENDATION_SYSTEM_PROMPTとして別に送信する。
+
+        Args:
+            drinking_records: 飲酒履歴
+            taste_analysis: 味の好み分析結果
+            menu: メニュー情報（任意）
+            max_recommendations: 最大推薦数
+            candidates: プロンプトに載せる候補（省略時はメニュー・飲酒履歴から求める）
+            
+        Returns:
+            str: 推薦生成用プロンプト
+        """
+        template = RECOMMENDATION_TEMPLATE
+        values = {
+            "summary": taste_analysis.get("analysis_summary", "分析データなし"),
+            "taste_details": _taste_details(taste_analysis),
+        }
+        values["menu_section"], values["menu_constraint"] = self._build_menu_sections(
+            menu, drinking_records, candidates
+        )
+
+        # 最新の飲酒履歴を、固定部分を除いた残りのトークン予算に収めて追加
+        budget = get_config().recommendation_prompt_token_budget
+        fixed_tokens = _fixed_tokens(template, values)
+        recent_records = drinking_records[-10:] if drinking_records else []
+        fitted = fit_lines(
+            [(f"- {r.brand}: {r.rating}", r.impression) for r in recent_records],
+            _remaining_budget(budget, fixed_tokens),
+            separator=" - ",
+        )
+        history = _join_lines(fitted.lines) if recent_records else "（飲酒履歴なし）\n"
+
+        self._log_prompt_budget(template, fixed_tokens, fitted, budget)
+        return template.render(history=history, **values)
+
+    def _build_taste_analysis_prompt(
+        self,
+        liked_records: list[DrinkingRecord],
+        disliked_records: list[DrinkingRecord],
+    ) -> str:
+        """味の好み分析プロンプト（リクエストごとに変わる部分）を構築
+
+        静的な指示はTASTE_ANALYSIS_SYSTEM_PROMPTとして別に送信する。
+        """
+
+        # 避けるべき特徴の手がかりとして、合わなかった記録を優先して予算に収める
+        return self._render_taste_records(
+            TASTE_ANALYSIS_TEMPLATE,
+            liked_records,
+            disliked_records,
+            get_config().taste_analysis_prompt_token_budget,
+        )
+
+    def _build_taste_profile_update_prompt(
+        self, previous: dict[str, Any], new_records: list[DrinkingRecord]
+    ) -> str:
+        """差分更新プロンプト（リクエストごとに変わる部分）を構築
+
+        静的な指示はTASTE_PROFILE_UPDATE_SYSTEM_PROMPTとして別に送信する。
+
+        Args:
+            previous: 前回の分析結果
+            new_records: 前回の分析以降に追加された記録
+
+        Returns:
+            str: 差分更新用プロンプト
+        """
+        template = TASTE_PROFILE_UPDATE_TEMPLATE
+        values = {
+            "summary": previous.get("analysis_summary", "分析データなし"),
+            "taste_details": _taste_details(previous),
+        }
+
+        budget = get_config().taste_analysis_prompt_token_budget
+        fixed_tokens = _fixed_tokens(template, values)
+        fitted = fit_lines(
+            [(f"- {r.brand} ({r.rating})", r.impression) for r in new_records],
+            _remaining_budget(budget, fixed_tokens),
+        )
+
+        self._log_prompt_budget(template, fixed_tokens, fitted, budget)
+        return template.render(records=_join_lines(fitted.lines), **values)
+
+    def _build_fused_prompt(
+        self,
+        drinking_records: list[DrinkingRecord],
+        menu: Menu | None,
+        candidates: list[str] | list[CatalogBrand] | None = None,
+    ) -> str:
+        """fusedモードのプロンプト（リクエストごとに変わる部分）を構築
+
+        静的な指示はFUSED_RECOMMENDATION_SYSTEM_PROMPTとして別に送信する。
+
+        Args:
+            drinking_records: 飲酒履歴
+            menu: メニュー情報（任意）
+            candidates: プロンプトに載せる候補（省略時はメニュー・飲酒履歴から求める）
+
+        Returns:
+            str: 味の好み分析と推薦を同時に行うプロンプト
+        """
+        liked_records, disliked_records = self._split_by_rating(drinking_records)
+        menu_section, menu_constraint = self._build_menu_sections(
+            menu, drinking_records, candidates
+        )
+
+        return self._render_taste_records(
+            FUSED_RECOMMENDATION_TEMPLATE,
+            liked_records,
+            disliked_records,
+            get_config().recommendation_prompt_token_budget,
+            menu_section=menu_section,
+            menu_constraint=menu_constraint,
+        )
+
+    def _render_taste_records(
+        self,
+        template: PromptTemplate,
+        liked_records: list[DrinkingRecord],
+        disliked_records: list[DrinkingRecord],
+        budget: int,
+        **values: str,
+    ) -> str:
+        """好きな記録・合わなかった記録をトークン予算に収めてテンプレートに埋める
+
+        Args:
+            template: liked・disliked のスロットを持つテンプレート
+            liked_records: 好きな日本酒の記録
+            disliked_records: 合わなかった日本酒の記録
+            budget: トークン予算（0以下は無制限）
+            **values: 記録以外のスロットの値
+
+        Returns:
+            str: 組み立てたプロンプト
+        """
+        config = get_config()
+        if config.history_compaction_enabled:
+            # 同じ銘柄の記録を1件に集約し、長い感想は味に関する文節を抜き出す
+            limit = config.impression_key_phrase_max_chars
+            liked = compact_history(liked_records, limit)
+            disliked = compact_history(disliked_records, limit)
+            entries = [
+                (f"- {e.brand} ({e.rating_summary})", e.impression)
+                for e in liked + disliked
+            ]
+        else:
+            liked = liked_records
+            entries = [
+                (f"- {r.brand} ({r.rating})", r.impression)
+                for r in liked_records + disliked_records
+            ]
+
+        fixed_tokens = _fixed_tokens(template, values)
+        fitted = fit_lines(entries, _remaining_budget(budget, fixed_tokens))
+        split = len(liked)
+
+        self._log_prompt_budget(
+            template,
+            fixed_tokens,
+            fitted,
+            budget,
+            source_records=len(liked_records) + len(disliked_records),
+        )
+        return template.render(
+            liked=_join_lines(fitted.lines[:split]),
+            disliked=_join_lines(fitted.lines[split:]),
+            **values,
+        )
+
+    def _build_menu_sections(
+        self,
+        menu: Menu | None,
+        drinking_records: list[DrinkingRecord],
+        candidates: list[str] | list[CatalogBrand] | None = None,
+    ) -> tuple[str, str]:
+        """メニューと銘柄選択の制約のセクションを構築
+
+        メニューが設定の件数より多い場合は、飲酒履歴と照らして採点した上位の銘柄だけを載せる。
+        メニューがない場合は、銘柄カタログから好きな記録に近い銘柄を候補として載せる。
+
+        Args:
+            menu: メニュー情報（任意）
+            drinking_records: 飲酒履歴（メニューの絞り込み・カタログの検索に使用）
+            candidates: 求め済みの候補（_prompt_candidatesの結果。省略時はここで求める）
+
+        Returns:
+            tuple[str, str]: メニューのセクション（メニュー・候補がない場合は空文字列）と制約のセクション
+        """
+        if candidates is None:
+            candidates = self._prompt_candidates(menu, drinking_records)
+        if menu and menu.brands:
+            menu_section = "".join([_MENU_HEADER, *(f"- {brand}\n" for brand in candidates)])
+            return menu_section, _MENU_CONSTRAINT + self._description_note(candidates)
+        if candidates:
+            catalog_section = "".join(
+                [
+                    _CATALOG_HEADER,
+                    *(f"- {b.brand}（{b.prefecture}、{b.style}）\n" for b in candidates),
+                ]
+            )
+            return catalog_section, _CATALOG_CONSTRAINT + self._description_note(
+                [b.brand for b in candidates]
+            )
+        return "", _NO_MENU_CONSTRAINT
+
+    def _prompt_candidates(
+        self, menu: Menu | None, drinking_records: list[DrinkingRecord]
+    ) -> list[str] | list[CatalogBrand]:
+        """プロンプトに載せる候補（メニューの上位の銘柄、メニューがない場合はカタログの候補）"""
+        if menu and menu.brands:
+            return self._menu_candidates(menu, drinking_records)
+        return self._catalog_candidates(drinking_records)
+
+    def _should_chunk(self, candidates: list[str] | list[CatalogBrand]) -> bool:
+        """候補がMENU_CHUNK_SIZE件より多く、分割して推薦するか"""
+        chunk_size = get_config().menu_chunk_size
+        return chunk_size > 0 and len(candidates) > chunk_size
+
+    def _menu_candidates(
+        self, menu: Menu | None, drinking_records: list[DrinkingRecord]
+    ) -> list[str]:
+        """プロンプトに載せる候補の銘柄（メニューが設定の件数より多い場合は上位の銘柄）"""
+        if not menu or not menu.brands:
+            return []
+        brands = shortlist_menu(menu.brands, drinking_records, get_config().menu_shortlist_size)
+        if len(brands) < len(menu.brands):
+            logger.info(
+                "メニューを候補の銘柄に絞り込み",
+                menu_count=len(menu.brands),
+                shortlist_count=len(brands),
+            )
+        return brands
+
+    def _description_note(self, brands: list[str]) -> str:
+        """候補の銘柄の説明がすべて知識ベースにある場合に、説明の生成を省く指示
+
+        メニュー制約を適用しない場合は、候補外の銘柄の説明が欠けないよう省かない。
+        """
+        config = get_config()
+        if not config.brand_knowledge_enabled or not config.menu_constraint_enforced:
+            return ""
+        return _DESCRIPTION_OMITTED if get_brand_knowledge().knows_all(brands) else ""
+
+    def _output_tool(self, tool: OutputTool, prompt: str) -> OutputTool:
+        """プロンプトに合わせた出力ツール（説明の生成を省く場合はbrand_descriptionを除く）"""
+        if _DESCRIPTION_OMITTED in prompt:
+            return without_brand_description(tool)
+        return tool
+
+    def _known_description(self, brand: Any) -> str | None:
+        """知識ベースにある銘柄の説明（無効・未登録の場合はNone）"""
+        if not isinstance(brand, str) or not get_config().brand_knowledge_enabled:
+            return None
+        return get_brand_knowledge().describe(brand)
+
+    def _catalog_candidates(
+        self, drinking_records: list[DrinkingRecord]
+    ) -> list[CatalogBrand]:
+        """メニューがない場合に、銘柄カタログから検索した候補の銘柄（無効の場合は空）"""
+        config = get_config()
+        if not config.brand_catalog_enabled or config.brand_catalog_top_n <= 0:
+            return []
+        catalog = get_brand_catalog()
+        if catalog is None:
+            return []
+        brands = catalog.nearest(drinking_records, config.brand_catalog_top_n)
+        logger.info(
+            "銘柄カタログから候補の銘柄を検索",
+            catalog_count=len(catalog),
+            candidate_count=len(brands),
+        )
+        return brands
+
+    def _grounding_menu(
+        self, menu: Menu | None, candidates: list[str] | list[CatalogBrand]
+    ) -> Menu | None:
+        """推薦の銘柄を照合するメニュー
+
+        メニューがない場合は、カタログの候補をプロンプトに載せたときに限り銘柄カタログの
+        全銘柄で照合する（候補以外でも、カタログにある銘柄は表記を合わせて残す）。
+        候補を載せずに自由に推薦させた場合（好きな記録がない・無効など）は照合しない。
+
+        Args:
+            menu: メニュー情報（任意）
+            candidates: プロンプトに載せた候補（_prompt_candidatesの結果）
+        """
+        if menu and menu.brands:
+            return menu
+        if not candidates:
+            return None
+        catalog = get_brand_catalog()
+        return Menu(brands=[b.brand for b in catalog.brands]) if catalog else None
+
+    def _log_prompt_budget(
+        self,
+        template: PromptTemplate,
+        fixed_tokens: int,
+        fitted: FittedLines,
+        budget: int,
+        source_records: int | None = None,
+    ) -> None:
+        """組み立てたプロンプトの推定トークン数を記録
+
+        Args:
+            template: 使用したテンプレート
+            fixed_tokens: 記録以外（システムプロンプト等）の推定トークン数
+            fitted: 予算内に収めた記録の行
+            budget: トークン予算（0以下は無制限）
+            source_records: 集約前の記録数（記録を集約するテンプレートのみ）
+        """
+        extra = {}
+        if source_records is not None:
+            extra["source_records"] = source_records
+        logger.info(
+            "プロンプトを組み立て",
+            task=template.name,
+            template_version=template.version,
+            estimated_tokens=fixed_tokens + fitted.tokens,
+            token_budget=budget,
+            entries=len(fitted.lines),
+            truncated_records=fitted.truncated,
+            dropped_records=fitted.dropped,
+            **extra,
+        )
+
+    def _parse_recommendations(self, response: str) -> RecommendationResponse:
+        """推薦レスポンスをパース
+        
+        Args:
+            response: BedrockからのJSONレスポンス
+            
+        Returns:
+            RecommendationResponse: パースされた推薦レスポンス（best_recommend + recommendations最大9件）
+        """
+        return self._parse_recommendation_output(response)[0]
+
+    def _parse_recommendation_output(
+        self, response: str
+    ) -> tuple[RecommendationResponse, bool]:
+        """推薦レスポンスをパースし、欠けた推薦があるかを判定
+
+        出力が途中で切れている（max_tokens到達など）場合は、完成している
+        best_recommendと推薦アイテムだけを回収する。
+
+        Args:
+            response: BedrockからのJSONレスポンス
+
+        Returns:
+            tuple[RecommendationResponse, bool]: パースされた推薦レスポンスと、
+                出力が途中で切れていた・不正な項目を除いた場合はTrue
+        """
+        try:
+            # JSONレスポンスをパース（前後の文章・コードブロック・コメント等は取り除く）
+            data = self._load_json(response, "recommendation")
+        except json.JSONDecodeError as e:
+            best_recommend_data, recommendations_data = self._salvage_recommendation_items(
+                response
+            )
+            if best_recommend_data is None and not recommendations_data:
+                logger.error("推薦レスポンスのパースに失敗", error=str(e), response=response[:200])
+                return RecommendationResponse(best_recommend=None, recommendations=[]), True
+            logger.warning(
+                "途中で切れた出力から推薦を回収",
+                has_best_recommend=best_recommend_data is not None,
+                salvaged_count=len(recommendations_data),
+            )
+            truncated = True
+        else:
+            if not isinstance(data, dict):
+                logger.error("推薦レスポンスがオブジェクトではありません", response=response[:200])
+                return RecommendationResponse(best_recommend=None, recommendations=[]), True
+            best_recommend_data = data.get("best_recommend")
+            recommendations_data = data.get("recommendations", [])
+            truncated = False
+
+        # best_recommendをパース
+        best_recommend = None
+        dropped = 0
+        if best_recommend_data:
+            best_recommend = self._parse_best_recommend_item(best_recommend_data)
+            dropped += best_recommend is None
+
+        # recommendationsをパース
+        if not isinstance(recommendations_data, list):
+            logger.warning("推薦データがリスト形式ではありません")
+            recommendations_data = []
+
+        recommendations = []
+        for item in recommendations_data:
+            recommendation = self._parse_recommendation_item(item)
+            if recommendation is not None:
+                recommendations.append(recommendation)
+            else:
+                dropped += 1
+
+        # マッチ度の高い順にソート
+        recommendations.sort(key=lambda x: x.match_score, reverse=True)
+
+        # 最大9件に制限（best_recommend 1件 + recommendations 9件 = 合計10件）
+        recommendations = recommendations[:9]
+
+        logger.info(
+            "推薦結果のパースに成功",
+            has_best_recommend=best_recommend is not None,
+            recommendation_count=len(recommendations),
+            dropped_count=dropped,
+            truncated=truncated,
+        )
+
+        return (
+            RecommendationResponse(
+                best_recommend=best_recommend,
+                recommendations=recommendations,
+            ),
+            truncated or dropped > 0,
+        )
+
+    def _menu_index(self, menu: Menu | None) -> BrandIndex | None:
+        """メニュー制約の照合に使う索引（メニューがない・照合が無効の場合はNone）"""
+        if not menu or not menu.brands or not get_config().menu_constraint_enforced:
+            return None
+        return BrandIndex(menu.brands)
+
+    def _snap_to_menu(
+        self,
+        item: BestRecommendation | Recommendation | None,
+        index: BrandIndex | None,
+        seen: set[str],
+    ) -> BestRecommendation | Recommendation | None:
+        """推薦の銘柄名をメニューの表記に合わせる
+
+        Args:
+            item: パースした推薦（不正な場合はNone）
+            index: メニューの索引（メニューがない場合はNone）
+            seen: 採用済みのメニューの銘柄（重複の除外に使用、更新される）
+
+        Returns:
+            BestRecommendation | Recommendation | None: メニューの表記に合わせた推薦
+                （メニューにない、または採用済みの銘柄の場合はNone）
+        """
+        if item is None or index is None:
+            return item
+        entry = index.match(item.brand)
+        if entry is None:
+            logger.warning("メニューにない銘柄の推薦を除外", brand=item.brand)
+            return None
+        if entry in seen:
+            logger.info("メニューの同じ銘柄への重複した推薦を除外", brand=item.brand, menu_brand=entry)
+            return None
+        seen.add(entry)
+        if entry == item.brand:
+            return item
+        logger.info("銘柄名をメニューの表記に修正", brand=item.brand, menu_brand=entry)
+        return item.model_copy(update={"brand": entry})
+
+    def _enforce_menu(
+        self, response: RecommendationResponse, menu: Menu | None
+    ) -> RecommendationResponse:
+        """推薦をメニューの銘柄に限定する
+
+        メニューの表記と異なる銘柄名はメニューの表記に合わせ、メニューにない銘柄は除外する
+        （制約違反を直すためにLLMを再度呼び出すことはしない）。
+        best_recommendを除外した場合は、マッチ度が最も高い推薦を繰り上げる。
+
+        Args:
+            response: 推薦レスポンス
+            menu: メニュー情報（任意）
+
+        Returns:
+            RecommendationResponse: メニューの銘柄に限定した推薦レスポンス
+        """
+        index = self._menu_index(menu)
+        if index is None:
+            return response
+
+        seen: set[str] = set()
+        best_recommend = self._snap_to_menu(response.best_recommend, index, seen)
+        recommendations = [
+            snapped
+            for snapped in (
+                self._snap_to_menu(r, index, seen) for r in response.recommendations
+            )
+            if snapped is not None
+        ]
+        if best_recommend is None and response.best_recommend is not None and recommendations:
+            top = recommendations.pop(0)
+            best_recommend = BestRecommendation(
+                brand=top.brand,
+                brand_description=top.brand_description,
+                expected_experience=top.expected_experience,
+                match_score=top.match_score,
+            )
+            logger.info("best_recommendを推薦の1件目で置き換え", brand=top.brand)
+
+        return RecommendationResponse(
+            best_recommend=best_recommend,
+            recommendations=recommendations,
+            metadata=response.metadata,
+        )
+
+    def _salvage_recommendation_items(
+        self, response: str
+    ) -> tuple[dict[str, Any] | None, list[dict[str, Any]]]:
+        """途中で切れた出力から、閉じているbest_recommendと推薦アイテムを取り出す
+
+        Returns:
+            tuple[dict[str, Any] | None, list[dict[str, Any]]]: best_recommendと推薦アイテムの辞書
+        """
+        best_recommend_data: dict[str, Any] | None = None
+        recommendations_data: list[dict[str, Any]] = []
+        for key, data in IncrementalJsonParser().feed(response):
+            if key == "best_recommend" and best_recommend_data is None:
+                best_recommend_data = data
+            elif key == "recommendations":
+                recommendations_data.append(data)
+        return best_recommend_data, recommendations_data
+
+    async def _request_missing_recommendations(
+        self,
+        response: RecommendationResponse,
+        incomplete: bool,
+        prompt: str,
+        system_prompt: str,
+        menu: Menu | None,
+    ) -> RecommendationResponse:
+        """欠けた推薦だけを追加の呼び出しで補う
+
+        出力が途中で切れていた、または不正な項目を除いたために推薦の件数
+        （best_recommendを含む）が設定の下限を下回った場合に限り、取得済みの銘柄を
+        除いた不足分だけを依頼する。全体は再生成しない。
+
+        Args:
+            response: パースされた推薦レスポンス
+            incomplete: 出力が途中で切れていた・不正な項目を除いた場合はTrue
+            prompt: 元の推薦プロンプト（リクエストごとに変わる部分）
+            system_prompt: 元の呼び出しのシステムプロンプト（キャッシュを再利用する）
+            menu: メニュー情報（任意）
+
+        Returns:
+            RecommendationResponse: 不足分を補った推薦レスポンス
+        """
+        required = get_config().recommendation_min_items
+        if menu and menu.brands:
+            required = min(required, len(set(menu.brands)))
+        have = (response.best_recommend is not None) + len(response.recommendations)
+        if not incomplete or have >= required:
+            return response
+
+        need_best = response.best_recommend is None
+        count = required - have - need_best
+        known = [r.brand for r in response.recommendations]
+        if response.best_recommend is not None:
+            known.insert(0, response.best_recommend.brand)
+        follow_up_prompt = RECOMMENDATION_FOLLOW_UP_TEMPLATE.render(
+            prompt=prompt,
+            brands="".join(f"- {brand}\n" for brand in known) or "（なし）\n",
+            request=_follow_up_request(need_best, count),
+        )
+        logger.info(
+            "不足している推薦を追加で依頼",
+            required=required,
+            have=have,
+            need_best_recommend=need_best,
+            requested_count=count,
+        )
+        try:
+            follow_up = await self.bedrock_service.generate_text(
+                follow_up_prompt,
+                max_tokens=_FOLLOW_UP_MAX_TOKENS_PER_ITEM * (count + need_best),
+                system_prompt=system_prompt,
+                output_tool=self._output_tool(RECOMMENDATION_FOLLOW_UP_TOOL, follow_up_prompt),
+            )
+        except Exception as e:
+            logger.warning("不足している推薦の取得に失敗", error=str(e))
+            return response
+        extra, _ = self._parse_recommendation_output(follow_up)
+
+        seen = {normalize_brand(brand) for brand in known}
+        best_recommend = response.best_recommend
+        if best_recommend is None and extra.best_recommend is not None:
+            best_recommend = extra.best_recommend
+            seen.add(normalize_brand(best_recommend.brand))
+        added = []
+        for recommendation in extra.recommendations:
+            if len(added) == count:
+                break
+            key = normalize_brand(recommendation.brand)
+            if key not in seen:
+                seen.add(key)
+                added.append(recommendation)
+        recommendations = sorted(
+            response.recommendations + added, key=lambda x: x.match_score, reverse=True
+        )[:9]
+
+        logger.info(
+            "不足している推薦を補完",
+            added_best_recommend=best_recommend is not response.best_recommend,
+            added_count=len(added),
+        )
+        return RecommendationResponse(
+            best_recommend=best_recommend,
+            recommendations=recommendations,
+            metadata=response.metadata,
+        )
+
+    def _load_json(self, response: str, task: str, record_parse: bool = True) -> Any:
+        """LLMの出力からJSONを取り出してパース
+
+        パースの成否は、応答したモデルと出力方式（構造化出力かテキストか）ごとに
+        Bedrockのメトリクスに記録する。
+
+        Args:
+            response: Bedrockからのレスポンス
+            task: タスク名（ログ用）
+            record_parse: パースの成否をメトリクスに記録するか
+
+        Returns:
+            Any: パース結果
+
+        Raises:
+            json.JSONDecodeError: JSONを取り出せない場合
+        """
+        generation = self.bedrock_service.last_generation()
+        try:
+            extracted = extract_json(response)
+        except json.JSONDecodeError:
+            if record_parse:
+                self.bedrock_service.metrics.record_parse(
+                    generation.model_id, generation.structured, ok=False
+                )
+            raise
+        if record_parse:
+            self.bedrock_service.metrics.record_parse(
+                generation.model_id, generation.structured, ok=True
+            )
+        if extracted.repairs:
+            logger.info("LLM出力のJSONを修復", task=task, repairs=list(extracted.repairs))
+        return extracted.value
+
+    def _parse_best_recommend_item(
+        self, data: dict[str, Any]
+    ) -> BestRecommendation | None:
+        """best_recommendの1件をパース
+
+        Args:
+            data: best_recommendの辞書
+
+        Returns:
+            BestRecommendation | None: パース結果（不正な場合はNone）
+        """
+        try:
+            best_recommend = BestRecommendation(
+                brand=data.get("brand", ""),
+                brand_description=self._known_description(data.get("brand"))
+                or data.get("brand_description", ""),
+                expected_experience=data.get("expected_experience", ""),
+                match_score=data.get("match_score", 0),
+            )
+            logger.info("best_recommendのパースに成功", brand=best_recommend.brand)
+            return best_recommend
+        except Exception as e:
+            logger.warning("best_recommendのパースに失敗", error=str(e), data=data)
+            return None
+
+    def _parse_recommendation_item(self, item: dict[str, Any]) -> Recommendation | None:
+        """recommendationsの1件をパース
+
+        Args:
+            item: 推薦アイテムの辞書
+
+        Returns:
+            Recommendation | None: パース結果（不正な場合はNone）
+        """
+        try:
+            # 必須フィールドの取得
+            brand = item.get("brand", "")
+            # 知識ベースにある銘柄は、LLMの出力より知識ベースの説明を優先する
+            brand_description = self._known_description(brand) or item.get("brand_description", "")
+            expected_experience = item.get("expected_experience", "")
+            category = item.get("category", "")
+            match_score = item.get("match_score", 0)
+            
+            # バリデーション: 銘柄名（1-64文字）
+            if not brand or len(brand) > 64:
+                logger.warning("銘柄名が不正", brand=brand)
+                return None
+            
+            # バリデーション: 銘柄説明（1-50文字）
+            if not brand_description or len(brand_description) > 50:
+                logger.warning("銘柄説明が不正", brand_description_length=len(brand_description) if brand_description else 0)
+                # 50文字を超える場合は切り詰める
+                if brand_description and len(brand_description) > 50:
+                    brand_description = brand_description[:47] + "..."
+                elif not brand_description:
+                    return None
+            
+            # バリデーション: 期待される体験（1-50文字）
+            if not expected_experience or len(expected_experience) > 50:
+                logger.warning("期待される体験が不正", expected_experience_length=len(expected_experience) if expected_experience else 0)
+                # 50文字を超える場合は切り詰める
+                if expected_experience and len(expected_experience) > 50:
+                    expected_experience = expected_experience[:47] + "..."
+                elif not expected_experience:
+                    return None
+            
+            # バリデーション: カテゴリー（1-10文字）
+            if not category or len(category) < 1 or len(category) > 10:
+                logger.warning(
+                    "カテゴリーが範囲外です。デフォルト値を設定します",
+                    category=category,
+                    category_length=len(category) if category else 0
+                )
+                # デフォルトカテゴリーを設定
+                category = "おすすめ"
+            
+            # バリデーション: マッチ度（1-100の範囲）
+            if not isinstance(match_score, int) or match_score < 1 or match_score > 100:
+                logger.warning("マッチ度が不正", match_score=match_score)
+                return None
+            
+            # Recommendationモデルに変換
+            return Recommendation(
+                brand=brand,
+                brand_description=brand_description,
+                expected_experience=expected_experience,
+                category=category,
+                match_score=match_score,
+            )
+            
+        except Exception as e:
+            logger.warning("推薦アイテムのパースに失敗", error=str(e), item=item)
+            return None
 
     def _parse_taste_analysis(
-        self, response: str, drinking_records: list[DrinkingRecord]
+        self,
+        response: str,
+        drinking_records: list[DrinkingRecord],
+        key: str | None = None,
     ) -> dict[str, Any]:
         """味の好み分析レスポンスをパース
         
         Args:
             response: BedrockからのJSONレスポンス
             drinking_records: 飲酒履歴
+            key: 分析結果が格納されたトップレベルのキー（fusedモードでは"taste_profile"）
             
         Returns:
             Dict[str, Any]: 分析結果（preferred_tastes, disliked_tastes, rating_distribution, analysis_summary）
@@ -473,15 +1690,13 @@ recommendationsの各銘柄には、推薦理由や特徴を表現する簡潔
             )
         
         try:
-            # JSONレスポンスをパース
-            # マークダウンのコードブロックを除去
-            response_clean = response.strip()
-            if response_clean.startswith("```"):
-                # ```json ... ``` の形式の場合
-                lines = response_clean.split("\n")
-                response_clean = "\n".join(lines[1:-1])
-            
-            analysis_data = json.loads(response_clean)
+            # JSONレスポンスをパース（前後の文章・コードブロック・コメント等は取り除く）
+            # fusedの出力（keyを指定）のパース結果は推薦のパースで記録済み
+            analysis_data = self._load_json(
+                response, key or "taste_analysis", record_parse=key is None
+            )
+            if key is not None:
+                analysis_data = analysis_data[key]
             
             # 必須フィールドの検証
             preferred_tastes = analysis_data.get("preferred_tastes", [])
@@ -499,12 +1714,12 @@ recommendationsの各銘柄には、推薦理由や特徴を表現する簡潔
                 "analysis_summary": analysis_summary,
             }
             
-        except (json.JSONDecodeError, KeyError) as e:
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
             logger.warning("味の好み分析のパースに失敗", error=str(e), response=response[:200])
             # フォールバック: 基本的な分析を返す
             return {
                 "preferred_tastes": [],
                 "disliked_tastes": [],
                 "rating_distribution": rating_distribution,
-                "analysis_summary": "味の好みを分析中です。",
+                "analysis_summary": _TASTE_ANALYSIS_FALLBACK_SUMMARY,
             }
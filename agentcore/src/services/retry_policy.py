@@ -0,0 +1,145 @@
+"""Bedrock呼び出しのリトライポリシー
+
+エラーを種類ごとに分類し、種類別のリトライ上限・上限付き指数バックオフ
+（フルジッター）・リクエスト全体の期限に基づいてリトライ可否と待機時間を決める。
+"""
+
+import random
+from enum import Enum
+
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError,
+)
+
+from ..utils.config import get_config
+
+
+class ErrorClass(str, Enum):
+    """リトライ判定用のエラー分類"""
+
+    THROTTLING = "throttling"  # スロットリング・クォータ超過
+    SERVER = "server"  # サーバー側の一時的なエラー
+    TIMEOUT = "timeout"  # タイムアウト
+    CONNECTION = "connection"  # 接続エラー
+    CLIENT = "client"  # リクエスト不正・権限不足など（リトライ不可）
+    UNKNOWN = "unknown"  # その他
+
+
+# ClientErrorのエラーコードと分類の対応
+_CLIENT_ERROR_CODES: dict[str, ErrorClass] = {
+    "ThrottlingException": ErrorClass.THROTTLING,
+    "TooManyRequestsException": ErrorClass.THROTTLING,
+    "ServiceQuotaExceededException": ErrorClass.THROTTLING,
+    "ServiceUnavailableException": ErrorClass.SERVER,
+    "InternalServerException": ErrorClass.SERVER,
+    "ModelNotReadyException": ErrorClass.SERVER,
+    "ModelErrorException": ErrorClass.SERVER,
+    "ModelTimeoutException": ErrorClass.TIMEOUT,
+    "ValidationException": ErrorClass.CLIENT,
+    "AccessDeniedException": ErrorClass.CLIENT,
+    "ResourceNotFoundException": ErrorClass.CLIENT,
+    "UnrecognizedClientException": ErrorClass.CLIENT,
+}
+
+
+def classify_error(error: Exception) -> ErrorClass:
+    """例外をリトライ判定用に分類
+
+    Args:
+        error: 発生した例外
+
+    Returns:
+        ErrorClass: エラー分類
+    """
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code", "")
+        return _CLIENT_ERROR_CODES.get(code, ErrorClass.UNKNOWN)
+    if isinstance(error, (ReadTimeoutError, ConnectTimeoutError, TimeoutError)):
+        return ErrorClass.TIMEOUT
+    if isinstance(error, (EndpointConnectionError, ConnectionClosedError)):
+        return ErrorClass.CONNECTION
+    return ErrorClass.UNKNOWN
+
+
+class RetryPolicy:
+    """上限付き指数バックオフ（フルジッター）とエラー種類別のリトライ上限
+
+    サブクラス化、または`retry_matrix`を差し替えることで挙動を変更できる。
+    """
+
+    # エラー分類ごとの最大リトライ回数
+    DEFAULT_RETRY_MATRIX: dict[ErrorClass, int] = {
+        ErrorClass.THROTTLING: 4,
+        ErrorClass.SERVER: 2,
+        ErrorClass.TIMEOUT: 1,
+        ErrorClass.CONNECTION: 2,
+        ErrorClass.CLIENT: 0,
+        ErrorClass.UNKNOWN: 2,
+    }
+
+    def __init__(
+        self,
+        base_delay: float | None = None,
+        max_delay: float | None = None,
+        deadline: float | None = None,
+        retry_matrix: dict[ErrorClass, int] | None = None,
+        rng: random.Random | None = None,
+    ):
+        config = get_config()
+        self.base_delay = (
+            base_delay if base_delay is not None else config.bedrock_retry_base_delay
+        )
+        self.max_delay = (
+            max_delay if max_delay is not None else config.bedrock_retry_max_delay
+        )
+        self.deadline = (
+            deadline if deadline is not None else config.bedrock_retry_deadline
+        )
+        self.retry_matrix = dict(retry_matrix or self.DEFAULT_RETRY_MATRIX)
+        self._rng = rng or random.Random()
+
+    def max_retries(self, error_class: ErrorClass) -> int:
+        """エラー分類ごとの最大リトライ回数を取得"""
+        return self.retry_matrix.get(error_class, 0)
+
+    def backoff(self, attempt: int) -> float:
+        """フルジッター付きの待機時間を計算
+
+        Args:
+            attempt: 失敗した試行の回数（1始まり）
+
+        Returns:
+            float: 0以上、min(max_delay, base_delay * 2^(attempt-1))以下の待機時間（秒）
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return self._rng.uniform(0, ceiling)
+
+    def next_delay(
+        self,
+        error_class: ErrorClass,
+        attempt: int,
+        remaining: float,
+        last_latency: float,
+    ) -> float | None:
+        """次のリトライまでの待機時間を決定
+
+        Args:
+            error_class: 失敗した試行のエラー分類
+            attempt: 失敗した試行の回数（1始まり）
+            remaining: リクエスト期限までの残り時間（秒）
+            last_latency: 失敗した試行にかかった時間（秒）
+
+        Returns:
+            float | None: 待機時間（秒）。リトライしない場合はNone
+        """
+        if attempt > self.max_retries(error_class):
+            return None
+        delay = self.backoff(attempt)
+        # 待機後の試行が期限内に終わる見込みがなければリトライしない
+        if delay + last_latency > remaining:
+            return None
+        return delay
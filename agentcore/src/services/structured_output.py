@@ -0,0 +1,129 @@
+"""ツール使用による構造化出力の定義
+
+対応モデルでは、JSONを文章で依頼する代わりに、出力スキーマを入力とするツールを
+Converse APIで強制的に呼び出させ、ツールの入力として構造化された結果を受け取る。
+推薦のスキーマはBestRecommendation・RecommendationのPydanticモデルから生成する。
+"""
+
+import copy
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import BaseModel
+
+from ..models import BestRecommendation, Recommendation
+
+
+@dataclass(frozen=True)
+class OutputTool:
+    """出力スキーマを入力とするツール"""
+
+    name: str
+    description: str
+    schema: dict[str, Any]
+
+    def tool_config(self) -> dict[str, Any]:
+        """Converse APIのtoolConfig（このツールの呼び出しを強制する）"""
+        return {
+            "tools": [
+                {
+                    "toolSpec": {
+                        "name": self.name,
+                        "description": self.description,
+                        "inputSchema": {"json": self.schema},
+                    }
+                }
+            ],
+            "toolChoice": {"tool": {"name": self.name}},
+        }
+
+
+def model_schema(model: type[BaseModel]) -> dict[str, Any]:
+    """PydanticモデルのJSONスキーマ（ツールの入力スキーマ用）"""
+    schema = model.model_json_schema()
+    schema.pop("title", None)
+    return schema
+
+
+TASTE_ANALYSIS_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "preferred_tastes": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "好む味の特徴のリスト",
+        },
+        "disliked_tastes": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "避けるべき味の特徴のリスト",
+        },
+        "analysis_summary": {
+            "type": "string",
+            "maxLength": 200,
+            "description": "味の好みの要約（200文字以内）",
+        },
+    },
+    "required": ["preferred_tastes", "disliked_tastes", "analysis_summary"],
+}
+
+_RECOMMENDATION_PROPERTIES: dict[str, Any] = {
+    "best_recommend": model_schema(BestRecommendation),
+    "recommendations": {
+        "type": "array",
+        "items": model_schema(Recommendation),
+        "maxItems": 9,
+    },
+}
+
+RECOMMENDATION_TOOL = OutputTool(
+    name="submit_recommendations",
+    description="日本酒の推薦結果を返す",
+    schema={
+        "type": "object",
+        "properties": _RECOMMENDATION_PROPERTIES,
+        "required": ["best_recommend", "recommendations"],
+    },
+)
+
+TASTE_ANALYSIS_TOOL = OutputTool(
+    name="submit_taste_analysis",
+    description="ユーザーの味の好みの分析結果を返す",
+    schema=TASTE_ANALYSIS_SCHEMA,
+)
+
+FUSED_RECOMMENDATION_TOOL = OutputTool(
+    name="submit_taste_profile_and_recommendations",
+    description="ユーザーの味の好みの分析結果と日本酒の推薦結果を返す",
+    schema={
+        "type": "object",
+        "properties": {"taste_profile": TASTE_ANALYSIS_SCHEMA, **_RECOMMENDATION_PROPERTIES},
+        "required": ["taste_profile", "best_recommend", "recommendations"],
+    },
+)
+
+# 不足している推薦だけを依頼する追加の呼び出し用（best_recommendは不足時のみ）
+RECOMMENDATION_FOLLOW_UP_TOOL = OutputTool(
+    name="submit_missing_recommendations",
+    description="不足している日本酒の推薦だけを返す",
+    schema={
+        "type": "object",
+        "properties": _RECOMMENDATION_PROPERTIES,
+        "required": ["recommendations"],
+    },
+)
+
+
+def without_brand_description(tool: OutputTool) -> OutputTool:
+    """推薦のツールからbrand_descriptionを除いたツール
+
+    候補の銘柄の説明がすべて知識ベースにある場合に使い、説明の生成を省く。
+    """
+    schema = copy.deepcopy(tool.schema)
+    properties = schema["properties"]
+    items = [properties["best_recommend"], properties["recommendations"]["items"]]
+    for item in items:
+        item["properties"].pop("brand_description", None)
+        if "required" in item:
+            item["required"] = [k for k in item["required"] if k != "brand_description"]
+    return OutputTool(name=tool.name, description=tool.description, schema=schema)
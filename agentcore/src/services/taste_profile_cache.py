@@ -0,0 +1,155 @@
+"""味の好み分析結果のキャッシュ
+
+呼び出し元は毎回すべての飲酒記録を送ってくるため、ユーザーIDと記録集合の
+フィンガープリントをキーに分析結果を保持し、記録が変わっていなければ再分析しない。
+前回の記録集合に数件が追加されただけの場合は、差分更新の対象として前回の分析結果と
+追加された記録を返す。
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+import structlog
+
+from ..models import DrinkingRecord
+from ..utils.config import get_config
+
+logger = structlog.get_logger(__name__)
+
+
+def record_digest(record: DrinkingRecord) -> str:
+    """飲酒記録1件のダイジェストを計算（内容が変われば値も変わる）"""
+    content = "\0".join(
+        [record.id or "", record.brand, str(record.rating), record.impression]
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def records_fingerprint(digests: frozenset[str]) -> str:
+    """記録集合のフィンガープリントを計算（記録の順序に依存しない）"""
+    return hashlib.sha256("\n".join(sorted(digests)).encode("utf-8")).hexdigest()
+
+
+class CachedTasteProfile:
+    """キャッシュされた分析結果"""
+
+    def __init__(self, digests: frozenset[str], analysis: dict[str, Any], stored_at: float):
+        self.digests = digests
+        self.fingerprint = records_fingerprint(digests)
+        self.analysis = analysis
+        self.stored_at = stored_at
+
+
+class TasteProfileLookup:
+    """キャッシュの参照結果
+
+    - kind == "hit": 記録集合が一致（analysisをそのまま利用できる）
+    - kind == "incremental": 前回の記録集合に数件が追加された（new_recordsで差分更新する）
+    - kind == "miss": 再分析が必要
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        previous: CachedTasteProfile | None = None,
+        new_records: list[DrinkingRecord] | None = None,
+    ):
+        self.kind = kind
+        self.previous = previous
+        self.new_records = new_records or []
+
+
+class TasteProfileCache:
+    """ユーザーごとの最新の分析結果を保持するLRU+TTLキャッシュ"""
+
+    def __init__(
+        self,
+        max_entries: int | None = None,
+        ttl: float | None = None,
+        incremental_max_records: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        config = get_config()
+        self.max_entries = (
+            max_entries if max_entries is not None else config.taste_profile_cache_size
+        )
+        self.ttl = ttl if ttl is not None else config.taste_profile_cache_ttl
+        self.incremental_max_records = (
+            incremental_max_records
+            if incremental_max_records is not None
+            else config.taste_profile_incremental_max_records
+        )
+        self._clock = clock
+        self._entries: OrderedDict[str, CachedTasteProfile] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, user_id: str, records: list[DrinkingRecord]) -> TasteProfileLookup:
+        """キャッシュを参照
+
+        Args:
+            user_id: ユーザーID
+            records: 今回の飲酒履歴
+
+        Returns:
+            TasteProfileLookup: 参照結果
+        """
+        if self.max_entries <= 0:
+            return TasteProfileLookup("miss")
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return TasteProfileLookup("miss")
+            if self.ttl > 0 and self._clock() - entry.stored_at > self.ttl:
+                del self._entries[user_id]
+                return TasteProfileLookup("miss")
+            self._entries.move_to_end(user_id)
+
+        digests = [record_digest(r) for r in records]
+        current = frozenset(digests)
+        if current == entry.digests:
+            return TasteProfileLookup("hit", entry)
+
+        # 前回の記録がすべて残っており、追加が数件のみの場合は差分更新
+        if entry.digests <= current:
+            new_records = [
+                r for r, digest in zip(records, digests, strict=True) if digest not in entry.digests
+            ]
+            if len(new_records) <= self.incremental_max_records:
+                return TasteProfileLookup("incremental", entry, new_records)
+
+        return TasteProfileLookup("miss", entry)
+
+    def store(
+        self, user_id: str, records: list[DrinkingRecord], analysis: dict[str, Any]
+    ) -> None:
+        """分析結果を保存
+
+        Args:
+            user_id: ユーザーID
+            records: 分析対象の飲酒履歴
+            analysis: 分析結果
+        """
+        if self.max_entries <= 0:
+            return
+
+        digests = frozenset(record_digest(r) for r in records)
+        with self._lock:
+            self._entries[user_id] = CachedTasteProfile(digests, analysis, self._clock())
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        """ユーザーの分析結果を破棄"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        """すべての分析結果を破棄"""
+        with self._lock:
+            self._entries.clear()
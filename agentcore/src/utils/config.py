@@ -71,6 +71,106 @@ class Config(BaseModel):
         default=int(os.getenv("BEDROCK_TIMEOUT", "15")),
         description="Bedrock呼び出しタイムアウト（秒）"
     )
+    bedrock_max_concurrency: int = Field(
+        default=int(os.getenv("BEDROCK_MAX_CONCURRENCY", "10")),
+        description="Bedrock同時呼び出し数の上限（スレッドプール・接続プールのサイズ）"
+    )
+    bedrock_retry_base_delay: float = Field(
+        default=float(os.getenv("BEDROCK_RETRY_BASE_DELAY", "0.5")),
+        description="リトライの指数バックオフの基準待機時間（秒）"
+    )
+    bedrock_retry_max_delay: float = Field(
+        default=float(os.getenv("BEDROCK_RETRY_MAX_DELAY", "8.0")),
+        description="リトライの待機時間の上限（秒）"
+    )
+    bedrock_retry_deadline: float = Field(
+        default=float(os.getenv("BEDROCK_RETRY_DEADLINE", "30")),
+        description="1回のテキスト生成（リトライを含む）の期限（秒）"
+    )
+    bedrock_fallback_model_ids: list[str] = Field(
+        default=[
+            model_id.strip()
+            for model_id in os.getenv("BEDROCK_FALLBACK_MODEL_IDS", "").split(",")
+            if model_id.strip()
+        ],
+        description="フォールバックモデルIDのリスト（優先順、カンマ区切り）"
+    )
+    bedrock_circuit_failure_rate: float = Field(
+        default=float(os.getenv("BEDROCK_CIRCUIT_FAILURE_RATE", "0.5")),
+        description="サーキットを開くエラー・低速呼び出しの割合"
+    )
+    bedrock_circuit_slow_call_seconds: float = Field(
+        default=float(os.getenv("BEDROCK_CIRCUIT_SLOW_CALL_SECONDS", "10")),
+        description="低速呼び出しとみなすレイテンシ（秒）"
+    )
+    bedrock_circuit_window: int = Field(
+        default=int(os.getenv("BEDROCK_CIRCUIT_WINDOW", "20")),
+        description="サーキット判定に用いる直近の呼び出し件数"
+    )
+    bedrock_circuit_min_calls: int = Field(
+        default=int(os.getenv("BEDROCK_CIRCUIT_MIN_CALLS", "5")),
+        description="サーキット判定に必要な最小呼び出し件数"
+    )
+    bedrock_circuit_open_seconds: float = Field(
+        default=float(os.getenv("BEDROCK_CIRCUIT_OPEN_SECONDS", "30")),
+        description="サーキットを開いてから試験呼び出しを許可するまでの時間（秒）"
+    )
+    bedrock_requests_per_minute: int = Field(
+        default=int(os.getenv("BEDROCK_REQUESTS_PER_MINUTE", "0")),
+        description="モデルごとのリクエスト数/分の上限（0以下で無効）"
+    )
+    bedrock_tokens_per_minute: int = Field(
+        default=int(os.getenv("BEDROCK_TOKENS_PER_MINUTE", "0")),
+        description="モデルごとの推定トークン数/分の上限（0以下で無効）"
+    )
+    bedrock_rate_limit_max_wait: float = Field(
+        default=float(os.getenv("BEDROCK_RATE_LIMIT_MAX_WAIT", "10")),
+        description="レート制限の最大待機時間（秒）"
+    )
+    bedrock_hedging_enabled: bool = Field(
+        default=os.getenv("BEDROCK_HEDGING_ENABLED", "false").lower() == "true",
+        description="遅い呼び出しに同一リクエストを追加送信するか（ヘッジ）"
+    )
+    bedrock_hedging_percentile: float = Field(
+        default=float(os.getenv("BEDROCK_HEDGING_PERCENTILE", "95")),
+        description="ヘッジを送信する基準となる成功レイテンシのパーセンタイル"
+    )
+    bedrock_hedging_min_samples: int = Field(
+        default=int(os.getenv("BEDROCK_HEDGING_MIN_SAMPLES", "20")),
+        description="ヘッジの判定に必要な成功レイテンシのサンプル数"
+    )
+    bedrock_warmup_connections: int = Field(
+        default=int(os.getenv("BEDROCK_WARMUP_CONNECTIONS", "2")),
+        description="起動時に確立するキープアライブ接続数（接続プールの上限はBEDROCK_MAX_CONCURRENCY）"
+    )
+    bedrock_warmup_probe: bool = Field(
+        default=os.getenv("BEDROCK_WARMUP_PROBE", "false").lower() == "true",
+        description="起動時に最小トークン数の試験呼び出しを行うか"
+    )
+    bedrock_keepalive_interval: float = Field(
+        default=float(os.getenv("BEDROCK_KEEPALIVE_INTERVAL", "240")),
+        description="アイドル時に接続を張り直す間隔（秒、0以下で無効）"
+    )
+    bedrock_prompt_caching: bool = Field(
+        default=os.getenv("BEDROCK_PROMPT_CACHING", "false").lower() == "true",
+        description="Converse APIで静的なシステムプロンプトをプロンプトキャッシュするか（対応モデルのみ）"
+    )
+    bedrock_structured_output: bool = Field(
+        default=os.getenv("BEDROCK_STRUCTURED_OUTPUT", "true").lower() == "true",
+        description="対応モデルでツール使用による構造化出力を使うか（非対応モデルはJSONのテキスト出力）"
+    )
+    bedrock_embedding_model_id: str = Field(
+        default=os.getenv("BEDROCK_EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v1"),
+        description="埋め込み生成に使用するBedrockモデルID（Titan Embeddings形式）"
+    )
+    embedding_max_concurrency: int = Field(
+        default=int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4")),
+        description="バッチ埋め込み生成の同時呼び出し数の上限"
+    )
+    embedding_cache_path: str = Field(
+        default=os.getenv("EMBEDDING_CACHE_PATH", ""),
+        description="埋め込みキャッシュのファイルパス（空の場合はメモリのみ）"
+    )
     
 
     
@@ -97,6 +197,74 @@ class Config(BaseModel):
         default=int(os.getenv("CACHE_TTL", "600")),
         description="キャッシュTTL（秒）"
     )
+    recommendation_cache_size: int = Field(
+        default=int(os.getenv("RECOMMENDATION_CACHE_SIZE", "1000")),
+        description="推薦結果キャッシュのエントリー数の上限（0以下で無効）"
+    )
+    recommendation_pipeline: str = Field(
+        default=os.getenv("RECOMMENDATION_PIPELINE", "two_call"),
+        description="推薦パイプライン（two_call: 味の好み分析と推薦を別々に呼び出す / fused: 1回の呼び出しで行う）"
+    )
+    recommendation_min_items: int = Field(
+        default=int(os.getenv("RECOMMENDATION_MIN_ITEMS", "3")),
+        description="出力が途中で切れた・不正な項目を除いた場合に、不足分を追加で依頼する推薦件数の下限（best_recommendを含む、0以下で無効）"
+    )
+    menu_constraint_enforced: bool = Field(
+        default=os.getenv("MENU_CONSTRAINT_ENFORCED", "true").lower() == "true",
+        description="メニュー指定時に推薦の銘柄名をメニューの表記に合わせ、メニューにない銘柄を除外するか"
+    )
+    menu_shortlist_size: int = Field(
+        default=int(os.getenv("MENU_SHORTLIST_SIZE", "80")),
+        description="推薦に使うメニューの銘柄数の上限（飲酒履歴と照らした上位の銘柄、0以下で絞り込まない。MENU_CHUNK_SIZEより多い場合は分割して推薦する）"
+    )
+    menu_chunk_size: int = Field(
+        default=int(os.getenv("MENU_CHUNK_SIZE", "40")),
+        description="候補の銘柄がこの件数より多い場合に分割して並列に推薦する1チャンクあたりの件数（0以下で分割しない）"
+    )
+    menu_chunk_concurrency: int = Field(
+        default=int(os.getenv("MENU_CHUNK_CONCURRENCY", "4")),
+        description="分割した推薦の同時呼び出し数の上限"
+    )
+    brand_catalog_enabled: bool = Field(
+        default=os.getenv("BRAND_CATALOG_ENABLED", "true").lower() == "true",
+        description="メニューがない場合に、同梱の銘柄カタログから好きな記録に近い銘柄を候補としてプロンプトに載せるか"
+    )
+    brand_catalog_top_n: int = Field(
+        default=int(os.getenv("BRAND_CATALOG_TOP_N", "20")),
+        description="銘柄カタログから検索する候補の銘柄数（0以下で検索しない）"
+    )
+    brand_knowledge_enabled: bool = Field(
+        default=os.getenv("BRAND_KNOWLEDGE_ENABLED", "true").lower() == "true",
+        description="推薦の銘柄の説明を同梱の知識ベースから補完し、候補がすべて既知の場合は説明の生成を省くか"
+    )
+    taste_profile_cache_size: int = Field(
+        default=int(os.getenv("TASTE_PROFILE_CACHE_SIZE", "1000")),
+        description="味の好み分析結果をキャッシュするユーザー数の上限（0以下で無効）"
+    )
+    taste_profile_cache_ttl: int = Field(
+        default=int(os.getenv("TASTE_PROFILE_CACHE_TTL", "86400")),
+        description="味の好み分析結果のキャッシュTTL（秒、0以下で無期限）"
+    )
+    taste_profile_incremental_max_records: int = Field(
+        default=int(os.getenv("TASTE_PROFILE_INCREMENTAL_MAX_RECORDS", "5")),
+        description="差分更新で済ませる追加記録数の上限（超える場合は再分析）"
+    )
+    recommendation_prompt_token_budget: int = Field(
+        default=int(os.getenv("RECOMMENDATION_PROMPT_TOKEN_BUDGET", "6000")),
+        description="推薦生成プロンプトの入力トークン予算（0以下で無制限）"
+    )
+    taste_analysis_prompt_token_budget: int = Field(
+        default=int(os.getenv("TASTE_ANALYSIS_PROMPT_TOKEN_BUDGET", "4000")),
+        description="味の好み分析プロンプトの入力トークン予算（0以下で無制限）"
+    )
+    history_compaction_enabled: bool = Field(
+        default=os.getenv("HISTORY_COMPACTION_ENABLED", "true").lower() == "true",
+        description="味の好み分析プロンプトで同じ銘柄の記録を1件に集約するか"
+    )
+    impression_key_phrase_max_chars: int = Field(
+        default=int(os.getenv("IMPRESSION_KEY_PHRASE_MAX_CHARS", "150")),
+        description="集約時に感想から味に関する文節を抜き出す文字数の上限（0以下で抜き出さない）"
+    )
     
     @property
     def is_development(self) -> bool:
@@ -0,0 +1,118 @@
+"""埋め込みベクトルのコンテンツアドレス型キャッシュ
+
+（モデルID, テキスト）のSHA-256ダイジェストをキーに、埋め込みベクトルを
+float32の配列として保持する。パスを指定した場合はディスクにも追記保存し、
+次回起動時に読み込む。
+
+ディスク上の形式（1レコードごとに連続して追記）:
+    ダイジェスト（32バイト） + 次元数（uint32, リトルエンディアン） + float32 × 次元数
+"""
+
+import hashlib
+import os
+import struct
+import sys
+import threading
+from array import array
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+_DIGEST_SIZE = 32
+_HEADER = struct.Struct("<I")
+
+
+def content_key(model_id: str, text: str) -> bytes:
+    """キャッシュキー（コンテンツハッシュ）を計算
+
+    Args:
+        model_id: 埋め込みモデルID
+        text: 埋め込み対象のテキスト
+
+    Returns:
+        bytes: SHA-256ダイジェスト
+    """
+    return hashlib.sha256(f"{model_id}\0{text}".encode()).digest()
+
+
+class EmbeddingCache:
+    """メモリ + ディスク（任意）の埋め込みキャッシュ"""
+
+    def __init__(self, path: str | None = None):
+        self.path = path or None
+        self._vectors: dict[bytes, array] = {}
+        self._lock = threading.Lock()
+        if self.path:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def get(self, key: bytes) -> list[float] | None:
+        """キャッシュからベクトルを取得
+
+        Args:
+            key: content_key()で計算したキー
+
+        Returns:
+            list[float] | None: ベクトル（未登録の場合はNone）
+        """
+        vector = self._vectors.get(key)
+        return vector.tolist() if vector is not None else None
+
+    def put(self, key: bytes, vector: list[float]) -> None:
+        """ベクトルを登録（ディスクキャッシュが有効な場合は追記保存）
+
+        Args:
+            key: content_key()で計算したキー
+            vector: 埋め込みベクトル
+        """
+        packed = array("f", vector)
+        with self._lock:
+            if key in self._vectors:
+                return
+            self._vectors[key] = packed
+            if self.path:
+                self._append(key, packed)
+
+    def _append(self, key: bytes, vector: array) -> None:
+        """1レコードをディスクへ追記"""
+        data = vector
+        if sys.byteorder != "little":
+            data = array("f", vector)
+            data.byteswap()
+        try:
+            with open(self.path, "ab") as f:
+                f.write(key + _HEADER.pack(len(vector)) + data.tobytes())
+        except OSError as e:
+            logger.warning("埋め込みキャッシュの保存に失敗", path=self.path, error=str(e))
+
+    def _load(self) -> None:
+        """ディスクキャッシュを読み込む（末尾の不完全なレコードは無視）"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            logger.warning("埋め込みキャッシュの読み込みに失敗", path=self.path, error=str(e))
+            return
+
+        offset = 0
+        record_header = _DIGEST_SIZE + _HEADER.size
+        while offset + record_header <= len(data):
+            key = data[offset:offset + _DIGEST_SIZE]
+            (dimension,) = _HEADER.unpack_from(data, offset + _DIGEST_SIZE)
+            start = offset + record_header
+            end = start + dimension * 4
+            if end > len(data):
+                break
+            vector = array("f")
+            vector.frombytes(data[start:end])
+            if sys.byteorder != "little":
+                vector.byteswap()
+            self._vectors[key] = vector
+            offset = end
+
+        logger.info("埋め込みキャッシュを読み込み", path=self.path, entries=len(self._vectors))
@@ -0,0 +1,137 @@
+"""LLM出力からのJSONの抽出と修復
+
+LLMの出力には、JSONの前後の説明文やコードブロック、`//` コメント、末尾のカンマなど
+`json.loads` がそのまま受け付けない要素が含まれることがある。
+最も外側のJSONオブジェクトを1回の走査で取り出し、これらを取り除いてからパースする。
+適用した修復は結果に記録する。
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any
+
+# 修復の種類
+REPAIR_CODE_FENCE = "code_fence"  # ```json ... ``` のコードブロック
+REPAIR_LEADING_TEXT = "leading_text"  # オブジェクトより前の文章
+REPAIR_TRAILING_TEXT = "trailing_text"  # オブジェクトより後の文章
+REPAIR_COMMENTS = "comments"  # // および /* */ コメント
+REPAIR_TRAILING_COMMAS = "trailing_commas"  # } や ] の直前のカンマ
+REPAIR_CONTROL_CHARACTERS = "control_characters"  # 文字列内の改行などの制御文字
+
+# 文字列リテラル・コメント・構造文字を1回の走査で取り出す
+# （閉じていない文字列は単独の " として現れる）
+_TOKEN_PATTERN = re.compile(
+    r'"[^"\\]*(?:\\.[^"\\]*)*"|//[^\n]*|/\*.*?(?:\*/|\Z)|[{}\[\],"]',
+    re.DOTALL,
+)
+
+_FENCE_PATTERN = re.compile(r"```[\w-]*")
+
+
+@dataclass
+class ExtractedJson:
+    """抽出したJSONと適用した修復"""
+
+    value: Any
+    repairs: tuple[str, ...] = ()
+
+
+def extract_json(text: str) -> ExtractedJson:
+    """テキストから最も外側のJSONオブジェクトを取り出してパース
+
+    Args:
+        text: LLMの出力
+
+    Returns:
+        ExtractedJson: パース結果と適用した修復（修復なしの場合は空）
+
+    Raises:
+        json.JSONDecodeError: オブジェクトが見つからない、閉じていない、または修復しても不正な場合
+    """
+    start = text.find("{")
+    if start == -1:
+        raise json.JSONDecodeError("JSONオブジェクトが見つかりません", text, 0)
+
+    repairs: list[str] = []
+    _note_surrounding(text[:start], REPAIR_LEADING_TEXT, repairs)
+
+    # 前後の文章やコードブロックを除けばそのままパースできる場合が大半のため、先に試す
+    last = text.rfind("}")
+    try:
+        value = json.loads(text[start : last + 1])
+    except json.JSONDecodeError:
+        pass
+    else:
+        _note_surrounding(text[last + 1 :], REPAIR_TRAILING_TEXT, repairs)
+        return ExtractedJson(value, tuple(repairs))
+
+    parts: list[str] = []
+    depth = 0
+    pos = start
+    end = -1
+    pending_comma = False
+    for match in _TOKEN_PATTERN.finditer(text, start):
+        token = match.group()
+        gap = text[pos : match.start()]
+        pos = match.end()
+
+        if pending_comma:
+            if gap.strip():
+                parts.append(",")
+                pending_comma = False
+            elif token in "}]":
+                _add(repairs, REPAIR_TRAILING_COMMAS)
+                pending_comma = False
+            elif token == ",":
+                # 連続したカンマは1つにまとめる
+                _add(repairs, REPAIR_TRAILING_COMMAS)
+                continue
+            elif not token.startswith("/"):
+                parts.append(",")
+                pending_comma = False
+        parts.append(gap)
+
+        if token.startswith("/"):
+            # コメントは読み飛ばす（カンマの保留は続ける）
+            _add(repairs, REPAIR_COMMENTS)
+        elif token == ",":
+            pending_comma = True
+        elif token == '"':
+            raise json.JSONDecodeError("文字列が閉じていません", text, match.start())
+        else:
+            parts.append(token)
+            if token in "{[":
+                depth += 1
+            elif token in "}]":
+                depth -= 1
+                if depth == 0:
+                    end = pos
+                    break
+
+    if end == -1:
+        raise json.JSONDecodeError("JSONオブジェクトが閉じていません", text, len(text))
+
+    _note_surrounding(text[end:], REPAIR_TRAILING_TEXT, repairs)
+
+    source = "".join(parts)
+    try:
+        value = json.loads(source)
+    except json.JSONDecodeError:
+        value = json.loads(source, strict=False)
+        _add(repairs, REPAIR_CONTROL_CHARACTERS)
+    return ExtractedJson(value, tuple(repairs))
+
+
+def _note_surrounding(fragment: str, repair: str, repairs: list[str]) -> None:
+    """オブジェクトの前後の文字列から、コードブロックと文章の修復を記録"""
+    if "```" in fragment:
+        _add(repairs, REPAIR_CODE_FENCE)
+        fragment = _FENCE_PATTERN.sub("", fragment)
+    if fragment.strip():
+        _add(repairs, repair)
+
+
+def _add(repairs: list[str], repair: str) -> None:
+    if repair not in repairs:
+        repairs.append(repair)
@@ -0,0 +1,160 @@
+"""ストリーミングJSONの逐次パース
+
+LLMのストリーミング出力を少しずつ受け取り、ルートオブジェクト直下の
+オブジェクト値、およびルート直下の配列要素のオブジェクトが閉じた時点で
+それぞれを取り出す。取り出したオブジェクトは、全文のパースと同じ修復
+（extract_json。コメント・末尾のカンマなど）を通してパースする。
+"""
+
+import json
+from typing import Any
+
+import structlog
+
+from .json_repair import extract_json
+
+logger = structlog.get_logger(__name__)
+
+
+class IncrementalJsonParser:
+    """ルート直下のオブジェクトを完成した順に取り出す逐次JSONパーサー
+
+    例えば以下の出力に対して、`feed`を繰り返し呼ぶと
+    `("best_recommend", {...})`、`("recommendations", {...})` ... の順に返す。
+
+        {"best_recommend": {...}, "recommendations": [{...}, {...}]}
+
+    ルートオブジェクトより前の文字（コードブロックや前置きの文章）は無視し、
+    文字列の外にある `//` および `/* */` コメントは読み飛ばす。
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: str | None = None
+        self._root_key: str | None = None
+        self._capture_start: int | None = None
+        self._capture_depth = 0
+        self.finished = False
+
+    @property
+    def text(self) -> str:
+        """これまでに受け取った全テキスト"""
+        return self._buffer
+
+    def feed(self, chunk: str) -> list[tuple[str, dict[str, Any]]]:
+        """テキスト断片を追加し、新たに完成したオブジェクトを返す
+
+        Args:
+            chunk: 追加するテキスト断片
+
+        Returns:
+            list[tuple[str, dict[str, Any]]]: (ルートのキー, オブジェクト) のリスト
+        """
+        self._buffer += chunk
+        completed: list[tuple[str, dict[str, Any]]] = []
+        buffer = self._buffer
+        i = self._pos
+
+        while i < len(buffer) and not self.finished:
+            c = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_string = self._decode_string(
+                            buffer[self._string_start : i + 1]
+                        )
+                i += 1
+                continue
+
+            # ルートオブジェクト開始前は "{" 以外を無視する
+            if not self._stack:
+                if c == "{":
+                    self._stack.append(c)
+                i += 1
+                continue
+
+            if c == "/":
+                # コメント判定には次の文字が必要
+                if i + 1 >= len(buffer):
+                    break
+                nxt = buffer[i + 1]
+                if nxt == "/":
+                    end = buffer.find("\n", i + 2)
+                    if end == -1:
+                        break
+                    i = end + 1
+                    continue
+                if nxt == "*":
+                    end = buffer.find("*/", i + 2)
+                    if end == -1:
+                        break
+                    i = end + 2
+                    continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == ":" and len(self._stack) == 1:
+                self._root_key = self._last_string
+            elif c in "{[":
+                self._stack.append(c)
+                if c == "{" and self._capture_start is None and self._is_capture_level():
+                    self._capture_start = i
+                    self._capture_depth = len(self._stack)
+            elif c in "}]":
+                depth = len(self._stack)
+                self._stack.pop()
+                if (
+                    c == "}"
+                    and self._capture_start is not None
+                    and depth == self._capture_depth
+                ):
+                    obj = self._load_object(buffer[self._capture_start : i + 1])
+                    if obj is not None and self._root_key is not None:
+                        completed.append((self._root_key, obj))
+                    self._capture_start = None
+                if not self._stack:
+                    self.finished = True
+            i += 1
+
+        self._pos = i
+        return completed
+
+    def _is_capture_level(self) -> bool:
+        """現在のオブジェクトが取り出し対象の階層にあるかを判定"""
+        depth = len(self._stack)
+        # ルート直下のオブジェクト値
+        if depth == 2:
+            return True
+        # ルート直下の配列の要素
+        return depth == 3 and self._stack[1] == "["
+
+    @staticmethod
+    def _decode_string(literal: str) -> str | None:
+        try:
+            return json.loads(literal)
+        except json.JSONDecodeError:
+            return None
+
+    @staticmethod
+    def _load_object(fragment: str) -> dict[str, Any] | None:
+        try:
+            extracted = extract_json(fragment)
+        except json.JSONDecodeError as e:
+            logger.warning("ストリーミングJSONの断片のパースに失敗", error=str(e))
+            return None
+        if extracted.repairs:
+            logger.info("ストリーミングJSONの断片を修復", repairs=list(extracted.repairs))
+        obj = extracted.value
+        return obj if isinstance(obj, dict) else None
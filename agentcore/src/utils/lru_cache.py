@@ -0,0 +1,119 @@
+"""サイズ上限とTTL付きのLRUキャッシュ
+
+エントリーにユーザーIDを関連付けておくことで、ユーザー単位で一括破棄できる。
+ヒット・ミス・破棄（上限超過による追い出し）の件数を記録する。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+
+class LRUTTLCache:
+    """LRU + TTLキャッシュ
+
+    - `max_entries`を超えると最も長く参照されていないエントリーを追い出す
+    - `ttl`秒を超えたエントリーは参照時に破棄する（0以下の場合はキャッシュしない）
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        # キー → (値, 有効期限, ユーザーID)
+        self._entries: OrderedDict[Hashable, tuple[Any, float, str | None]] = OrderedDict()
+        self._user_keys: dict[str, set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        """キャッシュが有効か"""
+        return self.max_entries > 0 and self.ttl > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        """値を取得（未登録・期限切れの場合はNone）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, _ = entry
+            if self._clock() >= expires_at:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, user_id: str | None = None) -> None:
+        """値を登録
+
+        Args:
+            key: キー
+            value: 値
+            user_id: ユーザー単位で破棄するためのユーザーID（任意）
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, self._clock() + self.ttl, user_id)
+            if user_id is not None:
+                self._user_keys.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: str) -> int:
+        """ユーザーに関連付けられたエントリーをすべて破棄
+
+        Returns:
+            int: 破棄したエントリー数
+        """
+        with self._lock:
+            keys = self._user_keys.pop(user_id, set())
+            for key in keys:
+                self._entries.pop(key, None)
+            return len(keys)
+
+    def clear(self) -> None:
+        """すべてのエントリーを破棄（カウンターは維持）"""
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+
+    def stats(self) -> dict[str, int]:
+        """ヒット・ミス・追い出しの件数と現在のエントリー数"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        """エントリーを削除（ロック取得済みの状態で呼び出す）"""
+        _, _, user_id = self._entries.pop(key)
+        if user_id is not None:
+            keys = self._user_keys.get(user_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._user_keys[user_id]
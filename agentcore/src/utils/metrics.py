@@ -0,0 +1,176 @@
+"""Bedrock呼び出しのメトリクス
+
+試行ごとのレイテンシと結果をモデルIDごとに集計する。
+直近の一定件数のレイテンシのみを保持し、パーセンタイルを算出する。
+"""
+
+import threading
+from collections import Counter, deque
+from typing import Any
+
+
+class LatencyWindow:
+    """直近N件のレイテンシを保持し、パーセンタイルを計算する"""
+
+    def __init__(self, size: int = 500):
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, latency: float) -> None:
+        """レイテンシを追加"""
+        self._samples.append(latency)
+
+    def percentile(self, q: float) -> float | None:
+        """パーセンタイルを計算（最近傍法）
+
+        Args:
+            q: パーセンタイル（0-100）
+
+        Returns:
+            float | None: レイテンシ（秒）。サンプルがない場合はNone
+        """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class BedrockMetrics:
+    """Bedrock呼び出しの試行単位のメトリクス"""
+
+    def __init__(self, window_size: int = 500):
+        self._window_size = window_size
+        self._lock = threading.Lock()
+        self._latencies: dict[str, LatencyWindow] = {}
+        self._success_latencies: dict[str, LatencyWindow] = {}
+        self._outcomes: dict[str, Counter] = {}
+        self._usage: dict[str, Counter] = {}
+        self._parses: dict[str, Counter] = {}
+
+    def record_attempt(
+        self, model_id: str, attempt: int, latency: float, outcome: str
+    ) -> None:
+        """試行結果を記録
+
+        Args:
+            model_id: モデルID
+            attempt: 試行回数（1始まり）
+            latency: 試行にかかった時間（秒）
+            outcome: 結果（"success" またはエラー分類）
+        """
+        with self._lock:
+            window = self._latencies.setdefault(
+                model_id, LatencyWindow(self._window_size)
+            )
+            window.add(latency)
+            if outcome == "success":
+                self._success_latencies.setdefault(
+                    model_id, LatencyWindow(self._window_size)
+                ).add(latency)
+            outcomes = self._outcomes.setdefault(model_id, Counter())
+            outcomes[outcome] += 1
+            if attempt > 1:
+                outcomes["retry"] += 1
+
+    def record_hedge(self, model_id: str, won: bool) -> None:
+        """ヘッジリクエストの送信を記録
+
+        Args:
+            model_id: モデルID
+            won: ヘッジリクエストが先に応答した場合True
+        """
+        with self._lock:
+            outcomes = self._outcomes.setdefault(model_id, Counter())
+            outcomes["hedge"] += 1
+            if won:
+                outcomes["hedge_win"] += 1
+
+    def record_usage(self, model_id: str, usage: dict[str, int]) -> None:
+        """トークン使用量を記録
+
+        Args:
+            model_id: モデルID
+            usage: Converse APIのusage（inputTokens, outputTokens,
+                cacheReadInputTokens, cacheWriteInputTokens）
+        """
+        with self._lock:
+            totals = self._usage.setdefault(model_id, Counter())
+            for key in (
+                "inputTokens",
+                "outputTokens",
+                "cacheReadInputTokens",
+                "cacheWriteInputTokens",
+            ):
+                totals[key] += usage.get(key, 0) or 0
+
+    def record_parse(self, model_id: str, structured: bool, ok: bool) -> None:
+        """生成結果のパース結果を記録
+
+        Args:
+            model_id: 応答したモデルID
+            structured: ツール使用による構造化出力の場合True
+            ok: パースに成功した場合True
+        """
+        mode = "structured" if structured else "text"
+        with self._lock:
+            parses = self._parses.setdefault(model_id, Counter())
+            parses[mode] += 1
+            if not ok:
+                parses[f"{mode}_failed"] += 1
+
+    def success_latency_percentile(
+        self, model_id: str, q: float, min_samples: int = 1
+    ) -> float | None:
+        """成功した試行のレイテンシのパーセンタイルを取得
+
+        Args:
+            model_id: モデルID
+            q: パーセンタイル（0-100）
+            min_samples: 必要な最小サンプル数
+
+        Returns:
+            float | None: レイテンシ（秒）。サンプルが不足している場合はNone
+        """
+        with self._lock:
+            window = self._success_latencies.get(model_id)
+            if window is None or len(window) < min_samples:
+                return None
+            return window.percentile(q)
+
+    def snapshot(self) -> dict[str, Any]:
+        """モデルIDごとの集計結果を取得
+
+        Returns:
+            dict[str, Any]: モデルIDをキーとした集計結果
+        """
+        with self._lock:
+            result = {}
+            for model_id, window in self._latencies.items():
+                outcomes = dict(self._outcomes.get(model_id, {}))
+                hedges = outcomes.pop("hedge", 0)
+                hedge_wins = outcomes.pop("hedge_win", 0)
+                result[model_id] = {
+                    "attempts": sum(v for k, v in outcomes.items() if k != "retry"),
+                    "outcomes": outcomes,
+                    "latency_p50": window.percentile(50),
+                    "latency_p95": window.percentile(95),
+                    "latency_p99": window.percentile(99),
+                    "hedges": hedges,
+                    "hedge_win_rate": hedge_wins / hedges if hedges else None,
+                    "usage": dict(self._usage.get(model_id, {})),
+                    **self._parse_summary(model_id),
+                }
+            return result
+
+    def _parse_summary(self, model_id: str) -> dict[str, Any]:
+        """パース件数と失敗率（ロック取得済みの状態で呼び出す）"""
+        parses = dict(self._parses.get(model_id, {}))
+        total = parses.get("structured", 0) + parses.get("text", 0)
+        failed = parses.get("structured_failed", 0) + parses.get("text_failed", 0)
+        return {
+            "parses": parses,
+            "parse_failure_rate": failed / total if total else None,
+        }
@@ -0,0 +1,105 @@
+"""トークン予算に収まるプロンプトの組み立て
+
+飲酒記録の感想は1件あたり最大1000文字あるため、記録をそのまま並べると
+プロンプトが際限なく大きくなる。記録の行を予算内に収まるよう、
+決定的な手順で切り詰め・除外する。
+
+1. 全記録の感想を段階的な上限（IMPRESSION_LIMITS）で切り詰め、収まる最も緩い上限を採用する
+2. 感想をすべて省いても収まらない場合は、優先度の低い（古い）記録から除外する
+"""
+
+from dataclasses import dataclass
+
+from .tokens import estimate_tokens
+
+# 感想の文字数上限（Noneは切り詰めなし）。先頭から順に試す
+IMPRESSION_LIMITS: tuple[int | None, ...] = (None, 300, 120, 40, 0)
+
+_ELLIPSIS = "…"
+
+
+@dataclass
+class FittedLines:
+    """予算内に収めた記録の行"""
+
+    lines: list[str | None]  # 入力と同じ順序（除外した記録はNone）
+    tokens: int  # 採用した行の推定トークン数
+    truncated: int  # 感想を切り詰めた記録の件数
+    dropped: int  # 除外した記録の件数
+
+
+def truncate_text(text: str, limit: int | None) -> str:
+    """テキストを上限文字数に切り詰める（切り詰めた場合は末尾に…を付ける）
+
+    Args:
+        text: 対象テキスト
+        limit: 上限文字数（Noneの場合は切り詰めない）
+
+    Returns:
+        str: 切り詰め後のテキスト
+    """
+    if limit is None or len(text) <= limit:
+        return text
+    if limit <= 0:
+        return ""
+    return text[: limit - 1] + _ELLIPSIS
+
+
+def fit_lines(
+    entries: list[tuple[str, str]], budget: int, separator: str = ": "
+) -> FittedLines:
+    """記録の行をトークン予算内に収める
+
+    各行は「見出し + separator + 本文」の形式で、本文（感想）が切り詰めの対象になる。
+    入力の後ろにある記録ほど優先度が高い（新しい記録）ものとして扱う。
+
+    Args:
+        entries: (見出し, 本文) のリスト（古い順）
+        budget: 行全体に使えるトークン数（0以下の場合は無制限）
+        separator: 見出しと本文の区切り
+
+    Returns:
+        FittedLines: 予算内に収めた行
+    """
+
+    def format_line(head: str, text: str) -> str:
+        return f"{head}{separator}{text}\n" if text else f"{head}\n"
+
+    if budget <= 0:
+        lines = [format_line(head, text) for head, text in entries]
+        return FittedLines(lines, sum(map(estimate_tokens, lines)), 0, 0)
+
+    # 予算を超えた時点で打ち切るため、各段階の走査は予算に収まる行数で止まる
+    for limit in IMPRESSION_LIMITS:
+        lines = []
+        tokens = 0
+        for head, text in entries:
+            line = format_line(head, truncate_text(text, limit))
+            tokens += estimate_tokens(line)
+            if tokens > budget:
+                break
+            lines.append(line)
+        else:
+            truncated = sum(
+                1 for _, text in entries if truncate_text(text, limit) != text
+            )
+            return FittedLines(lines, tokens, truncated, 0)
+
+    # 感想を省いても収まらない場合は新しい記録から順に採用
+    limit = IMPRESSION_LIMITS[-1]
+    fitted: list[str | None] = [None] * len(entries)
+    tokens = 0
+    truncated = 0
+    for index in range(len(entries) - 1, -1, -1):
+        head, text = entries[index]
+        line = format_line(head, truncate_text(text, limit))
+        cost = estimate_tokens(line)
+        if tokens + cost > budget:
+            break
+        fitted[index] = line
+        tokens += cost
+        if truncate_text(text, limit) != text:
+            truncated += 1
+
+    kept = sum(1 for line in fitted if line is not None)
+    return FittedLines(fitted, tokens, truncated, len(entries) - kept)
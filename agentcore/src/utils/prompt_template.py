@@ -0,0 +1,60 @@
+"""事前コンパイル済みのプロンプトテンプレート
+
+テンプレートはインポート時に静的セグメントと動的スロット（`{name}`）に分割しておき、
+組み立て時は値を埋めて1回のjoinで連結する。
+システムプロンプトとテンプレート本文から計算したバージョンハッシュを持ち、
+キャッシュキーやログに使用する。
+"""
+
+import hashlib
+from string import Formatter
+
+from .tokens import estimate_tokens
+
+
+class PromptTemplate:
+    """静的セグメントと動的スロットに分割済みのテンプレート
+
+    Attributes:
+        name: テンプレート名
+        system_prompt: 組み合わせて送信する静的なシステムプロンプト
+        version: システムプロンプトとテンプレート本文のハッシュ（先頭12文字）
+        static_tokens: システムプロンプトと静的セグメントの推定トークン数
+    """
+
+    def __init__(self, name: str, system_prompt: str, source: str):
+        self.name = name
+        self.system_prompt = system_prompt
+        self._segments: list[str] = []
+        self._slots: list[str | None] = []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if spec or conversion:
+                raise ValueError(f"書式指定はサポートしていません: {field}")
+            self._segments.append(literal)
+            self._slots.append(field)
+        self.slots = frozenset(slot for slot in self._slots if slot is not None)
+        self.version = hashlib.sha256(
+            f"{system_prompt}\0{source}".encode()
+        ).hexdigest()[:12]
+        self.static_tokens = estimate_tokens(system_prompt) + sum(
+            estimate_tokens(segment) for segment in self._segments
+        )
+
+    def render(self, **values: str) -> str:
+        """スロットに値を埋めてプロンプトを組み立てる
+
+        Args:
+            **values: スロット名と値
+
+        Returns:
+            str: 組み立てたプロンプト
+
+        Raises:
+            KeyError: 値が指定されていないスロットがある場合
+        """
+        parts: list[str] = []
+        for segment, slot in zip(self._segments, self._slots, strict=True):
+            parts.append(segment)
+            if slot is not None:
+                parts.append(values[slot])
+        return "".join(parts)
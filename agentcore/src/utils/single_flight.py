@@ -0,0 +1,55 @@
+"""同一キーの同時実行をまとめるシングルフライト
+
+同じキーの処理が実行中であれば、新たに実行せずに実行中の処理の結果を待つ。
+共有される処理はasyncio.shieldで保護するため、待機側（最初の呼び出し元を含む）が
+キャンセルされても共有の処理はキャンセルされない。
+"""
+
+import asyncio
+import copy
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+class SingleFlight:
+    """キー単位のシングルフライト"""
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """キーの処理を実行、または実行中の処理の結果を待つ
+
+        Args:
+            key: 同一性を判定するキー
+            fn: 処理（実行中の処理がない場合のみ呼び出される）
+
+        Returns:
+            Any: 処理結果（後から合流した呼び出し元にはコピーを返す）
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.info("実行中の同一リクエストに合流", coalesced_total=self.coalesced)
+            return copy.deepcopy(await asyncio.shield(task))
+
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        """完了した処理を登録から外す"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 待機側がすべてキャンセルされた場合でも例外を回収しておく
+        if not task.cancelled():
+            task.exception()
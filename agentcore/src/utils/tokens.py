@@ -0,0 +1,21 @@
+"""トークン数の推定
+
+Bedrockのトークナイザーを呼び出さずに、文字種から入力トークン数を概算する。
+日本語（かな・漢字）は1文字あたり約1トークン、英数字は約4文字で1トークンとして数える。
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """テキストのトークン数を概算
+
+    Args:
+        text: 対象テキスト
+
+    Returns:
+        int: 推定トークン数
+    """
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ch < "\u0080")
+    other_chars = len(text) - ascii_chars
+    return other_chars + (ascii_chars + 3) // 4
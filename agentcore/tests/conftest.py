@@ -0,0 +1,17 @@
+"""テスト共通のフィクスチャ"""
+
+import sys
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_recommendation_caches():
+    """グローバルな推薦サービスのキャッシュがテスト間で共有されないようにする"""
+    agent = sys.modules.get("src.agent")
+    if agent is not None:
+        agent.recommendation_service.clear_caches()
+    yield
+    agent = sys.modules.get("src.agent")
+    if agent is not None:
+        agent.recommendation_service.clear_caches()
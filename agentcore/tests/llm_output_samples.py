@@ -0,0 +1,139 @@
+"""LLM出力のサンプル（JSON抽出のテスト・ベンチマーク用）
+
+推薦・味の好み分析・fusedモードの出力で実際に見られる形式を集めたもの。
+各サンプルは (名前, 出力, 期待する値, 期待する修復) の組。
+"""
+
+import json
+
+from src.utils.json_repair import (
+    REPAIR_CODE_FENCE,
+    REPAIR_COMMENTS,
+    REPAIR_CONTROL_CHARACTERS,
+    REPAIR_LEADING_TEXT,
+    REPAIR_TRAILING_COMMAS,
+    REPAIR_TRAILING_TEXT,
+)
+
+RECOMMENDATION = {
+    "best_recommend": {
+        "brand": "獺祭 純米大吟醸",
+        "brand_description": "山口の華やかな純米大吟醸",
+        "expected_experience": "華やかな香りが口いっぱいに広がります",
+        "match_score": 95,
+    },
+    "recommendations": [
+        {
+            "brand": "十四代 本丸",
+            "brand_description": "山形の芳醇な本醸造",
+            "expected_experience": "甘みと旨味のバランスが絶妙です",
+            "category": "好みに近い",
+            "match_score": 88,
+        },
+        {
+            "brand": "久保田 {千寿}",
+            "brand_description": "新潟の \"淡麗\" 辛口",
+            "expected_experience": "すっきりした後味で爽快な気分に",
+            "category": "新しい挑戦",
+            "match_score": 80,
+        },
+    ],
+}
+
+TASTE_ANALYSIS = {
+    "preferred_tastes": ["フルーティー", "華やか"],
+    "disliked_tastes": ["辛口すぎる"],
+    "analysis_summary": "フルーティーで華やかな香りの日本酒を好む傾向があります。",
+}
+
+FUSED = {"taste_profile": TASTE_ANALYSIS, **RECOMMENDATION}
+
+
+def _dump(value: object) -> str:
+    return json.dumps(value, ensure_ascii=False, indent=2)
+
+
+SAMPLES: list[tuple[str, str, object, tuple[str, ...]]] = [
+    ("clean", _dump(RECOMMENDATION), RECOMMENDATION, ()),
+    (
+        "code_fence",
+        f"```json\n{_dump(RECOMMENDATION)}\n```",
+        RECOMMENDATION,
+        (REPAIR_CODE_FENCE,),
+    ),
+    (
+        "prose_around_fence",
+        "以下が推薦結果です。\n\n```json\n"
+        + _dump(TASTE_ANALYSIS)
+        + "\n```\n\nご参考になれば幸いです。",
+        TASTE_ANALYSIS,
+        (REPAIR_CODE_FENCE, REPAIR_LEADING_TEXT, REPAIR_TRAILING_TEXT),
+    ),
+    (
+        "template_comment",
+        """{
+  "best_recommend": {
+    "brand": "獺祭 純米大吟醸",
+    "brand_description": "山口の華やかな純米大吟醸",
+    "expected_experience": "華やかな香りが口いっぱいに広がります",
+    "match_score": 95
+  },
+  "recommendations": [
+    {
+      "brand": "十四代 本丸",
+      "brand_description": "山形の芳醇な本醸造",
+      "expected_experience": "甘みと旨味のバランスが絶妙です",
+      "category": "好みに近い",
+      "match_score": 88
+    },
+    {
+      "brand": "久保田 {千寿}",
+      "brand_description": "新潟の \\"淡麗\\" 辛口",
+      "expected_experience": "すっきりした後味で爽快な気分に",
+      "category": "新しい挑戦",
+      "match_score": 80
+    },
+    // ... 最大9件まで
+  ]
+}""",
+        RECOMMENDATION,
+        (REPAIR_COMMENTS, REPAIR_TRAILING_COMMAS),
+    ),
+    (
+        "trailing_commas",
+        """{
+  "preferred_tastes": ["フルーティー", "華やか",],
+  "disliked_tastes": ["辛口すぎる"],
+  "analysis_summary": "フルーティーで華やかな香りの日本酒を好む傾向があります。",
+}""",
+        TASTE_ANALYSIS,
+        (REPAIR_TRAILING_COMMAS,),
+    ),
+    (
+        "block_comment",
+        """{
+  /* 味の好み分析 */
+  "preferred_tastes": ["フルーティー", "華やか"], // 好む味
+  "disliked_tastes": ["辛口すぎる"],
+  "analysis_summary": "フルーティーで華やかな香りの日本酒を好む傾向があります。"
+}""",
+        TASTE_ANALYSIS,
+        (REPAIR_COMMENTS,),
+    ),
+    (
+        "raw_newline_in_string",
+        '{"preferred_tastes": ["フルーティー", "華やか"], "disliked_tastes": ["辛口すぎる"], '
+        '"analysis_summary": "フルーティーで華やかな香りの日本酒を\n好む傾向があります。"}',
+        {
+            **TASTE_ANALYSIS,
+            "analysis_summary": "フルーティーで華やかな香りの日本酒を\n好む傾向があります。",
+        },
+        (REPAIR_CONTROL_CHARACTERS,),
+    ),
+    (
+        "fused_with_trailing_text",
+        f"```json\n{_dump(FUSED)}\n```\n上記のJSONは、taste_profileと推薦を含みます。{{注: 例}}",
+        FUSED,
+        (REPAIR_CODE_FENCE, REPAIR_TRAILING_TEXT),
+    ),
+]
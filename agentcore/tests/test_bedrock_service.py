@@ -0,0 +1,464 @@
+"""Bedrockサービスのユニットテスト"""
+
+import asyncio
+import io
+import json
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.services.bedrock_service import BedrockService
+from src.services.rate_limiter import RateLimiter
+
+
+class FakeBedrockRuntime:
+    """一定時間ブロックしてからNova形式のレスポンスを返すスタブ"""
+
+    def __init__(self, latency: float = 0.0, failures: int = 0):
+        self.latency = latency
+        self.failures = failures
+        self.call_count = 0
+        self.list_count = 0
+
+    def invoke_model(self, modelId, body, **kwargs):
+        self.call_count += 1
+        time.sleep(self.latency)
+        if self.call_count <= self.failures:
+            raise RuntimeError("一時的なエラー")
+        payload = {"output": {"message": {"content": [{"text": "応答"}]}}}
+        return {"body": io.BytesIO(json.dumps(payload).encode("utf-8"))}
+
+    def list_async_invokes(self, **kwargs):
+        self.list_count += 1
+        return {"asyncInvokeSummaries": []}
+
+
+class TestBedrockServiceAsyncTransport:
+    """BedrockServiceの非同期トランスポートのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_do_not_block_event_loop(self):
+        """同時呼び出しが直列化されないことを確認"""
+        service = BedrockService()
+        service.bedrock_runtime = FakeBedrockRuntime(latency=0.2)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(service.generate_text("テスト") for _ in range(5))
+        )
+        elapsed = time.perf_counter() - start
+
+        assert results == ["応答"] * 5
+        # 直列なら1.0秒以上かかる
+        assert elapsed < 0.6
+
+    @pytest.mark.asyncio
+    async def test_retry_uses_awaitable_sleep(self):
+        """リトライ待機がasyncio.sleepで行われることを確認"""
+        service = BedrockService()
+        service.bedrock_runtime = FakeBedrockRuntime(failures=1)
+
+        with patch(
+            "src.services.bedrock_service.asyncio.sleep", new_callable=AsyncMock
+        ) as mock_sleep:
+            result = await service.generate_text("テスト")
+
+        assert result == "応答"
+        assert service.bedrock_runtime.call_count == 2
+        mock_sleep.assert_awaited_once()
+        delay = mock_sleep.await_args.args[0]
+        assert 0 <= delay <= service.retry_policy.base_delay
+
+    @pytest.mark.asyncio
+    async def test_generate_text_stream_yields_deltas(self):
+        """レスポンスストリームのテキスト差分が順にyieldされることを確認"""
+
+        class StreamingRuntime:
+            def invoke_model_with_response_stream(self, modelId, body, **kwargs):
+                chunks = [
+                    {"messageStart": {"role": "assistant"}},
+                    {"contentBlockDelta": {"delta": {"text": "日本"}}},
+                    {"contentBlockDelta": {"delta": {"text": "酒"}}},
+                    {"messageStop": {"stopReason": "end_turn"}},
+                ]
+                events = [
+                    {"chunk": {"bytes": json.dumps(c).encode("utf-8")}} for c in chunks
+                ]
+                return {"body": iter(events)}
+
+        service = BedrockService()
+        service.bedrock_runtime = StreamingRuntime()
+
+        with patch.object(
+            BedrockService, "model_id", new="us.amazon.nova-lite-v1:0"
+        ):
+            deltas = [delta async for delta in service.generate_text_stream("テスト")]
+
+        assert deltas == ["日本", "酒"]
+
+
+class TestBedrockServiceHedging:
+    """ヘッジリクエストのテスト"""
+
+    class SlowFirstRuntime:
+        """1回目の呼び出しだけ遅いスタブ"""
+
+        def __init__(self):
+            self.call_count = 0
+
+        def invoke_model(self, modelId, body, **kwargs):
+            self.call_count += 1
+            time.sleep(0.5 if self.call_count == 1 else 0.01)
+            text = f"応答{self.call_count}"
+            payload = {"output": {"message": {"content": [{"text": text}]}}}
+            return {"body": io.BytesIO(json.dumps(payload).encode("utf-8"))}
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        from src.utils.config import get_config
+
+        config = get_config()
+        monkeypatch.setattr(config, "bedrock_hedging_enabled", True)
+        monkeypatch.setattr(config, "bedrock_hedging_min_samples", 5)
+        service = BedrockService()
+        service.bedrock_runtime = self.SlowFirstRuntime()
+        for _ in range(5):
+            service.metrics.record_attempt(service.model_id, 1, 0.05, "success")
+        return service
+
+    @pytest.mark.asyncio
+    async def test_slow_call_is_hedged_and_hedge_wins(self, service):
+        """遅い呼び出しにヘッジが送信され、先に返った応答が採用されることを確認"""
+        start = time.perf_counter()
+        result = await service.generate_text("テスト")
+        elapsed = time.perf_counter() - start
+
+        assert result == "応答2"
+        assert elapsed < 0.4
+        stats = service.metrics.snapshot()[service.model_id]
+        assert stats["hedges"] == 1
+        assert stats["hedge_win_rate"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_without_enough_samples(self, service, monkeypatch):
+        """レイテンシのサンプルが不足している場合はヘッジしないことを確認"""
+        from src.utils.config import get_config
+
+        monkeypatch.setattr(get_config(), "bedrock_hedging_min_samples", 100)
+
+        result = await service.generate_text("テスト")
+
+        assert result == "応答1"
+        assert service.bedrock_runtime.call_count == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("cancel_after", [0.01, 0.2])
+    async def test_cancelled_caller_cancels_pending_calls(self, service, cancel_after):
+        """ヘッジの送信前・送信後に呼び出し元がキャンセルされても、呼び出しを残さないことを確認"""
+        calls: list[asyncio.Future] = []
+
+        def call() -> asyncio.Future:
+            future = asyncio.get_running_loop().create_future()
+            calls.append(future)
+            return future
+
+        task = asyncio.create_task(service._invoke_hedged(service.model_id, call, 10))
+        await asyncio.sleep(cancel_after)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert len(calls) == (1 if cancel_after < 0.05 else 2)
+        assert all(future.cancelled() for future in calls)
+
+
+class TestBedrockServiceWarmUp:
+    """ウォームアップのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_warm_up_resolves_credentials_and_opens_connections(self):
+        """認証情報の解決と、モデルを呼び出さない接続の事前確立が行われることを確認"""
+        from unittest.mock import MagicMock
+
+        from botocore.exceptions import ClientError
+
+        class Runtime(FakeBedrockRuntime):
+            def list_async_invokes(self, **kwargs):
+                super().list_async_invokes(**kwargs)
+                raise ClientError(
+                    {"Error": {"Code": "AccessDeniedException", "Message": "権限なし"}},
+                    "ListAsyncInvokes",
+                )
+
+        service = BedrockService()
+        service.bedrock_runtime = Runtime()
+        service._session = MagicMock()
+
+        timings = await service.warm_up(connections=3, probe=False)
+
+        service._session.get_credentials.return_value.get_frozen_credentials.assert_called_once()
+        assert service.bedrock_runtime.list_count == 3
+        assert service.bedrock_runtime.call_count == 0
+        assert set(timings) == {"credentials", "connections"}
+
+    @pytest.mark.asyncio
+    async def test_warm_up_connections_keep_model_rate_limit(self):
+        """接続の事前確立はモデルのレート制限の枠を使わず、最初の推薦の枠を残すことを確認"""
+        service = BedrockService(
+            rate_limiter=RateLimiter(requests_per_minute=1, tokens_per_minute=1000, max_wait=0)
+        )
+        service.bedrock_runtime = FakeBedrockRuntime()
+
+        await service.warm_up(connections=3, probe=False)
+        result = await service.generate_text("テスト", max_tokens=10)
+
+        assert service.bedrock_runtime.list_count == 3
+        assert result == "応答"
+
+    @pytest.mark.asyncio
+    async def test_warm_up_probe(self):
+        """試験呼び出しが最小トークン数で行われることを確認"""
+        service = BedrockService()
+        service.bedrock_runtime = FakeBedrockRuntime()
+
+        timings = await service.warm_up(connections=0, probe=True)
+
+        assert "probe" in timings
+        assert service.bedrock_runtime.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_warm_up_probe_skipped_without_rate_limit_slot(self):
+        """レート制限の枠がない場合は試験呼び出しを行わないことを確認"""
+        service = BedrockService(
+            rate_limiter=RateLimiter(requests_per_minute=1, tokens_per_minute=1000)
+        )
+        service.bedrock_runtime = FakeBedrockRuntime()
+        await service.rate_limiter.acquire(service.model_id, 0)
+
+        timings = await service.warm_up(connections=0, probe=True)
+
+        assert "probe" in timings
+        assert service.bedrock_runtime.call_count == 0
+
+    @pytest.mark.asyncio
+    async def test_keepalive_rewarms_idle_pool(self):
+        """アイドル時にキープアライブで接続が張り直されることを確認"""
+        service = BedrockService()
+        service.bedrock_runtime = FakeBedrockRuntime()
+        service._last_used = 0.0
+
+        service.start_keepalive(interval=0.05)
+        await asyncio.sleep(0.2)
+        await service.stop_keepalive()
+
+        assert service.bedrock_runtime.list_count >= 1
+        assert service.bedrock_runtime.call_count == 0
+        assert service._keepalive_task is None
+
+
+class TestBedrockServicePromptCaching:
+    """Converse APIによるプロンプトキャッシュのテスト"""
+
+    class ConverseRuntime:
+        """2回目以降はキャッシュから読み込んだusageを返すスタブ"""
+
+        def __init__(self):
+            self.requests = []
+
+        def converse(self, **kwargs):
+            self.requests.append(kwargs)
+            cached = len(self.requests) > 1
+            return {
+                "output": {"message": {"content": [{"text": "応答"}]}},
+                "usage": {
+                    "inputTokens": 10,
+                    "outputTokens": 5,
+                    "cacheReadInputTokens": 1200 if cached else 0,
+                    "cacheWriteInputTokens": 0 if cached else 1200,
+                },
+            }
+
+    @pytest.mark.asyncio
+    async def test_system_prompt_is_sent_as_cacheable_block(self, monkeypatch):
+        """システムプロンプトの直後にキャッシュポイントが置かれることを確認"""
+        from src.utils.config import get_config
+
+        monkeypatch.setattr(get_config(), "bedrock_prompt_caching", True)
+        service = BedrockService()
+        service.bedrock_runtime = self.ConverseRuntime()
+
+        result = await service.generate_text("動的部分", system_prompt="静的な指示")
+        await service.generate_text("動的部分2", system_prompt="静的な指示")
+
+        assert result == "応答"
+        request = service.bedrock_runtime.requests[0]
+        assert request["system"] == [
+            {"text": "静的な指示"},
+            {"cachePoint": {"type": "default"}},
+        ]
+        assert request["messages"][0]["content"] == [{"text": "動的部分"}]
+        usage = service.metrics.snapshot()[service.model_id]["usage"]
+        assert usage["cacheWriteInputTokens"] == 1200
+        assert usage["cacheReadInputTokens"] == 1200
+
+    @pytest.mark.asyncio
+    async def test_system_prompt_is_prepended_when_caching_disabled(self):
+        """プロンプトキャッシュ無効時はInvokeModelにシステムプロンプトを連結して送ることを確認"""
+        class RecordingRuntime(FakeBedrockRuntime):
+            def invoke_model(self, modelId, body, **kwargs):
+                self.body = json.loads(body)
+                return super().invoke_model(modelId, body, **kwargs)
+
+        service = BedrockService()
+        service.bedrock_runtime = RecordingRuntime()
+
+        with patch.object(
+            BedrockService, "model_id", new="us.amazon.nova-lite-v1:0"
+        ):
+            result = await service.generate_text("動的部分", system_prompt="静的な指示")
+
+        assert result == "応答"
+        content = service.bedrock_runtime.body["messages"][0]["content"]
+        assert content == [{"text": "静的な指示\n\n動的部分"}]
+
+
+class TestBedrockServiceStructuredOutput:
+    """ツール使用による構造化出力のテスト"""
+
+    class ToolRuntime(FakeBedrockRuntime):
+        """Converse APIでツールの入力（またはテキスト）を返すスタブ"""
+
+        def __init__(self, use_tool: bool = True):
+            super().__init__()
+            self.use_tool = use_tool
+            self.requests = []
+
+        def converse(self, **kwargs):
+            self.requests.append(kwargs)
+            name = kwargs["toolConfig"]["toolChoice"]["tool"]["name"]
+            if self.use_tool:
+                block = {"toolUse": {"toolUseId": "t1", "name": name, "input": {"a": "値"}}}
+            else:
+                block = {"text": '{"a": "テキスト"}'}
+            return {"output": {"message": {"content": [block]}}, "usage": {}}
+
+    @pytest.mark.asyncio
+    async def test_tool_input_is_returned_as_json(self):
+        """ツールの呼び出しを強制し、ツールの入力をJSON文字列として返すことを確認"""
+        from src.services.structured_output import RECOMMENDATION_TOOL
+
+        service = BedrockService()
+        service.bedrock_runtime = self.ToolRuntime()
+
+        result = await service.generate_text(
+            "動的部分", system_prompt="静的な指示", output_tool=RECOMMENDATION_TOOL
+        )
+
+        assert json.loads(result) == {"a": "値"}
+        request = service.bedrock_runtime.requests[0]
+        assert request["toolConfig"] == RECOMMENDATION_TOOL.tool_config()
+        assert request["system"] == [{"text": "静的な指示"}]
+        assert service.last_generation().structured
+        assert service.bedrock_runtime.call_count == 0
+
+    @pytest.mark.asyncio
+    async def test_missing_tool_use_falls_back_to_text(self):
+        """ツールが呼び出されなかった場合は生成テキストを返すことを確認"""
+        from src.services.structured_output import RECOMMENDATION_TOOL
+
+        service = BedrockService()
+        service.bedrock_runtime = self.ToolRuntime(use_tool=False)
+
+        result = await service.generate_text("動的部分", output_tool=RECOMMENDATION_TOOL)
+
+        assert result == '{"a": "テキスト"}'
+
+    @pytest.mark.asyncio
+    async def test_unsupported_model_uses_text_output(self):
+        """ツール使用に対応していないモデルではInvokeModelでテキストを生成することを確認"""
+        from src.services.structured_output import RECOMMENDATION_TOOL
+
+        service = BedrockService()
+        service.bedrock_runtime = self.ToolRuntime()
+
+        with patch.object(
+            BedrockService, "model_id", new="meta.llama3-70b-instruct-v1:0"
+        ), patch.object(
+            service.bedrock_runtime,
+            "invoke_model",
+            return_value={
+                "body": io.BytesIO(json.dumps({"generation": "応答"}).encode("utf-8"))
+            },
+        ):
+            result = await service.generate_text("動的部分", output_tool=RECOMMENDATION_TOOL)
+
+        assert result == "応答"
+        assert service.bedrock_runtime.requests == []
+        assert not service.last_generation().structured
+
+
+class TestBedrockServiceEmbeddings:
+    """バッチ埋め込み生成のテスト"""
+
+    class EmbeddingRuntime:
+        """テキスト長を埋め込みとして返すスタブ"""
+
+        def __init__(self, latency: float = 0.0):
+            self.latency = latency
+            self.texts = []
+            self.in_flight = 0
+            self.max_in_flight = 0
+
+        def invoke_model(self, modelId, body, **kwargs):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            time.sleep(self.latency)
+            self.in_flight -= 1
+            text = json.loads(body)["inputText"]
+            self.texts.append(text)
+            payload = {"embedding": [float(len(text)), 0.5]}
+            return {"body": io.BytesIO(json.dumps(payload).encode("utf-8"))}
+
+    @pytest.mark.asyncio
+    async def test_batch_deduplicates_and_caches(self):
+        """重複テキストとキャッシュ済みテキストが再生成されないことを確認"""
+        service = BedrockService()
+        service.bedrock_runtime = self.EmbeddingRuntime()
+
+        first = await service.generate_embeddings_batch(["甘口", "辛口", "甘口"])
+        second = await service.generate_embeddings_batch(["辛口", "淡麗"])
+
+        assert first == [[2.0, 0.5], [2.0, 0.5], [2.0, 0.5]]
+        assert len(second) == 2
+        assert sorted(service.bedrock_runtime.texts) == sorted(["甘口", "辛口", "淡麗"])
+
+    @pytest.mark.asyncio
+    async def test_batch_concurrency_is_bounded(self, monkeypatch):
+        """同時呼び出し数が設定の上限を超えないことを確認"""
+        from src.utils.config import get_config
+
+        monkeypatch.setattr(get_config(), "embedding_max_concurrency", 2)
+        service = BedrockService()
+        service.bedrock_runtime = self.EmbeddingRuntime(latency=0.05)
+
+        await service.generate_embeddings_batch([f"感想{i}" for i in range(6)])
+
+        assert service.bedrock_runtime.max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_disk_cache_is_reloaded(self, tmp_path):
+        """ディスクキャッシュが次回起動時に読み込まれることを確認"""
+        from src.utils.embedding_cache import EmbeddingCache
+
+        path = str(tmp_path / "embeddings.bin")
+        service = BedrockService(embedding_cache=EmbeddingCache(path))
+        service.bedrock_runtime = self.EmbeddingRuntime()
+        await service.generate_embeddings("フルーティ")
+
+        reloaded = BedrockService(embedding_cache=EmbeddingCache(path))
+        reloaded.bedrock_runtime = self.EmbeddingRuntime()
+        vector = await reloaded.generate_embeddings("フルーティ")
+
+        assert vector == [5.0, 0.5]
+        assert reloaded.bedrock_runtime.texts == []
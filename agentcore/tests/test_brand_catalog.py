@@ -0,0 +1,232 @@
+"""銘柄カタログのベクトル検索のユニットテスト"""
+
+import json
+from array import array
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.models import DrinkingRecord, Menu
+from src.services import brand_catalog
+from src.services.brand_catalog import (
+    CATALOG_PATH,
+    VECTORS_PATH,
+    BrandCatalog,
+    VectorIndex,
+    build_vectors,
+    embed_text,
+    get_brand_catalog,
+)
+from src.services.recommendation_service import RecommendationService
+from src.utils.config import get_config
+
+
+def make_record(brand: str, rating: str, impression: str = "美味しかった") -> DrinkingRecord:
+    return DrinkingRecord(user_id="test_user", brand=brand, impression=impression, rating=rating)
+
+
+class TestEmbedText:
+    """embed_textのテスト"""
+
+    def test_normalized_and_deterministic(self):
+        """L2正規化され、同じテキストに対して同じベクトルになることを確認"""
+        vector = embed_text("獺祭 純米大吟醸")
+
+        assert sum(v * v for v in vector) == pytest.approx(1.0, abs=1e-5)
+        assert vector == embed_text("獺祭 純米大吟醸")
+
+    def test_notation_variants_share_features(self):
+        """全角・半角や旧字体の違いが同じベクトルになることを確認"""
+        assert embed_text("澤屋まつもと") == embed_text("沢屋まつもと")
+        assert embed_text("ＡＢＣ") == embed_text("ABC")
+
+    def test_empty_text_is_zero(self):
+        """特徴がない場合はゼロベクトルになることを確認"""
+        assert not any(embed_text("　"))
+
+
+class TestVectorIndex:
+    """VectorIndexのテスト"""
+
+    def test_search_orders_by_inner_product(self):
+        """内積の大きい順に返し、除外した行は返さないことを確認"""
+        vectors = [array("f", [1, 0]), array("f", [0.6, 0.8]), array("f", [0, 1])]
+        index = VectorIndex.from_vectors(vectors, 2)
+        query = array("f", [0, 1])
+
+        assert [row for row, _ in index.search(query, 2)] == [2, 1]
+        assert [row for row, _ in index.search(query, 2, exclude=[2])] == [1, 0]
+
+    def test_shipped_vectors_match_catalog(self, tmp_path):
+        """同梱のベクトルのファイルがカタログから再生成したものと一致することを確認"""
+        rebuilt = tmp_path / "brand_vectors.f32"
+        build_vectors(CATALOG_PATH, rebuilt)
+
+        assert rebuilt.read_bytes() == VECTORS_PATH.read_bytes()
+
+    def test_stale_vectors_are_recomputed(self, tmp_path):
+        """カタログと一致しないベクトルのファイルは使わず、メモリ上で計算することを確認"""
+        vectors = tmp_path / "brand_vectors.f32"
+        vectors.write_bytes(VECTORS_PATH.read_bytes()[:-4])
+
+        catalog = BrandCatalog.load(CATALOG_PATH, vectors)
+        shipped = BrandCatalog.load()
+        query = embed_text("獺祭")
+
+        assert catalog.index.search(query, 5) == shipped.index.search(query, 5)
+
+
+class TestNearest:
+    """BrandCatalog.nearestのテスト"""
+
+    def test_liked_brand_and_similar_brands_first(self):
+        """好きな銘柄と、その感想に近い銘柄が上位になることを確認"""
+        catalog = get_brand_catalog()
+        records = [make_record("獺祭 純米大吟醸", "非常に好き", "フルーティーで華やかな香り")]
+
+        brands = [b.brand for b in catalog.nearest(records, 10)]
+
+        assert len(brands) == 10
+        assert brands[0] == "獺祭"
+
+    def test_disliked_brands_are_excluded(self):
+        """合わなかった銘柄は候補から除外されることを確認"""
+        catalog = get_brand_catalog()
+        records = [
+            make_record("大七 生酛", "好き", "濃醇で燗にすると旨味が広がる"),
+            make_record("大七", "合わない"),
+        ]
+
+        brands = [b.brand for b in catalog.nearest(records, 20)]
+
+        assert brands
+        assert "大七" not in brands
+
+    def test_no_liked_records_returns_empty(self):
+        """好きな記録がない場合は空を返すことを確認"""
+        catalog = get_brand_catalog()
+
+        assert catalog.nearest([make_record("剣菱", "非常に合わない")], 10) == []
+
+
+class TestCatalogInPrompt:
+    """メニューなしの推薦プロンプトとの連携のテスト"""
+
+    RECORDS = [make_record("獺祭 純米大吟醸", "非常に好き", "フルーティーで華やかな香り")]
+
+    def test_prompt_lists_catalog_candidates(self):
+        """メニューなしの場合、カタログの候補と選択の制約がプロンプトに載ることを確認"""
+        service = RecommendationService()
+
+        with patch.object(get_config(), "brand_catalog_top_n", 5):
+            prompt = service._build_fused_prompt(self.RECORDS, None)
+
+        section = prompt.split("## 候補の銘柄\n")[1].split("\n###")[0]
+        listed = section.splitlines()
+        assert len(listed) == 5
+        assert listed[0] == "- 獺祭（山口、純米大吟醸）"
+        assert "候補外の銘柄は推薦しないでください" in prompt
+
+    def test_disabled_catalog_keeps_free_recommendation(self):
+        """カタログが無効の場合は従来どおり専門知識に基づく推薦を依頼することを確認"""
+        service = RecommendationService()
+
+        with patch.object(get_config(), "brand_catalog_enabled", False):
+            prompt = service._build_fused_prompt(self.RECORDS, None)
+            grounding = service._grounding_menu(None, service._catalog_candidates(self.RECORDS))
+
+        assert "## 候補の銘柄" not in prompt
+        assert "日本酒の専門知識に基づいて" in prompt
+        assert grounding is None
+
+    def test_grounding_uses_menu_when_given(self):
+        """メニューがある場合はメニューで照合し、ない場合はカタログの全銘柄で照合することを確認"""
+        service = RecommendationService()
+        menu = Menu(brands=["菊正宗 上撰"])
+
+        assert service._grounding_menu(menu, ["菊正宗 上撰"]) is menu
+        grounding = service._grounding_menu(None, service._catalog_candidates(self.RECORDS))
+        assert len(grounding.brands) == len(get_brand_catalog())
+
+    @pytest.mark.asyncio
+    async def test_no_liked_records_keeps_free_recommendations(self):
+        """好きな記録がなく候補を載せない場合は、カタログにない銘柄も除外しないことを確認"""
+        service = RecommendationService()
+        records = [make_record("剣菱", "合わない")]
+        item = {
+            "brand": "架空の銘柄",
+            "brand_description": "架空の説明",
+            "expected_experience": "すっきりした後味",
+            "match_score": 80,
+        }
+        text = json.dumps(
+            {
+                "best_recommend": item,
+                "recommendations": [{**item, "brand": "架空の銘柄2", "category": "新しい挑戦"}],
+            },
+            ensure_ascii=False,
+        )
+
+        with patch.object(
+            service, "analyze_taste_preference", new=AsyncMock(return_value={})
+        ), patch.object(
+            service.bedrock_service, "generate_text", new=AsyncMock(return_value=text)
+        ) as mock_generate:
+            response = await service.generate_recommendations("test_user", records)
+
+        prompt = mock_generate.await_args.args[0]
+        assert "## 候補の銘柄" not in prompt
+        assert service._grounding_menu(None, service._catalog_candidates(records)) is None
+        assert response.best_recommend.brand == "架空の銘柄"
+        assert [r.brand for r in response.recommendations] == ["架空の銘柄2"]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("pipeline", ["two_call", "fused"])
+    async def test_catalog_is_searched_once_per_request(self, pipeline):
+        """メニューなしの推薦で、カタログの検索が1リクエストにつき1回だけ行われることを確認"""
+        service = RecommendationService()
+        catalog = get_brand_catalog()
+        text = json.dumps(
+            {
+                "taste_profile": {"analysis_summary": "華やかな香りを好む"},
+                "best_recommend": {
+                    "brand": "獺祭",
+                    "brand_description": "山口の純米大吟醸",
+                    "expected_experience": "華やかな香り",
+                    "match_score": 90,
+                },
+                "recommendations": [],
+            },
+            ensure_ascii=False,
+        )
+
+        with patch.object(
+            catalog, "nearest", wraps=catalog.nearest
+        ) as mock_nearest, patch.object(
+            service, "analyze_taste_preference", new=AsyncMock(return_value={})
+        ), patch.object(
+            service.bedrock_service, "generate_text", new=AsyncMock(return_value=text)
+        ) as mock_generate:
+            response = await service.generate_recommendations(
+                "test_user", self.RECORDS, pipeline=pipeline
+            )
+
+        assert mock_nearest.call_count == 1
+        assert "## 候補の銘柄" in mock_generate.await_args_list[0].args[0]
+        assert response.best_recommend.brand == "獺祭"
+
+    def test_load_failure_disables_catalog(self):
+        """カタログを読み込めない場合はNoneになり、候補を載せないことを確認"""
+        service = RecommendationService()
+
+        with patch.object(brand_catalog, "_catalog", None), patch.object(
+            brand_catalog, "_catalog_failed", False
+        ), patch.object(
+            BrandCatalog, "load", side_effect=FileNotFoundError("brand_catalog.json")
+        ) as mock_load:
+            assert get_brand_catalog() is None
+            assert service._catalog_candidates(self.RECORDS) == []
+            assert get_brand_catalog() is None
+
+        # 失敗は記録され、リクエストごとに読み込みを再試行しない
+        assert mock_load.call_count == 1
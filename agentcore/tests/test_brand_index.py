@@ -0,0 +1,182 @@
+"""メニューの銘柄索引のユニットテスト"""
+
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.models import (
+    BestRecommendation,
+    DrinkingRecord,
+    Menu,
+    Recommendation,
+    RecommendationResponse,
+)
+from src.services.brand_index import BrandIndex, brand_stem, fold_brand
+from src.services.recommendation_service import RecommendationService
+from src.utils.config import get_config
+
+MENU = [
+    "獺祭 純米大吟醸45",
+    "久保田 千寿",
+    "黒龍 石田屋",
+    "十四代 本丸",
+    "ＮＥＸＴ５",
+    "飛露喜 特別純米",
+]
+
+
+def make_recommendation(brand: str, score: int) -> Recommendation:
+    return Recommendation(
+        brand=brand,
+        brand_description=f"{brand}の説明",
+        expected_experience="すっきりした後味",
+        category="好みに近い",
+        match_score=score,
+    )
+
+
+class TestFoldBrand:
+    """銘柄名の正規化のテスト"""
+
+    def test_width_case_kana_and_old_kanji_are_folded(self):
+        """全角・半角、大文字・小文字、カタカナ・ひらがな、旧字体の違いを無視することを確認"""
+        assert fold_brand("ＮＥＸＴ５") == fold_brand("next 5")
+        assert fold_brand("黒龍") == fold_brand("黒竜")
+        assert fold_brand("ゆきの美人") == fold_brand("ユキノ美人")
+        assert fold_brand("「花陽浴」・純米") == fold_brand("花陽浴 純米")
+
+    def test_stem_drops_trailing_styles_and_polish_ratio(self):
+        """末尾の特定名称・精米歩合を取り除くことを確認"""
+        assert brand_stem(fold_brand("獺祭 純米大吟醸45")) == "獺祭"
+        assert brand_stem(fold_brand("飛露喜 特別純米 生詰")) == "飛露喜"
+        # すべてが特定名称の場合は元のまま
+        assert brand_stem(fold_brand("純米吟醸")) == "純米吟醸"
+
+
+class TestBrandIndex:
+    """BrandIndexのテスト"""
+
+    @pytest.mark.parametrize(
+        "brand,expected",
+        [
+            ("久保田 千寿", "久保田 千寿"),
+            ("久保田千寿", "久保田 千寿"),
+            ("黒竜 石田屋", "黒龍 石田屋"),
+            ("next5", "ＮＥＸＴ５"),
+            ("獺祭", "獺祭 純米大吟醸45"),
+            ("獺祭 純米大吟醸 磨き二割三分", "獺祭 純米大吟醸45"),
+            ("十四代", "十四代 本丸"),
+            ("飛露喜 純米吟醸", "飛露喜 特別純米"),
+        ],
+    )
+    def test_variants_snap_to_menu_entry(self, brand, expected):
+        """表記ゆれのある銘柄名がメニューの表記に一致することを確認"""
+        assert BrandIndex(MENU).match(brand) == expected
+
+    @pytest.mark.parametrize("brand", ["菊正宗", "久保田 萬寿", "十", ""])
+    def test_off_menu_brand_is_not_matched(self, brand):
+        """メニューにない銘柄や短すぎる語は一致しないことを確認"""
+        assert BrandIndex(MENU).match(brand) is None
+
+    def test_ambiguous_prefix_prefers_shorter_then_menu_order(self):
+        """前方一致の候補が複数ある場合は語幹が短いもの、記載順で選ぶことを確認"""
+        index = BrandIndex(["新政 陽乃鳥", "新政 No.6", "新政 亜麻猫"])
+
+        assert index.match("新政") == "新政 No.6"
+
+
+class TestEnforceMenu:
+    """推薦のメニュー制約の適用のテスト"""
+
+    def test_brands_are_snapped_and_off_menu_dropped(self):
+        """銘柄名をメニューの表記に合わせ、メニュー外と重複を除外することを確認"""
+        service = RecommendationService()
+        response = RecommendationResponse(
+            best_recommend=BestRecommendation(
+                brand="獺祭",
+                brand_description="山口の華やかな純米大吟醸",
+                expected_experience="華やかな香りが広がります",
+                match_score=95,
+            ),
+            recommendations=[
+                make_recommendation("黒竜 石田屋", 85),
+                make_recommendation("菊正宗", 82),
+                make_recommendation("獺祭 純米大吟醸", 80),
+                make_recommendation("久保田千寿", 75),
+            ],
+        )
+
+        result = service._enforce_menu(response, Menu(brands=MENU))
+
+        assert result.best_recommend.brand == "獺祭 純米大吟醸45"
+        assert [r.brand for r in result.recommendations] == ["黒龍 石田屋", "久保田 千寿"]
+
+    def test_off_menu_best_recommend_is_replaced(self):
+        """best_recommendがメニュー外の場合は最上位の推薦を繰り上げることを確認"""
+        service = RecommendationService()
+        response = RecommendationResponse(
+            best_recommend=BestRecommendation(
+                brand="菊正宗",
+                brand_description="兵庫の辛口",
+                expected_experience="キリッとした後味",
+                match_score=95,
+            ),
+            recommendations=[make_recommendation("十四代", 88), make_recommendation("久保田 千寿", 75)],
+        )
+
+        result = service._enforce_menu(response, Menu(brands=MENU))
+
+        assert result.best_recommend.brand == "十四代 本丸"
+        assert result.best_recommend.match_score == 88
+        assert [r.brand for r in result.recommendations] == ["久保田 千寿"]
+
+    def test_disabled_by_config(self):
+        """設定で無効にした場合はそのまま返すことを確認"""
+        service = RecommendationService()
+        response = RecommendationResponse(recommendations=[make_recommendation("菊正宗", 82)])
+
+        with patch.object(get_config(), "menu_constraint_enforced", False):
+            result = service._enforce_menu(response, Menu(brands=MENU))
+
+        assert result is response
+
+    @pytest.mark.asyncio
+    async def test_generate_does_not_reprompt_for_violations(self):
+        """メニュー外の銘柄を除外してもLLMを再度呼び出さないことを確認"""
+        service = RecommendationService()
+        text = json.dumps(
+            {
+                "best_recommend": {
+                    "brand": "久保田千寿",
+                    "brand_description": "新潟の淡麗辛口",
+                    "expected_experience": "すっきりした後味",
+                    "match_score": 92,
+                },
+                "recommendations": [
+                    {
+                        "brand": "菊正宗",
+                        "brand_description": "兵庫の辛口",
+                        "expected_experience": "キリッとした後味",
+                        "category": "新しい挑戦",
+                        "match_score": 80,
+                    }
+                ],
+            },
+            ensure_ascii=False,
+        )
+        records = [
+            DrinkingRecord(user_id="test_user", brand="獺祭", impression="華やか", rating="好き")
+        ]
+        with patch.object(
+            service, "analyze_taste_preference", new=AsyncMock(return_value={})
+        ), patch.object(
+            service.bedrock_service, "generate_text", new=AsyncMock(return_value=text)
+        ) as mock_generate:
+            response = await service.generate_recommendations(
+                "test_user", records, Menu(brands=MENU)
+            )
+
+        assert mock_generate.await_count == 1
+        assert response.best_recommend.brand == "久保田 千寿"
+        assert response.recommendations == []
@@ -0,0 +1,151 @@
+"""銘柄の知識ベースのユニットテスト"""
+
+import json
+import sqlite3
+from unittest.mock import patch
+
+from src.models import DrinkingRecord, Menu
+from src.services.brand_knowledge import (
+    CATALOG_PATH,
+    KNOWLEDGE_PATH,
+    BrandKnowledge,
+    build_knowledge_base,
+    get_brand_knowledge,
+)
+from src.services.recommendation_service import RecommendationService
+from src.services.structured_output import RECOMMENDATION_TOOL
+from src.utils.config import get_config
+
+RECORDS = [
+    DrinkingRecord(
+        user_id="test_user", brand="獺祭", impression="華やかな香り", rating="非常に好き"
+    )
+]
+
+
+def _rows(path) -> list[tuple[str, str, str]]:
+    with sqlite3.connect(path) as connection:
+        return connection.execute("SELECT key, brand, description FROM brands ORDER BY key").fetchall()
+
+
+class TestBrandKnowledge:
+    """BrandKnowledgeのテスト"""
+
+    def test_describe_normalizes_brand(self):
+        """表記ゆれや特定名称の付いた銘柄名でも説明を引けることを確認"""
+        knowledge = get_brand_knowledge()
+
+        expected = knowledge.describe("獺祭")
+        assert expected
+        assert knowledge.describe("獺祭 純米大吟醸45") == expected
+        assert knowledge.describe("沢屋まつもと") == knowledge.describe("澤屋まつもと")
+
+    def test_unknown_brand_returns_none(self):
+        """知識ベースにない銘柄・先頭が同じだけの別の銘柄はNoneを返すことを確認"""
+        knowledge = get_brand_knowledge()
+
+        assert knowledge.describe("架空の銘柄") is None
+        assert knowledge.describe("作田") is None
+        assert knowledge.describe("獺祭の夢") is None
+        assert knowledge.describe("久保田屋 純米") is None
+        assert not knowledge.knows_all(["獺祭", "久保田屋"])
+        assert knowledge.describe("") is None
+
+    def test_knows_all(self):
+        """すべての銘柄が既知の場合だけTrueになることを確認"""
+        knowledge = get_brand_knowledge()
+
+        assert knowledge.knows_all(["獺祭", "久保田 純米"])
+        assert not knowledge.knows_all(["獺祭", "架空の銘柄"])
+        assert not knowledge.knows_all([])
+
+    def test_memo_is_bounded(self):
+        """検索結果の保持が上限を超えず、古い銘柄名から破棄されることを確認"""
+        knowledge = BrandKnowledge(memo_max_entries=3)
+
+        for i in range(10):
+            assert knowledge.describe(f"架空の銘柄{i}") is None
+        knowledge.describe("獺祭")
+
+        assert list(knowledge._descriptions) == ["架空の銘柄8", "架空の銘柄9", "獺祭"]
+        assert knowledge.describe("獺祭") == get_brand_knowledge().describe("獺祭")
+
+    def test_missing_file_is_unavailable(self, tmp_path):
+        """ファイルがない場合は例外を送出せずNoneを返すことを確認"""
+        knowledge = BrandKnowledge(tmp_path / "missing.sqlite")
+
+        assert knowledge.describe("獺祭") is None
+        assert not (tmp_path / "missing.sqlite").exists()
+
+    def test_shipped_file_matches_catalog(self, tmp_path):
+        """同梱の知識ベースがカタログから再生成したものと一致することを確認"""
+        rebuilt = tmp_path / "brand_knowledge.sqlite"
+        count = build_knowledge_base(CATALOG_PATH, rebuilt)
+
+        assert count == len(json.loads(CATALOG_PATH.read_text(encoding="utf-8")))
+        assert _rows(rebuilt) == _rows(KNOWLEDGE_PATH)
+
+
+class TestDescriptionFromKnowledge:
+    """推薦との連携のテスト"""
+
+    @staticmethod
+    def _item(brand: str, **extra) -> dict:
+        return {
+            "brand": brand,
+            "expected_experience": "華やかな香りが広がります",
+            "category": "好みに近い",
+            "match_score": 88,
+            **extra,
+        }
+
+    def test_parse_fills_known_description(self):
+        """既知の銘柄は説明を省いても知識ベースの説明で補完し、それ以外はLLMの説明を使うことを確認"""
+        service = RecommendationService()
+        best = {k: v for k, v in self._item("獺祭").items() if k != "category"}
+        text = json.dumps(
+            {
+                "best_recommend": best,
+                "recommendations": [
+                    self._item("久保田 純米", brand_description="LLMの説明"),
+                    self._item("久保田 千寿", brand_description="千寿の説明"),
+                    self._item("架空の銘柄", brand_description="架空の説明"),
+                    self._item("架空の銘柄2"),
+                ],
+            },
+            ensure_ascii=False,
+        )
+
+        response = service._parse_recommendations(text)
+
+        knowledge = get_brand_knowledge()
+        assert response.best_recommend.brand_description == knowledge.describe("獺祭")
+        descriptions = [r.brand_description for r in response.recommendations]
+        assert descriptions == [knowledge.describe("久保田"), "千寿の説明", "架空の説明"]
+
+    def test_prompt_omits_description_when_all_known(self):
+        """候補がすべて既知の場合はbrand_descriptionを依頼せず、ツールからも除くことを確認"""
+        service = RecommendationService()
+
+        prompt = service._build_fused_prompt(RECORDS, Menu(brands=["獺祭 純米大吟醸45", "久保田 純米"]))
+        tool = service._output_tool(RECOMMENDATION_TOOL, prompt)
+
+        assert "brand_descriptionは出力しないでください" in prompt
+        best = tool.schema["properties"]["best_recommend"]
+        assert "brand_description" not in best["properties"]
+        assert "brand_description" not in best["required"]
+
+    def test_prompt_keeps_description_when_unknown_or_disabled(self):
+        """未知の候補がある場合・無効の場合はbrand_descriptionを依頼することを確認"""
+        service = RecommendationService()
+        known = Menu(brands=["獺祭"])
+
+        unknown_prompt = service._build_fused_prompt(RECORDS, Menu(brands=["獺祭", "架空の銘柄"]))
+        with patch.object(get_config(), "brand_knowledge_enabled", False):
+            disabled_prompt = service._build_fused_prompt(RECORDS, known)
+        with patch.object(get_config(), "menu_constraint_enforced", False):
+            unenforced_prompt = service._build_fused_prompt(RECORDS, known)
+
+        for prompt in (unknown_prompt, disabled_prompt, unenforced_prompt):
+            assert "brand_descriptionは出力しないでください" not in prompt
+            assert service._output_tool(RECOMMENDATION_TOOL, prompt) is RECOMMENDATION_TOOL
@@ -0,0 +1,244 @@
+"""サーキットブレーカーのテスト"""
+
+import io
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from src.services.bedrock_service import BedrockService
+from src.services.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from src.services.rate_limiter import RateLimitTimeoutError
+
+
+class FakeClock:
+    """テスト用の時計"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_breaker(clock: FakeClock) -> CircuitBreaker:
+    return CircuitBreaker(
+        "test-model",
+        failure_rate_threshold=0.5,
+        slow_call_seconds=5.0,
+        window_size=4,
+        min_calls=4,
+        open_seconds=10.0,
+        clock=clock,
+    )
+
+
+class TestCircuitBreaker:
+    """CircuitBreakerの状態遷移のテスト"""
+
+    def test_opens_when_failure_rate_exceeds_threshold(self):
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        breaker.record_success(0.1)
+        breaker.record_success(0.1)
+        breaker.record_failure()
+        assert breaker.state == CircuitState.CLOSED
+
+        breaker.record_failure()
+
+        assert breaker.state == CircuitState.OPEN
+        assert not breaker.allow_request()
+
+    def test_slow_calls_count_as_failures(self):
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(4):
+            breaker.record_success(6.0)
+
+        assert breaker.state == CircuitState.OPEN
+
+    def test_half_open_allows_single_probe_and_closes_on_success(self):
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(4):
+            breaker.record_failure()
+
+        clock.now = 10.0
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+
+        breaker.record_success(0.1)
+
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.snapshot()["failure_rate"] == 0.0
+
+    def test_half_open_reopens_on_failure(self):
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(4):
+            breaker.record_failure()
+        clock.now = 10.0
+        assert breaker.allow_request()
+
+        breaker.record_failure()
+
+        assert breaker.state == CircuitState.OPEN
+
+    def test_release_probe_frees_half_open_slot(self):
+        """結果を記録せずに終わった試験呼び出しの枠が解放されることを確認"""
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(4):
+            breaker.record_failure()
+        clock.now = 10.0
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+
+        breaker.release_probe()
+
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert breaker.allow_request()
+
+
+class TestBedrockServiceFallback:
+    """BedrockServiceのフォールバックのテスト"""
+
+    @pytest.fixture
+    def service(self):
+        service = BedrockService()
+
+        class Runtime:
+            def __init__(self):
+                self.model_ids = []
+
+            def invoke_model(self, modelId, **kwargs):
+                self.model_ids.append(modelId)
+                if modelId == "us.amazon.nova-lite-v1:0":
+                    raise ClientError(
+                        {"Error": {"Code": "ServiceUnavailableException", "Message": "障害"}},
+                        "InvokeModel",
+                    )
+                payload = {"content": [{"text": f"{modelId}の応答"}]}
+                return {"body": io.BytesIO(json.dumps(payload).encode("utf-8"))}
+
+        service.bedrock_runtime = Runtime()
+        with patch.object(
+            BedrockService, "model_chain",
+            new=["us.amazon.nova-lite-v1:0", "anthropic.claude-3-haiku-20240307-v1:0"],
+        ), patch.object(BedrockService, "model_id", new="us.amazon.nova-lite-v1:0"), patch(
+            "src.services.bedrock_service.asyncio.sleep", new_callable=AsyncMock
+        ):
+            yield service
+
+    @pytest.mark.asyncio
+    async def test_falls_back_when_primary_fails(self, service):
+        """主モデルが失敗した場合にフォールバックモデルで生成されることを確認"""
+        result = await service.generate_text("テスト")
+
+        assert result == "anthropic.claude-3-haiku-20240307-v1:0の応答"
+        assert service.bedrock_runtime.model_ids[-1] == "anthropic.claude-3-haiku-20240307-v1:0"
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_skips_primary(self, service):
+        """サーキットが開いた主モデルは呼び出されないことを確認"""
+        primary = service._breaker("us.amazon.nova-lite-v1:0")
+        for _ in range(primary.min_calls):
+            primary.record_failure()
+        assert primary.state == CircuitState.OPEN
+
+        await service.generate_text("テスト")
+
+        assert "us.amazon.nova-lite-v1:0" not in service.bedrock_runtime.model_ids
+        status = service.get_status()
+        assert status["circuits"]["us.amazon.nova-lite-v1:0"]["state"] == "open"
+
+    @pytest.mark.asyncio
+    async def test_all_circuits_open_raises(self, service):
+        """すべてのサーキットが開いている場合はCircuitOpenErrorになることを確認"""
+        for model_id in service.model_chain:
+            breaker = service._breaker(model_id)
+            for _ in range(breaker.min_calls):
+                breaker.record_failure()
+
+        with pytest.raises(CircuitOpenError):
+            await service.generate_text("テスト")
+
+
+class TestProbeRelease:
+    """half_openの試験呼び出しが結果を記録せずに終わった場合のテスト"""
+
+    MODEL_ID = "us.amazon.nova-lite-v1:0"
+
+    @pytest.fixture
+    def service(self):
+        service = BedrockService()
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(4):
+            breaker.record_failure()
+        clock.now = 10.0
+        service._breakers[self.MODEL_ID] = breaker
+        with patch.object(BedrockService, "model_chain", new=[self.MODEL_ID]), patch.object(
+            BedrockService, "model_id", new=self.MODEL_ID
+        ), patch("src.services.bedrock_service.asyncio.sleep", new_callable=AsyncMock):
+            yield service
+
+    @pytest.mark.asyncio
+    async def test_client_error_on_probe_releases_slot(self, service):
+        """試験呼び出しがリクエスト起因のエラーで終わっても、次の呼び出しが試験できることを確認"""
+
+        class Runtime:
+            def __init__(self):
+                self.calls = 0
+
+            def invoke_model(self, modelId, **kwargs):
+                self.calls += 1
+                if self.calls == 1:
+                    raise ClientError(
+                        {"Error": {"Code": "ValidationException", "Message": "不正"}},
+                        "InvokeModel",
+                    )
+                payload = {"output": {"message": {"content": [{"text": "応答"}]}}}
+                return {"body": io.BytesIO(json.dumps(payload).encode("utf-8"))}
+
+        service.bedrock_runtime = Runtime()
+        with pytest.raises(ClientError):
+            await service.generate_text("テスト")
+
+        assert await service.generate_text("テスト") == "応答"
+        assert service._breaker(self.MODEL_ID).state == CircuitState.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_timeout_on_probe_releases_slot(self, service):
+        """レート制限の待機の打ち切りで終わった試験呼び出しの枠が解放されることを確認"""
+        with patch.object(
+            service.rate_limiter, "acquire", new=AsyncMock(side_effect=RateLimitTimeoutError("待機超過"))
+        ):
+            with pytest.raises(RateLimitTimeoutError):
+                await service.generate_text("テスト")
+            with pytest.raises(RateLimitTimeoutError):
+                await anext(service.generate_text_stream("テスト"))
+
+        assert service._breaker(self.MODEL_ID).allow_request()
+
+    @pytest.mark.asyncio
+    async def test_abandoned_stream_releases_slot(self, service):
+        """途中で読み捨てたストリームの試験呼び出しの枠が解放されることを確認"""
+
+        class StreamingRuntime:
+            def invoke_model_with_response_stream(self, modelId, body, **kwargs):
+                chunks = [{"contentBlockDelta": {"delta": {"text": "日本"}}}] * 3
+                return {
+                    "body": iter({"chunk": {"bytes": json.dumps(c).encode("utf-8")}} for c in chunks)
+                }
+
+        service.bedrock_runtime = StreamingRuntime()
+        stream = service.generate_text_stream("テスト")
+        assert await anext(stream) == "日本"
+        await stream.aclose()
+
+        breaker = service._breaker(self.MODEL_ID)
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert breaker.allow_request()
@@ -0,0 +1,107 @@
+"""飲酒履歴の集約のユニットテスト"""
+
+from unittest.mock import patch
+
+from src.models import DrinkingRecord
+from src.services.history_compaction import (
+    compact_history,
+    extract_key_phrases,
+    normalize_brand,
+)
+from src.services.recommendation_service import RecommendationService
+from src.utils.config import get_config
+
+LONG_IMPRESSION = (
+    "昨日は友人の誕生日で居酒屋に行きました。"
+    "最初の一口でフルーティーな香りが広がり、甘みと酸味のバランスが絶妙でした。"
+    "料理は刺身と焼き鳥を頼みました。"
+    "後味はすっきりしていてキレがありました。"
+    "また行きたいと思います。"
+)
+
+
+def make_record(brand: str, rating: str = "好き", impression: str = "華やか") -> DrinkingRecord:
+    return DrinkingRecord(
+        user_id="test_user", brand=brand, impression=impression, rating=rating
+    )
+
+
+class TestCompactHistory:
+    """compact_historyのテスト"""
+
+    def test_normalize_brand(self):
+        """全角・半角、大文字・小文字、空白の違いを無視することを確認"""
+        assert normalize_brand("新政 Ｎｏ．６") == normalize_brand("新政No.6")
+        assert normalize_brand("DASSAI") == normalize_brand("dassai")
+
+    def test_merges_same_brand(self):
+        """同じ銘柄の記録が記録回数・評価の内訳・最新の感想で1件にまとまることを確認"""
+        records = [
+            make_record("獺祭", "好き", "一回目"),
+            make_record("十四代", "非常に好き"),
+            make_record("獺祭 ", "非常に好き", "二回目"),
+            make_record("獺祭", "好き", "三回目"),
+        ]
+
+        compacted = compact_history(records, 150)
+
+        assert [e.brand for e in compacted] == ["十四代", "獺祭"]
+        dassai = compacted[1]
+        assert dassai.count == 3
+        assert dassai.impression == "三回目"
+        assert dassai.rating_summary == "非常に好き×1, 好き×2"
+        assert compacted[0].rating_summary == "非常に好き"
+
+    def test_extract_key_phrases(self):
+        """長い感想から味に関する文節を上限内で抜き出すことを確認"""
+        result = extract_key_phrases(LONG_IMPRESSION, 60)
+
+        assert len(result) <= 60
+        assert "甘みと酸味" in result
+        assert "誕生日" not in result
+        assert "刺身" not in result
+
+    def test_short_impression_is_unchanged(self):
+        """上限以内の感想はそのまま返すことを確認"""
+        assert extract_key_phrases("華やかな香り", 60) == "華やかな香り"
+        assert extract_key_phrases(LONG_IMPRESSION, 0) == LONG_IMPRESSION
+
+    def test_no_taste_phrases_falls_back_to_prefix(self):
+        """味に関する文節がない場合は先頭から切り詰めることを確認"""
+        text = "友人と行きました。" * 10
+
+        result = extract_key_phrases(text, 20)
+
+        assert len(result) == 20
+        assert result.endswith("…")
+
+
+class TestTastePromptCompaction:
+    """味の好み分析プロンプトでの集約のテスト"""
+
+    def test_prompt_size_does_not_grow_with_repeats(self):
+        """同じ銘柄の記録が増えてもプロンプトの大きさがほぼ変わらないことを確認"""
+        service = RecommendationService()
+        brands = ["獺祭", "十四代", "新政", "黒龍", "田酒"]
+
+        def build(count: int) -> str:
+            records = [make_record(brands[i % len(brands)]) for i in range(count)]
+            liked, disliked = service._split_by_rating(records)
+            return service._build_taste_analysis_prompt(liked, disliked)
+
+        small = build(10)
+        large = build(1000)
+
+        assert len(large) - len(small) < 50
+        assert "- 獺祭 (好き×200): 華やか" in large
+
+    def test_compaction_can_be_disabled(self):
+        """集約を無効にすると記録ごとの行になることを確認"""
+        service = RecommendationService()
+        records = [make_record("獺祭"), make_record("獺祭")]
+
+        with patch.object(get_config(), "history_compaction_enabled", False):
+            prompt = service._build_taste_analysis_prompt(records, [])
+
+        assert prompt.count("- 獺祭 (好き): 華やか") == 2
+
@@ -0,0 +1,102 @@
+"""LLM出力からのJSON抽出のテスト"""
+
+import json
+import random
+
+import pytest
+
+from src.services.recommendation_service import RecommendationService
+from src.utils.json_repair import REPAIR_COMMENTS, extract_json
+from tests.llm_output_samples import FUSED, SAMPLES, TASTE_ANALYSIS
+
+NOISE = ("", " ", "\n  ", " // コメント\n", " /* 補足 */ ", "\n// ... 最大9件まで\n")
+PREFIXES = ("", "\n", "```json\n", "以下が結果です。\n", "結果:\n```json\n")
+SUFFIXES = ("", "\n", "\n```", "\n```\n以上です。", "\n補足: {とくになし}")
+
+
+def render_noisy(value: object, rng: random.Random) -> str:
+    """値をコメント・末尾のカンマ・空白を混ぜたJSON風のテキストにする"""
+    noise = lambda: rng.choice(NOISE)  # noqa: E731
+    if isinstance(value, dict):
+        items = [
+            f"{noise()}{json.dumps(k, ensure_ascii=False)}{noise()}:{noise()}{render_noisy(v, rng)}"
+            for k, v in value.items()
+        ]
+        trailing = "," if items and rng.random() < 0.3 else ""
+        return "{" + ",".join(items) + trailing + noise() + "}"
+    if isinstance(value, list):
+        items = [f"{noise()}{render_noisy(v, rng)}" for v in value]
+        trailing = "," if items and rng.random() < 0.3 else ""
+        return "[" + ",".join(items) + trailing + noise() + "]"
+    return json.dumps(value, ensure_ascii=False)
+
+
+class TestExtractJson:
+    """extract_jsonのテスト"""
+
+    @pytest.mark.parametrize(
+        "name,text,expected,repairs", SAMPLES, ids=[s[0] for s in SAMPLES]
+    )
+    def test_samples(self, name, text, expected, repairs):
+        """サンプルの出力から期待する値を取り出し、適用した修復を報告することを確認"""
+        result = extract_json(text)
+
+        assert result.value == expected
+        assert set(result.repairs) == set(repairs)
+
+    def test_comment_markers_inside_strings_are_kept(self):
+        """文字列内の // や /* は文字列の一部として扱うことを確認"""
+        text = '{"url": "https://example.com/*a*/", "note": "a // b",}'
+
+        result = extract_json(text)
+
+        assert result.value == {"url": "https://example.com/*a*/", "note": "a // b"}
+        assert REPAIR_COMMENTS not in result.repairs
+
+    @pytest.mark.parametrize(
+        "text",
+        ["", "JSONはありません", '{"brand": "獺祭"', '{"brand": "獺', "{[}"],
+    )
+    def test_invalid_raises_decode_error(self, text):
+        """オブジェクトがない・閉じていない場合はJSONDecodeErrorになることを確認"""
+        with pytest.raises(json.JSONDecodeError):
+            extract_json(text)
+
+    def test_fuzz_noisy_output(self):
+        """コメント・末尾のカンマ・前後の文章をランダムに混ぜても元の値を取り出せることを確認"""
+        rng = random.Random(0)
+        for _ in range(500):
+            value = rng.choice([FUSED, TASTE_ANALYSIS, {"a": [[], {}, [1, {"b": None}]]}])
+            text = rng.choice(PREFIXES) + render_noisy(value, rng) + rng.choice(SUFFIXES)
+
+            assert extract_json(text).value == value, text
+
+    def test_fuzz_truncated_output(self):
+        """途中で切れた出力はJSONDecodeErrorのみを送出することを確認"""
+        text = json.dumps(FUSED, ensure_ascii=False)
+        for end in range(len(text)):
+            with pytest.raises(json.JSONDecodeError):
+                extract_json(text[:end])
+
+
+class TestParseWithRepairs:
+    """推薦サービスのパースでの修復のテスト"""
+
+    def test_recommendations_with_prose_and_comments(self):
+        """前置きの文章とコメントを含む推薦の出力をパースできることを確認"""
+        service = RecommendationService()
+        text = next(s[1] for s in SAMPLES if s[0] == "template_comment")
+
+        result = service._parse_recommendations("推薦結果は以下の通りです。\n" + text)
+
+        assert result.best_recommend.brand == "獺祭 純米大吟醸"
+        assert [r.brand for r in result.recommendations] == ["十四代 本丸", "久保田 {千寿}"]
+
+    def test_fused_taste_profile_with_trailing_text(self):
+        """後ろに説明文があるfusedの出力から味の好み分析を取り出せることを確認"""
+        service = RecommendationService()
+        text = next(s[1] for s in SAMPLES if s[0] == "fused_with_trailing_text")
+
+        analysis = service._parse_taste_analysis(text, [], key="taste_profile")
+
+        assert analysis["preferred_tastes"] == TASTE_ANALYSIS["preferred_tastes"]
@@ -0,0 +1,83 @@
+"""ストリーミングJSONパーサーのテスト"""
+
+import json
+
+from src.utils.json_stream import IncrementalJsonParser
+
+SAMPLE = """```json
+{
+  "best_recommend": {"brand": "獺祭", "match_score": 95},
+  "recommendations": [
+    {"brand": "久保田 {千寿}", "match_score": 85},
+    {"brand": "黒龍 \\"石田屋\\"", "match_score": 80}
+    // ... 最大9件まで
+  ]
+}
+```"""
+
+
+def feed_in_chunks(parser: IncrementalJsonParser, text: str, size: int) -> list:
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i : i + size]))
+    return events
+
+
+class TestIncrementalJsonParser:
+    """IncrementalJsonParserのテスト"""
+
+    def test_emits_objects_in_completion_order(self):
+        """完成した順にオブジェクトが取り出されることを確認"""
+        parser = IncrementalJsonParser()
+        events = feed_in_chunks(parser, SAMPLE, 1)
+
+        assert [key for key, _ in events] == [
+            "best_recommend",
+            "recommendations",
+            "recommendations",
+        ]
+        assert events[0][1] == {"brand": "獺祭", "match_score": 95}
+        assert events[1][1]["brand"] == "久保田 {千寿}"
+        assert events[2][1]["brand"] == '黒龍 "石田屋"'
+        assert parser.finished
+
+    def test_emits_best_recommend_before_stream_ends(self):
+        """best_recommendが配列の完成を待たずに取り出されることを確認"""
+        parser = IncrementalJsonParser()
+        cut = SAMPLE.index('"recommendations"')
+
+        events = parser.feed(SAMPLE[:cut])
+
+        assert events == [("best_recommend", {"brand": "獺祭", "match_score": 95})]
+        assert not parser.finished
+
+    def test_chunk_size_does_not_change_result(self):
+        """チャンクの区切り位置に依存しないことを確認"""
+        expected = feed_in_chunks(IncrementalJsonParser(), SAMPLE, len(SAMPLE))
+        for size in (2, 3, 7, 16):
+            assert feed_in_chunks(IncrementalJsonParser(), SAMPLE, size) == expected
+
+    def test_nested_objects_are_emitted_whole(self):
+        """ネストしたオブジェクトは外側のオブジェクトとしてまとめて取り出されることを確認"""
+        text = json.dumps({"items": [{"a": {"b": 1}}], "meta": {"c": [1, {"d": 2}]}})
+        events = IncrementalJsonParser().feed(text)
+
+        assert events == [("items", {"a": {"b": 1}}), ("meta", {"c": [1, {"d": 2}]})]
+
+    def test_items_with_comments_and_trailing_commas_are_repaired(self):
+        """項目内のコメント・末尾のカンマは全文のパースと同じく修復して取り出すことを確認"""
+        text = """{
+  "best_recommend": {
+    "brand": "獺祭", // 銘柄名
+    "match_score": 95,
+  },
+  "recommendations": [
+    {"brand": "新政", /* 候補 */ "match_score": 85,},
+  ]
+}"""
+        events = feed_in_chunks(IncrementalJsonParser(), text, 5)
+
+        assert events == [
+            ("best_recommend", {"brand": "獺祭", "match_score": 95}),
+            ("recommendations", {"brand": "新政", "match_score": 85}),
+        ]
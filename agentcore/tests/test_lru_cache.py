@@ -0,0 +1,47 @@
+"""LRU + TTLキャッシュのユニットテスト"""
+
+from src.utils.lru_cache import LRUTTLCache
+
+
+class TestLRUTTLCache:
+    """LRUTTLCacheのテスト"""
+
+    def test_hit_miss_and_eviction_counters(self):
+        """ヒット・ミス・追い出しが記録されることを確認"""
+        cache = LRUTTLCache(max_entries=2, ttl=60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1  # aが最近参照された
+        cache.put("c", 3)  # bが追い出される
+
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+        assert cache.stats() == {"hits": 2, "misses": 1, "evictions": 1, "size": 2}
+
+    def test_expired_entry_is_a_miss(self):
+        """TTLを超えたエントリーはミスになることを確認"""
+        now = [0.0]
+        cache = LRUTTLCache(max_entries=10, ttl=5, clock=lambda: now[0])
+        cache.put("a", 1)
+
+        now[0] = 5.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_invalidate_user(self):
+        """ユーザー単位でエントリーを破棄できることを確認"""
+        cache = LRUTTLCache(max_entries=10, ttl=60)
+        cache.put("a", 1, user_id="u1")
+        cache.put("b", 2, user_id="u1")
+        cache.put("c", 3, user_id="u2")
+
+        assert cache.invalidate_user("u1") == 2
+        assert cache.get("a") is None
+        assert cache.get("c") == 3
+
+    def test_disabled_when_ttl_is_zero(self):
+        """TTLが0の場合はキャッシュしないことを確認"""
+        cache = LRUTTLCache(max_entries=10, ttl=0)
+        cache.put("a", 1)
+
+        assert cache.get("a") is None
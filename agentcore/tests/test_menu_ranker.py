@@ -0,0 +1,125 @@
+"""メニューの事前ランキングのユニットテスト"""
+
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.models import DrinkingRecord, Menu
+from src.services.menu_ranker import score_menu, shortlist_menu
+from src.services.recommendation_service import RecommendationService
+from src.utils.config import get_config
+
+MENU = [
+    "菊正宗 上撰",
+    "久保田 千寿",
+    "獺祭 純米大吟醸45",
+    "黒龍 純米吟醸",
+    "大七 生酛 純米",
+    "剣菱 本醸造",
+]
+
+
+def make_record(brand: str, rating: str, impression: str = "美味しかった") -> DrinkingRecord:
+    return DrinkingRecord(user_id="test_user", brand=brand, impression=impression, rating=rating)
+
+
+class TestScoreMenu:
+    """score_menuのテスト"""
+
+    def test_liked_brand_and_style_rank_first(self):
+        """好きな銘柄（表記ゆれを含む）と同じ特定名称の銘柄が上位になることを確認"""
+        records = [
+            make_record("獺祭", "非常に好き"),
+            make_record("出羽桜 純米吟醸", "好き"),
+        ]
+
+        ranked = [brand for brand, _ in score_menu(MENU, records)]
+
+        assert ranked[0] == "獺祭 純米大吟醸45"
+        assert ranked[1] == "黒龍 純米吟醸"
+
+    def test_disliked_brand_ranks_last(self):
+        """合わなかった銘柄は最下位になることを確認"""
+        records = [make_record("剣菱", "非常に合わない"), make_record("獺祭", "好き")]
+
+        ranked = score_menu(MENU, records)
+
+        assert ranked[-1][0] == "剣菱 本醸造"
+        assert ranked[-1][1] < 0
+
+    def test_ties_keep_menu_order(self):
+        """履歴と関係のない銘柄はメニューの記載順のままであることを確認"""
+        ranked = [brand for brand, _ in score_menu(MENU, [make_record("新政", "好き")])]
+
+        assert ranked == MENU
+
+    def test_deterministic(self):
+        """同じ入力に対して同じ結果になることを確認"""
+        records = [make_record("獺祭", "好き"), make_record("大七 きもと", "非常に好き")]
+
+        assert score_menu(MENU, records) == score_menu(MENU, records)
+
+
+class TestShortlistMenu:
+    """shortlist_menuのテスト"""
+
+    def test_returns_top_k(self):
+        """上位K件だけを返すことを確認"""
+        records = [make_record("獺祭", "非常に好き")]
+
+        assert shortlist_menu(MENU, records, 2)[0] == "獺祭 純米大吟醸45"
+        assert len(shortlist_menu(MENU, records, 2)) == 2
+
+    def test_small_menu_or_disabled_is_unchanged(self):
+        """メニューがK件以下、またはKが0以下の場合はそのまま返すことを確認"""
+        records = [make_record("獺祭", "非常に好き")]
+
+        assert shortlist_menu(MENU, records, 10) is MENU
+        assert shortlist_menu(MENU, records, 0) is MENU
+
+    def test_prompt_lists_only_shortlist(self):
+        """推薦プロンプトには絞り込んだ銘柄だけが載ることを確認"""
+        service = RecommendationService()
+        records = [make_record("獺祭", "非常に好き"), make_record("剣菱", "合わない")]
+
+        with patch.object(get_config(), "menu_shortlist_size", 3):
+            prompt = service._build_fused_prompt(records, Menu(brands=MENU))
+
+        menu_section = prompt.split("## 利用可能なメニュー\n")[1].split("\n###")[0]
+        listed = menu_section.splitlines()
+        assert len(listed) == 3
+        assert listed[0] == "- 獺祭 純米大吟醸45"
+        assert "- 剣菱 本醸造" not in listed
+
+    @pytest.mark.asyncio
+    async def test_menu_is_shortlisted_once_per_request(self):
+        """推薦の生成で、メニューの絞り込みが1リクエストにつき1回だけ行われることを確認"""
+        service = RecommendationService()
+        records = [make_record("獺祭", "非常に好き")]
+        text = json.dumps(
+            {
+                "best_recommend": {
+                    "brand": "獺祭 純米大吟醸45",
+                    "brand_description": "山口の純米大吟醸",
+                    "expected_experience": "華やかな香り",
+                    "match_score": 90,
+                },
+                "recommendations": [],
+            },
+            ensure_ascii=False,
+        )
+
+        with patch.object(get_config(), "menu_shortlist_size", 3), patch(
+            "src.services.recommendation_service.shortlist_menu", wraps=shortlist_menu
+        ) as mock_shortlist, patch.object(
+            service, "analyze_taste_preference", new=AsyncMock(return_value={})
+        ), patch.object(
+            service.bedrock_service, "generate_text", new=AsyncMock(return_value=text)
+        ):
+            response = await service.generate_recommendations(
+                "test_user", records, Menu(brands=MENU), pipeline="two_call"
+            )
+
+        assert mock_shortlist.call_count == 1
+        assert response.best_recommend.brand == "獺祭 純米大吟醸45"
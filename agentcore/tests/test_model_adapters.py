@@ -0,0 +1,136 @@
+"""モデルアダプターのユニットテスト"""
+
+import pytest
+
+from src.services.model_adapters import (
+    ClaudeAdapter,
+    LlamaAdapter,
+    MistralAdapter,
+    ModelAdapter,
+    ModelAdapterRegistry,
+    NovaAdapter,
+    TitanTextAdapter,
+    get_adapter,
+)
+
+
+class TestModelAdapterRegistry:
+    """ModelAdapterRegistryのテスト"""
+
+    @pytest.mark.parametrize(
+        "model_id, expected",
+        [
+            ("anthropic.claude-3-5-sonnet-20240620-v1:0", ClaudeAdapter),
+            ("us.anthropic.claude-3-haiku-20240307-v1:0", ClaudeAdapter),
+            ("us.amazon.nova-lite-v1:0", NovaAdapter),
+            ("meta.llama3-1-70b-instruct-v1:0", LlamaAdapter),
+            ("mistral.mistral-large-2402-v1:0", MistralAdapter),
+            ("amazon.titan-text-express-v1", TitanTextAdapter),
+            ("unknown.model-v1", ClaudeAdapter),
+        ],
+    )
+    def test_resolve_by_model_id(self, model_id, expected):
+        """モデルIDからファミリーのアダプターが解決されることを確認"""
+        assert isinstance(get_adapter(model_id), expected)
+
+    def test_resolution_is_cached(self):
+        """同じモデルIDの解決結果がキャッシュされることを確認"""
+
+        class CountingAdapter(NovaAdapter):
+            calls = 0
+
+            def matches(self, model_id):
+                CountingAdapter.calls += 1
+                return super().matches(model_id)
+
+        registry = ModelAdapterRegistry()
+        registry.register(CountingAdapter())
+
+        first = registry.resolve("amazon.nova-pro-v1:0")
+        second = registry.resolve("amazon.nova-pro-v1:0")
+
+        assert first is second
+        assert CountingAdapter.calls == 1
+
+    def test_registered_adapter_takes_precedence(self):
+        """後から登録したアダプターが優先されることを確認"""
+
+        class CustomAdapter(NovaAdapter):
+            family = "custom"
+            patterns = ("nova-custom",)
+
+        registry = ModelAdapterRegistry()
+        registry.register(NovaAdapter())
+        assert isinstance(registry.resolve("amazon.nova-custom-v1"), NovaAdapter)
+
+        registry.register(CustomAdapter())
+        assert isinstance(registry.resolve("amazon.nova-custom-v1"), CustomAdapter)
+
+    def test_incomplete_adapter_is_rejected(self):
+        """必須のメソッドを実装していないアダプターは登録前にTypeErrorになることを確認"""
+
+        class IncompleteAdapter(ModelAdapter):
+            family = "incomplete"
+            patterns = ("incomplete",)
+
+            def build_request(self, prompt, max_tokens, temperature):
+                return {"prompt": prompt}
+
+        with pytest.raises(TypeError, match="parse_response"):
+            ModelAdapterRegistry().register(IncompleteAdapter())
+
+
+class TestModelAdapters:
+    """各アダプターのリクエスト・レスポンス変換のテスト"""
+
+    def test_claude_round_trip(self):
+        """Claude形式のリクエスト構築とレスポンス・使用量の取り出しを確認"""
+        adapter = ClaudeAdapter()
+        body = adapter.build_request("こんにちは", 100, 0.5)
+        response = {
+            "content": [{"type": "text", "text": "応答"}],
+            "usage": {"input_tokens": 12, "output_tokens": 3},
+        }
+
+        assert body["messages"] == [{"role": "user", "content": "こんにちは"}]
+        assert adapter.parse_response(response) == "応答"
+        assert adapter.extract_usage(response)["inputTokens"] == 12
+        assert adapter.decode_stream_chunk(
+            {"type": "content_block_delta", "delta": {"text": "差分"}}
+        ) == "差分"
+
+    def test_llama_round_trip(self):
+        """Llama形式のリクエスト構築とレスポンス・使用量の取り出しを確認"""
+        adapter = LlamaAdapter()
+        body = adapter.build_request("こんにちは", 100, 0.5)
+        response = {
+            "generation": "応答",
+            "prompt_token_count": 20,
+            "generation_token_count": 4,
+        }
+
+        assert "こんにちは" in body["prompt"]
+        assert body["max_gen_len"] == 100
+        assert adapter.parse_response(response) == "応答"
+        assert adapter.extract_usage(response) == {"inputTokens": 20, "outputTokens": 4}
+        assert adapter.decode_stream_chunk({"generation": "差分"}) == "差分"
+
+    def test_titan_text_round_trip(self):
+        """Titan Text形式のリクエスト構築とレスポンスの取り出しを確認"""
+        adapter = TitanTextAdapter()
+        body = adapter.build_request("こんにちは", 100, 0.5)
+        response = {
+            "inputTextTokenCount": 8,
+            "results": [{"outputText": "応答", "tokenCount": 2}],
+        }
+
+        assert body["textGenerationConfig"]["maxTokenCount"] == 100
+        assert adapter.parse_response(response) == "応答"
+        assert adapter.extract_usage(response) == {"inputTokens": 8, "outputTokens": 2}
+
+    def test_parse_response_raises_on_missing_fields(self):
+        """必要なフィールドがない場合にValueErrorとなることを確認"""
+        with pytest.raises(ValueError):
+            NovaAdapter().parse_response({"output": {}})
+        with pytest.raises(ValueError):
+            MistralAdapter().parse_response({})
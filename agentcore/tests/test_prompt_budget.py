@@ -0,0 +1,65 @@
+"""トークン予算付きプロンプト組み立てのユニットテスト"""
+
+from src.utils.prompt_budget import fit_lines, truncate_text
+from src.utils.tokens import estimate_tokens
+
+
+class TestTruncateText:
+    """truncate_textのテスト"""
+
+    def test_truncate_with_ellipsis(self):
+        """上限を超える場合は末尾に…を付けて上限文字数に収めることを確認"""
+        assert truncate_text("あいうえお", 3) == "あい…"
+        assert truncate_text("あいう", 3) == "あいう"
+        assert truncate_text("あいう", None) == "あいう"
+        assert truncate_text("あいう", 0) == ""
+
+
+class TestFitLines:
+    """fit_linesのテスト"""
+
+    def test_all_lines_fit_without_truncation(self):
+        """予算内であればそのまま出力されることを確認"""
+        entries = [("- 獺祭 (好き)", "華やかで飲みやすい")]
+
+        fitted = fit_lines(entries, budget=1000)
+
+        assert fitted.lines == ["- 獺祭 (好き): 華やかで飲みやすい\n"]
+        assert fitted.truncated == 0
+        assert fitted.dropped == 0
+
+    def test_impressions_are_truncated_to_fit(self):
+        """予算を超える場合は感想を切り詰めて収めることを確認"""
+        entries = [(f"- 銘柄{i} (好き)", "あ" * 1000) for i in range(5)]
+
+        fitted = fit_lines(entries, budget=800)
+
+        assert fitted.tokens <= 800
+        assert fitted.truncated == 5
+        assert fitted.dropped == 0
+        assert fitted.tokens == sum(estimate_tokens(line) for line in fitted.lines)
+
+    def test_oldest_records_are_dropped_last_resort(self):
+        """感想を省いても収まらない場合は古い記録から除外することを確認"""
+        entries = [(f"- 銘柄{i} (好き)", "あ" * 100) for i in range(10)]
+
+        fitted = fit_lines(entries, budget=30)
+
+        assert fitted.tokens <= 30
+        assert fitted.dropped > 0
+        assert fitted.lines[-1] == "- 銘柄9 (好き)\n"
+        assert fitted.lines[0] is None
+
+    def test_result_is_deterministic(self):
+        """同じ入力に対して同じ結果になることを確認"""
+        entries = [(f"- 銘柄{i}", "辛口" * (i * 50)) for i in range(8)]
+
+        assert fit_lines(entries, budget=500) == fit_lines(entries, budget=500)
+
+    def test_non_positive_budget_is_unlimited(self):
+        """予算0以下の場合は無制限として扱うことを確認"""
+        entries = [("- 銘柄", "あ" * 1000)]
+
+        fitted = fit_lines(entries, budget=0)
+
+        assert fitted.lines == ["- 銘柄: " + "あ" * 1000 + "\n"]
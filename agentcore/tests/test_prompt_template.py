@@ -0,0 +1,92 @@
+"""事前コンパイル済みプロンプトテンプレートのユニットテスト"""
+
+import pytest
+
+from src.services.recommendation_service import (
+    FUSED_RECOMMENDATION_TEMPLATE,
+    RECOMMENDATION_SYSTEM_PROMPT,
+    RECOMMENDATION_TEMPLATE,
+    TASTE_ANALYSIS_TEMPLATE,
+    TASTE_PROFILE_UPDATE_TEMPLATE,
+)
+from src.utils.prompt_template import PromptTemplate
+from src.utils.tokens import estimate_tokens
+
+
+class TestPromptTemplate:
+    """PromptTemplateのテスト"""
+
+    def test_render_fills_slots_in_order(self):
+        """静的セグメントとスロットの値が順に連結されることを確認"""
+        template = PromptTemplate("test", "システム", "## 見出し\n{a}と{b}\n{a}")
+
+        assert template.slots == frozenset({"a", "b"})
+        assert template.render(a="甲", b="乙") == "## 見出し\n甲と乙\n甲"
+
+    def test_escaped_braces_are_literal(self):
+        """二重の波括弧は文字としてそのまま出力されることを確認"""
+        template = PromptTemplate("test", "", '{{"brand": "{brand}"}}')
+
+        assert template.render(brand="獺祭") == '{"brand": "獺祭"}'
+
+    def test_missing_slot_raises(self):
+        """値が指定されていないスロットがある場合はKeyErrorになることを確認"""
+        template = PromptTemplate("test", "", "{a}{b}")
+
+        with pytest.raises(KeyError):
+            template.render(a="甲")
+
+    def test_format_spec_is_rejected(self):
+        """書式指定はテンプレート作成時にエラーになることを確認"""
+        with pytest.raises(ValueError):
+            PromptTemplate("test", "", "{score:03d}")
+
+    def test_version_depends_on_system_prompt_and_source(self):
+        """バージョンはシステムプロンプトと本文が同じなら一致し、変われば変わることを確認"""
+        base = PromptTemplate("a", "システム", "{x}")
+
+        assert PromptTemplate("b", "システム", "{x}").version == base.version
+        assert PromptTemplate("a", "システム2", "{x}").version != base.version
+        assert PromptTemplate("a", "システム", "{x}\n").version != base.version
+        assert len(base.version) == 12
+
+    def test_static_tokens(self):
+        """静的トークン数にシステムプロンプトと静的セグメントが含まれることを確認"""
+        template = PromptTemplate("test", "システム", "見出し{x}本文")
+
+        assert template.static_tokens == (
+            estimate_tokens("システム") + estimate_tokens("見出し") + estimate_tokens("本文")
+        )
+
+
+class TestRecommendationTemplates:
+    """推薦サービスのテンプレート定義のテスト"""
+
+    def test_slots(self):
+        """各テンプレートのスロットを確認"""
+        assert RECOMMENDATION_TEMPLATE.slots == {
+            "summary",
+            "taste_details",
+            "history",
+            "menu_section",
+            "menu_constraint",
+        }
+        assert TASTE_ANALYSIS_TEMPLATE.slots == {"liked", "disliked"}
+        assert TASTE_PROFILE_UPDATE_TEMPLATE.slots == {"summary", "taste_details", "records"}
+        assert FUSED_RECOMMENDATION_TEMPLATE.slots == {
+            "liked",
+            "disliked",
+            "menu_section",
+            "menu_constraint",
+        }
+
+    def test_versions_are_distinct(self):
+        """テンプレートごとにバージョンが異なることを確認"""
+        versions = {
+            RECOMMENDATION_TEMPLATE.version,
+            TASTE_ANALYSIS_TEMPLATE.version,
+            TASTE_PROFILE_UPDATE_TEMPLATE.version,
+            FUSED_RECOMMENDATION_TEMPLATE.version,
+        }
+        assert len(versions) == 4
+        assert RECOMMENDATION_TEMPLATE.system_prompt == RECOMMENDATION_SYSTEM_PROMPT
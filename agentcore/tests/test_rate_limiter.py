@@ -0,0 +1,126 @@
+"""レート制限のテスト"""
+
+import asyncio
+
+import pytest
+
+from src.services.rate_limiter import (
+    ModelRateLimiter,
+    RateLimiter,
+    RateLimitTimeoutError,
+    TokenBucket,
+)
+from src.utils.tokens import estimate_tokens
+
+
+class FakeClock:
+    """sleepで進む仮想時計"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+class TestTokenBucket:
+    """TokenBucketのテスト"""
+
+    def test_refills_at_per_minute_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock)
+        bucket.take(60)
+
+        assert bucket.time_until(1) == pytest.approx(1.0)
+        clock.now = 30.0
+        assert bucket.available == pytest.approx(30.0)
+
+    def test_oversized_request_is_clamped_to_capacity(self):
+        bucket = TokenBucket(10, FakeClock())
+        assert bucket.time_until(100) == 0.0
+
+
+class TestModelRateLimiter:
+    """ModelRateLimiterのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_waits_for_request_bucket(self):
+        """RPMを超える呼び出しは補充を待つことを確認"""
+        clock = FakeClock()
+        limiter = ModelRateLimiter("m", 60, 100_000, clock=clock, sleep=clock.sleep)
+
+        waits = [await limiter.acquire(10, max_wait=10) for _ in range(61)]
+
+        assert waits[:60] == [0.0] * 60
+        assert waits[60] == pytest.approx(1.0)
+
+    @pytest.mark.asyncio
+    async def test_waits_for_token_bucket(self):
+        """TPMを超える呼び出しは補充を待つことを確認"""
+        clock = FakeClock()
+        limiter = ModelRateLimiter("m", 1000, 600, clock=clock, sleep=clock.sleep)
+
+        await limiter.acquire(600, max_wait=60)
+        waited = await limiter.acquire(300, max_wait=60)
+
+        assert waited == pytest.approx(30.0)
+
+    @pytest.mark.asyncio
+    async def test_callers_are_served_in_fifo_order(self):
+        """待機中の呼び出しがFIFO順に通過することを確認"""
+        clock = FakeClock()
+        limiter = ModelRateLimiter("m", 60, 100_000, clock=clock, sleep=clock.sleep)
+        for _ in range(60):
+            await limiter.acquire(1, max_wait=10)
+
+        order = []
+
+        async def call(i):
+            await limiter.acquire(1, max_wait=10)
+            order.append(i)
+
+        await asyncio.gather(*(call(i) for i in range(5)))
+
+        assert order == [0, 1, 2, 3, 4]
+
+    @pytest.mark.asyncio
+    async def test_raises_when_max_wait_exceeded(self):
+        """最大待機時間を超える場合はエラーになることを確認"""
+        clock = FakeClock()
+        limiter = ModelRateLimiter("m", 1, 100_000, clock=clock, sleep=clock.sleep)
+        await limiter.acquire(1, max_wait=5)
+
+        with pytest.raises(RateLimitTimeoutError):
+            await limiter.acquire(1, max_wait=5)
+        assert limiter.snapshot()["timeouts"] == 1
+
+
+class TestRateLimiter:
+    """RateLimiterのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_disabled_when_limits_are_zero(self):
+        limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0, max_wait=1)
+        assert await limiter.acquire("m", 10**9) == 0.0
+        assert limiter.snapshot() == {}
+
+    @pytest.mark.asyncio
+    async def test_buckets_are_per_model(self):
+        limiter = RateLimiter(requests_per_minute=1, tokens_per_minute=1000, max_wait=0)
+        await limiter.acquire("a", 10)
+        await limiter.acquire("b", 10)
+
+        with pytest.raises(RateLimitTimeoutError):
+            await limiter.acquire("a", 10)
+        assert set(limiter.snapshot()) == {"a", "b"}
+
+
+def test_estimate_tokens():
+    """文字種に応じたトークン数の概算を確認"""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("日本酒") == 3
+    assert estimate_tokens("abcdefgh") == 2
@@ -166,3 +166,693 @@ class TestRecommendationService:
         assert result_mixed.recommendations[0].category == "おすすめ"
         assert result_mixed.recommendations[1].category == "おすすめ"
         assert all(1 <= len(rec.category) <= 10 for rec in result_mixed.recommendations)
+
+
+class TestStreamRecommendations:
+    """ストリーミング推薦のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_items_before_completion(self):
+        """best_recommendと各推薦が完成順にイベントとして返されることを確認"""
+        from unittest.mock import AsyncMock, patch
+
+        from src.models import DrinkingRecord
+
+        service = RecommendationService()
+        response_text = json.dumps(
+            {
+                "best_recommend": {
+                    "brand": "獺祭",
+                    "brand_description": "山口の華やかな純米大吟醸",
+                    "expected_experience": "華やかな香りが広がります",
+                    "match_score": 95,
+                },
+                "recommendations": [
+                    {
+                        "brand": "久保田",
+                        "brand_description": "新潟の淡麗辛口",
+                        "expected_experience": "すっきりした後味",
+                        "category": "好みに近い",
+                        "match_score": 80,
+                    },
+                    {
+                        "brand": "新政",
+                        "brand_description": "秋田の生酛純米",
+                        "expected_experience": "爽やかな酸味",
+                        "category": "新しい挑戦",
+                        "match_score": 85,
+                    },
+                ],
+            },
+            ensure_ascii=False,
+        )
+
+        async def fake_stream(prompt, *args, **kwargs):
+            for i in range(0, len(response_text), 10):
+                yield response_text[i : i + 10]
+
+        records = [
+            DrinkingRecord(
+                user_id="test_user", brand="獺祭", impression="華やか", rating="好き"
+            )
+        ]
+        with patch.object(
+            service, "analyze_taste_preference", new=AsyncMock(return_value={})
+        ), patch.object(service.bedrock_service, "generate_text_stream", new=fake_stream):
+            events = [
+                event
+                async for event in service.stream_recommendations("test_user", records)
+            ]
+
+        assert [e["event"] for e in events] == [
+            "best_recommend",
+            "recommendation",
+            "recommendation",
+            "complete",
+        ]
+        assert events[0]["data"]["brand"] == "獺祭"
+        # 完了イベントはマッチ度順にソートされている
+        complete = events[-1]["data"]
+        assert [r["brand"] for r in complete["recommendations"]] == ["新政", "久保田"]
+
+
+class TestFusedPipeline:
+    """味の好み分析と推薦を1回で行うパイプラインのテスト"""
+
+    FUSED_RESPONSE = json.dumps(
+        {
+            "taste_profile": {
+                "preferred_tastes": ["華やか"],
+                "disliked_tastes": ["辛口"],
+                "analysis_summary": "華やかな香りを好む傾向",
+            },
+            "best_recommend": {
+                "brand": "獺祭",
+                "brand_description": "山口の華やかな純米大吟醸",
+                "expected_experience": "華やかな香りが広がります",
+                "match_score": 95,
+            },
+            "recommendations": [
+                {
+                    "brand": "新政",
+                    "brand_description": "秋田の生酛純米",
+                    "expected_experience": "爽やかな酸味",
+                    "category": "新しい挑戦",
+                    "match_score": 85,
+                }
+            ],
+        },
+        ensure_ascii=False,
+    )
+
+    @pytest.fixture
+    def records(self):
+        from src.models import DrinkingRecord
+
+        return [
+            DrinkingRecord(
+                user_id="test_user", brand="獺祭", impression="華やか", rating="好き"
+            ),
+            DrinkingRecord(
+                user_id="test_user", brand="菊正宗", impression="辛い", rating="合わない"
+            ),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_fused_uses_single_call_and_splits_result(self, records):
+        """1回の呼び出しで推薦と味の好み分析の両方が得られることを確認"""
+        from unittest.mock import AsyncMock, patch
+
+        service = RecommendationService()
+        with patch.object(
+            service.bedrock_service,
+            "generate_text",
+            new=AsyncMock(return_value=self.FUSED_RESPONSE),
+        ) as mock_generate:
+            response, taste_analysis = await service.generate_fused("test_user", records)
+
+        assert mock_generate.await_count == 1
+        assert response.best_recommend.brand == "獺祭"
+        assert [r.brand for r in response.recommendations] == ["新政"]
+        assert taste_analysis["preferred_tastes"] == ["華やか"]
+        assert taste_analysis["rating_distribution"] == {"好き": 1, "合わない": 1}
+
+    @pytest.mark.asyncio
+    async def test_pipeline_selected_per_request(self, records):
+        """リクエストごとにfusedパイプラインを選択できることを確認"""
+        from unittest.mock import AsyncMock, patch
+
+        service = RecommendationService()
+        with patch.object(
+            service.bedrock_service,
+            "generate_text",
+            new=AsyncMock(return_value=self.FUSED_RESPONSE),
+        ) as mock_generate, patch.object(
+            service, "analyze_taste_preference", new=AsyncMock()
+        ) as mock_analyze:
+            response = await service.generate_recommendations(
+                "test_user", records, pipeline="fused"
+            )
+
+        mock_analyze.assert_not_awaited()
+        assert mock_generate.await_count == 1
+        assert response.best_recommend.brand == "獺祭"
+
+    def test_missing_taste_profile_falls_back(self, records):
+        """taste_profileがない場合は既定の分析結果になることを確認"""
+        service = RecommendationService()
+
+        analysis = service._parse_taste_analysis(
+            json.dumps({"recommendations": []}), records, key="taste_profile"
+        )
+
+        assert analysis["analysis_summary"] == "味の好みを分析中です。"
+
+
+class TestRecommendationResultCache:
+    """推薦結果キャッシュのテスト"""
+
+    RESPONSE = json.dumps(
+        {
+            "best_recommend": {
+                "brand": "獺祭",
+                "brand_description": "山口の華やかな純米大吟醸",
+                "expected_experience": "華やかな香りが広がります",
+                "match_score": 95,
+            },
+            "recommendations": [],
+        },
+        ensure_ascii=False,
+    )
+
+    @pytest.fixture
+    def records(self):
+        from src.models import DrinkingRecord
+
+        return [
+            DrinkingRecord(
+                user_id="test_user", brand="獺祭", impression="華やか", rating="好き"
+            )
+        ]
+
+    @pytest.mark.asyncio
+    async def test_identical_request_is_served_from_cache(self, records):
+        """メニューの順序・空白だけが異なる同一リクエストはキャッシュから返すことを確認"""
+        from unittest.mock import AsyncMock, patch
+
+        from src.models import Menu
+
+        service = RecommendationService()
+        with patch.object(
+            service, "analyze_taste_preference", new=AsyncMock(return_value={})
+        ), patch.object(
+            service.bedrock_service,
+            "generate_text",
+            new=AsyncMock(return_value=self.RESPONSE),
+        ) as mock_generate:
+            first = await service.generate_recommendations(
+                "test_user", records, Menu(brands=["獺祭", "久保田 千寿"])
+            )
+            second = await service.generate_recommendations(
+                "test_user", records, Menu(brands=[" 久保田　千寿 ", "獺祭"])
+            )
+
+        assert mock_generate.await_count == 1
+        assert first == second
+        assert service.result_cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_user_forces_regeneration(self, records):
+        """ユーザーのキャッシュを破棄すると再生成されることを確認"""
+        from unittest.mock import AsyncMock, patch
+
+        service = RecommendationService()
+        with patch.object(
+            service, "analyze_taste_preference", new=AsyncMock(return_value={})
+        ), patch.object(
+            service.bedrock_service,
+            "generate_text",
+            new=AsyncMock(return_value=self.RESPONSE),
+        ) as mock_generate:
+            await service.generate_recommendations("test_user", records)
+            service.invalidate_user("test_user")
+            await service.generate_recommendations("test_user", records)
+
+        assert mock_generate.await_count == 2
+
+    def test_invalidate_user_keeps_taste_profile(self, records):
+        """推薦結果のキャッシュを破棄しても、味の好み分析結果は差分更新のために残すことを確認"""
+        service = RecommendationService()
+        service.taste_profile_cache.store("test_user", records, {"analysis_summary": "辛口好き"})
+
+        service.invalidate_user("test_user")
+
+        assert service.taste_profile_cache.lookup("test_user", records).kind == "hit"
+
+
+class TestPromptBudget:
+    """トークン予算による飲酒履歴の切り詰めのテスト"""
+
+    @pytest.fixture
+    def records(self):
+        from src.models import DrinkingRecord
+
+        return [
+            DrinkingRecord(
+                user_id="test_user",
+                brand=f"予算銘柄{i}",
+                impression="香りが華やかで甘みがある" * 40,
+                rating="好き" if i % 2 else "合わない",
+            )
+            for i in range(10)
+        ]
+
+    @pytest.mark.parametrize("budget_field", ["recommendation", "taste_analysis"])
+    def test_budget_below_fixed_tokens_drops_all_records(self, records, budget_field):
+        """固定部分だけで予算を超える場合は無制限にならず、記録の行をすべて除外することを確認"""
+        from unittest.mock import patch
+
+        from src.models import Menu
+        from src.utils.config import get_config
+
+        service = RecommendationService()
+        liked, disliked = service._split_by_rating(records)
+        builders = {
+            "recommendation": lambda: service._build_recommendation_prompt(
+                records, {}, Menu(brands=["獺祭"]), 5
+            ),
+            "taste_analysis": lambda: service._build_taste_analysis_prompt(liked, disliked),
+        }
+        build = builders[budget_field]
+
+        with patch.object(get_config(), f"{budget_field}_prompt_token_budget", 0):
+            unlimited = build()
+        with patch.object(get_config(), f"{budget_field}_prompt_token_budget", 50):
+            prompt = build()
+
+        assert "予算銘柄" in unlimited
+        assert "予算銘柄" not in prompt
+        assert len(prompt) < len(unlimited)
+
+    def test_fused_budget_below_fixed_tokens_drops_all_records(self, records):
+        """fusedモードのプロンプトでも固定部分が予算を超える場合は記録の行を除外することを確認"""
+        from unittest.mock import patch
+
+        from src.utils.config import get_config
+
+        service = RecommendationService()
+
+        with patch.object(get_config(), "recommendation_prompt_token_budget", 50):
+            prompt = service._build_fused_prompt(records, None)
+
+        assert "予算銘柄" not in prompt
+
+    def test_update_budget_below_fixed_tokens_drops_all_records(self, records):
+        """差分更新のプロンプトでも固定部分が予算を超える場合は記録の行を除外することを確認"""
+        from unittest.mock import patch
+
+        from src.utils.config import get_config
+
+        service = RecommendationService()
+
+        with patch.object(get_config(), "taste_analysis_prompt_token_budget", 50):
+            prompt = service._build_taste_profile_update_prompt({}, records)
+
+        assert "予算銘柄" not in prompt
+
+
+class TestPartialResultSalvage:
+    """途中で切れた出力の回収と不足分の追加依頼のテスト"""
+
+    def _item(self, brand, score, **overrides):
+        item = {
+            "brand": brand,
+            "brand_description": f"{brand}の説明",
+            "expected_experience": "すっきりした後味",
+            "category": "好みに近い",
+            "match_score": score,
+        }
+        item.update(overrides)
+        return item
+
+    def _truncated(self):
+        text = json.dumps(
+            {
+                "best_recommend": {
+                    "brand": "獺祭",
+                    "brand_description": "山口の華やかな純米大吟醸",
+                    "expected_experience": "華やかな香りが広がります",
+                    "match_score": 95,
+                },
+                "recommendations": [
+                    self._item("久保田", 80),
+                    self._item("新政", 85),
+                    self._item("黒龍", 78),
+                ],
+            },
+            ensure_ascii=False,
+        )
+        # 3件目の推薦の途中で切る
+        return text[: text.index("黒龍") + 5]
+
+    @pytest.fixture
+    def records(self):
+        from src.models import DrinkingRecord
+
+        return [
+            DrinkingRecord(
+                user_id="test_user", brand="獺祭", impression="華やか", rating="好き"
+            )
+        ]
+
+    def test_truncated_output_keeps_complete_items(self):
+        """途中で切れた出力から完成している項目を回収することを確認"""
+        service = RecommendationService()
+
+        response, incomplete = service._parse_recommendation_output(self._truncated())
+
+        assert incomplete
+        assert response.best_recommend.brand == "獺祭"
+        assert [r.brand for r in response.recommendations] == ["新政", "久保田"]
+
+    def test_invalid_item_marks_output_incomplete(self):
+        """不正な項目を除いた場合は欠けた推薦ありと判定することを確認"""
+        service = RecommendationService()
+        text = json.dumps(
+            {"recommendations": [self._item("久保田", 80), self._item("新政", 0)]},
+            ensure_ascii=False,
+        )
+
+        response, incomplete = service._parse_recommendation_output(text)
+
+        assert incomplete
+        assert [r.brand for r in response.recommendations] == ["久保田"]
+
+    @pytest.mark.asyncio
+    async def test_follow_up_requests_only_missing_items(self, records):
+        """不足分だけを既出の銘柄を除いて追加で依頼し、結果に統合することを確認"""
+        from unittest.mock import AsyncMock, patch
+
+        from src.services.structured_output import RECOMMENDATION_FOLLOW_UP_TOOL
+        from src.utils.config import get_config
+
+        follow_up = json.dumps(
+            {"recommendations": [self._item("新政", 70), self._item("黒龍", 78), self._item("飛露喜", 75)]},
+            ensure_ascii=False,
+        )
+        service = RecommendationService()
+        with patch.object(get_config(), "recommendation_min_items", 5), patch.object(
+            service, "analyze_taste_preference", new=AsyncMock(return_value={})
+        ), patch.object(
+            service.bedrock_service,
+            "generate_text",
+            new=AsyncMock(side_effect=[self._truncated(), follow_up]),
+        ) as mock_generate:
+            response = await service.generate_recommendations("test_user", records)
+
+        assert mock_generate.await_count == 2
+        follow_up_call = mock_generate.await_args_list[1]
+        assert follow_up_call.kwargs["output_tool"].name == RECOMMENDATION_FOLLOW_UP_TOOL.name
+        prompt = follow_up_call.args[0]
+        assert "recommendationsを2件だけ" in prompt
+        assert "- 獺祭\n- 新政\n- 久保田\n" in prompt
+        # 既出の「新政」は除き、依頼した2件だけを追加する
+        assert response.best_recommend.brand == "獺祭"
+        assert [r.brand for r in response.recommendations] == ["新政", "久保田", "黒龍", "飛露喜"]
+
+    @pytest.mark.asyncio
+    async def test_no_follow_up_when_enough_items_survive(self, records):
+        """回収した件数が下限以上なら追加で依頼しないことを確認"""
+        from unittest.mock import AsyncMock, patch
+
+        service = RecommendationService()
+        with patch.object(
+            service, "analyze_taste_preference", new=AsyncMock(return_value={})
+        ), patch.object(
+            service.bedrock_service,
+            "generate_text",
+            new=AsyncMock(return_value=self._truncated()),
+        ) as mock_generate:
+            response = await service.generate_recommendations("test_user", records)
+
+        assert mock_generate.await_count == 1
+        assert len(response.recommendations) == 2
+
+    @pytest.mark.asyncio
+    async def test_follow_up_failure_keeps_partial_result(self, records):
+        """追加の呼び出しに失敗した場合は回収した結果を返すことを確認"""
+        from unittest.mock import AsyncMock, patch
+
+        from src.utils.config import get_config
+
+        service = RecommendationService()
+        with patch.object(get_config(), "recommendation_min_items", 5), patch.object(
+            service, "analyze_taste_preference", new=AsyncMock(return_value={})
+        ), patch.object(
+            service.bedrock_service,
+            "generate_text",
+            new=AsyncMock(side_effect=[self._truncated(), RuntimeError("throttled")]),
+        ):
+            response = await service.generate_recommendations("test_user", records)
+
+        assert response.best_recommend.brand == "獺祭"
+        assert [r.brand for r in response.recommendations] == ["新政", "久保田"]
+
+
+class TestChunkedRecommendation:
+    """候補を分割した並列推薦（map-reduce）のテスト"""
+
+    MENU = [f"銘柄{i:02d}" for i in range(10)]
+
+    @pytest.fixture
+    def records(self):
+        from src.models import DrinkingRecord
+
+        return [
+            DrinkingRecord(
+                user_id="test_user", brand="獺祭", impression="華やか", rating="好き"
+            )
+        ]
+
+    @staticmethod
+    def chunk_brands(prompt: str) -> list[str]:
+        section = prompt.split("## 利用可能なメニュー\n")[1].split("\n###")[0]
+        return [line[2:] for line in section.splitlines()]
+
+    def reply(self, brands: list[str]) -> str:
+        """銘柄の番号が大きいほどマッチ度が高い推薦を返す"""
+        items = [
+            {
+                "brand": brand,
+                "brand_description": f"{brand}の説明",
+                "expected_experience": "すっきりした後味",
+                "category": "好みに近い",
+                "match_score": 50 + int(brand[-2:]),
+            }
+            for brand in sorted(brands, reverse=True)
+        ]
+        best = dict(items[0])
+        del best["category"]
+        return json.dumps(
+            {"best_recommend": best, "recommendations": items[1:]}, ensure_ascii=False
+        )
+
+    @pytest.mark.asyncio
+    async def test_chunks_run_in_parallel_and_merge(self, records):
+        """チャンクごとに同時呼び出し数の上限内で並列に推薦し、マッチ度で統合することを確認"""
+        import asyncio
+        from unittest.mock import AsyncMock, patch
+
+        from src.models import Menu
+        from src.utils.config import get_config
+
+        active = 0
+        peak = 0
+        calls = []
+
+        async def fake_generate(prompt, **kwargs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            brands = self.chunk_brands(prompt)
+            calls.append(brands)
+            return self.reply(brands)
+
+        service = RecommendationService()
+        config = get_config()
+        with patch.object(config, "menu_chunk_size", 3), patch.object(
+            config, "menu_chunk_concurrency", 2
+        ), patch.object(config, "menu_shortlist_size", 0), patch.object(
+            service, "analyze_taste_preference", new=AsyncMock(return_value={})
+        ), patch.object(service.bedrock_service, "generate_text", new=fake_generate):
+            response = await service.generate_recommendations(
+                "test_user", records, Menu(brands=self.MENU)
+            )
+
+        assert len(calls) == 4
+        assert all(len(brands) <= 3 for brands in calls)
+        assert sorted(b for brands in calls for b in brands) == self.MENU
+        assert peak == 2
+        assert response.best_recommend.brand == "銘柄09"
+        assert [r.brand for r in response.recommendations] == [
+            f"銘柄{i:02d}" for i in range(8, -1, -1)
+        ]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("pipeline", ["two_call", "fused"])
+    async def test_default_settings_chunk_large_menu(self, records, pipeline):
+        """既定の設定で、絞り込み後の候補がチャンクの件数より多い場合に分割されることを確認"""
+        from unittest.mock import AsyncMock, patch
+
+        from src.models import Menu
+        from src.utils.config import Config
+
+        defaults = Config()
+        menu = [f"銘柄{i:03d}" for i in range(defaults.menu_shortlist_size + 20)]
+        calls = []
+
+        async def fake_generate(prompt, **kwargs):
+            brands = self.chunk_brands(prompt)
+            calls.append(brands)
+            return self.reply(brands)
+
+        service = RecommendationService()
+        with patch("src.services.recommendation_service.get_config", return_value=defaults), patch.object(
+            service, "analyze_taste_preference", new=AsyncMock(return_value={})
+        ) as mock_analyze, patch.object(
+            service.bedrock_service, "generate_text", new=fake_generate
+        ):
+            response = await service.generate_recommendations(
+                "test_user", records, Menu(brands=menu), pipeline=pipeline
+            )
+
+        assert defaults.menu_shortlist_size > defaults.menu_chunk_size
+        assert mock_analyze.await_count == 1
+        assert len(calls) == 2
+        assert all(len(brands) <= defaults.menu_chunk_size for brands in calls)
+        assert sum(len(brands) for brands in calls) == defaults.menu_shortlist_size
+        assert response.best_recommend is not None
+
+    @pytest.mark.asyncio
+    async def test_streaming_chunks_large_menu(self, records):
+        """ストリーミングでも候補が多い場合は分割して推薦し、統合後の結果を返すことを確認"""
+        from unittest.mock import AsyncMock, patch
+
+        from src.models import Menu
+        from src.utils.config import get_config
+
+        service = RecommendationService()
+        config = get_config()
+        with patch.object(config, "menu_chunk_size", 5), patch.object(
+            config, "menu_shortlist_size", 0
+        ), patch.object(
+            service, "analyze_taste_preference", new=AsyncMock(return_value={})
+        ), patch.object(
+            service.bedrock_service,
+            "generate_text",
+            new=AsyncMock(side_effect=lambda prompt, **kwargs: self.reply(self.chunk_brands(prompt))),
+        ) as mock_generate, patch.object(
+            service.bedrock_service, "generate_text_stream"
+        ) as mock_stream:
+            events = [
+                event
+                async for event in service.stream_recommendations(
+                    "test_user", records, Menu(brands=self.MENU)
+                )
+            ]
+
+        mock_stream.assert_not_called()
+        assert mock_generate.await_count == 2
+        assert events[0] == {"event": "best_recommend", "data": events[-1]["data"]["best_recommend"]}
+        assert events[-1]["event"] == "complete"
+        assert events[-1]["data"]["best_recommend"]["brand"] == "銘柄09"
+
+    @pytest.mark.asyncio
+    async def test_catalog_candidates_are_chunked(self, records):
+        """メニューがない場合もカタログの候補が多ければ分割し、候補の銘柄として載せることを確認"""
+        from unittest.mock import AsyncMock, patch
+
+        from src.utils.config import get_config
+
+        prompts = []
+
+        async def fake_generate(prompt, **kwargs):
+            prompts.append(prompt)
+            section = prompt.split("## 候補の銘柄\n")[1].split("\n###")[0]
+            brand = section.splitlines()[0][2:].split("（")[0]
+            best = {
+                "brand": brand,
+                "brand_description": f"{brand}の説明",
+                "expected_experience": "すっきりした後味",
+                "match_score": 90,
+            }
+            return json.dumps({"best_recommend": best, "recommendations": []}, ensure_ascii=False)
+
+        service = RecommendationService()
+        config = get_config()
+        with patch.object(config, "brand_catalog_top_n", 12), patch.object(
+            config, "menu_chunk_size", 5
+        ), patch.object(
+            service, "analyze_taste_preference", new=AsyncMock(return_value={})
+        ), patch.object(service.bedrock_service, "generate_text", new=fake_generate):
+            response = await service.generate_recommendations("test_user", records)
+
+        assert len(prompts) == 3
+        assert all("## 利用可能なメニュー" not in prompt for prompt in prompts)
+        assert response.best_recommend is not None
+        assert len(response.recommendations) == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_degrades_gracefully(self, records):
+        """一部のチャンクが失敗しても残りのチャンクの結果を返すことを確認"""
+        from unittest.mock import AsyncMock, patch
+
+        from src.models import Menu
+        from src.utils.config import get_config
+
+        async def fake_generate(prompt, **kwargs):
+            brands = self.chunk_brands(prompt)
+            if "銘柄09" in brands:
+                raise RuntimeError("throttled")
+            return self.reply(brands)
+
+        service = RecommendationService()
+        config = get_config()
+        with patch.object(config, "menu_chunk_size", 5), patch.object(
+            config, "menu_shortlist_size", 0
+        ), patch.object(
+            service, "analyze_taste_preference", new=AsyncMock(return_value={})
+        ), patch.object(service.bedrock_service, "generate_text", new=fake_generate):
+            response = await service.generate_recommendations(
+                "test_user", records, Menu(brands=self.MENU)
+            )
+
+        # 銘柄09を含むチャンク（奇数番号）は除かれる
+        assert response.best_recommend.brand == "銘柄08"
+        assert [r.brand for r in response.recommendations] == ["銘柄06", "銘柄04", "銘柄02", "銘柄00"]
+
+    @pytest.mark.asyncio
+    async def test_all_chunks_failing_raises(self, records):
+        """すべてのチャンクが失敗した場合は例外を送出することを確認"""
+        from unittest.mock import AsyncMock, patch
+
+        from src.models import Menu
+        from src.utils.config import get_config
+
+        service = RecommendationService()
+        config = get_config()
+        with patch.object(config, "menu_chunk_size", 5), patch.object(
+            config, "menu_shortlist_size", 0
+        ), patch.object(
+            service, "analyze_taste_preference", new=AsyncMock(return_value={})
+        ), patch.object(
+            service.bedrock_service,
+            "generate_text",
+            new=AsyncMock(side_effect=RuntimeError("throttled")),
+        ):
+            with pytest.raises(RuntimeError):
+                await service.generate_recommendations(
+                    "test_user", records, Menu(brands=self.MENU)
+                )
@@ -0,0 +1,113 @@
+"""リトライポリシーのテスト"""
+
+import io
+import json
+import random
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+from src.services.bedrock_service import BedrockService
+from src.services.retry_policy import ErrorClass, RetryPolicy, classify_error
+
+
+def client_error(code: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": "テスト"}}, "InvokeModel")
+
+
+class TestClassifyError:
+    """エラー分類のテスト"""
+
+    @pytest.mark.parametrize(
+        "error, expected",
+        [
+            (client_error("ThrottlingException"), ErrorClass.THROTTLING),
+            (client_error("ServiceUnavailableException"), ErrorClass.SERVER),
+            (client_error("ModelTimeoutException"), ErrorClass.TIMEOUT),
+            (client_error("ValidationException"), ErrorClass.CLIENT),
+            (client_error("AccessDeniedException"), ErrorClass.CLIENT),
+            (client_error("SomethingNew"), ErrorClass.UNKNOWN),
+            (ReadTimeoutError(endpoint_url="https://example.com"), ErrorClass.TIMEOUT),
+            (RuntimeError("不明"), ErrorClass.UNKNOWN),
+        ],
+    )
+    def test_classification(self, error, expected):
+        assert classify_error(error) == expected
+
+
+class TestRetryPolicy:
+    """RetryPolicyのテスト"""
+
+    def test_backoff_is_capped_full_jitter(self):
+        """待機時間が0以上、上限付き指数関数以下であることを確認"""
+        policy = RetryPolicy(base_delay=0.5, max_delay=4.0, rng=random.Random(0))
+        for attempt, ceiling in [(1, 0.5), (2, 1.0), (3, 2.0), (4, 4.0), (8, 4.0)]:
+            delays = [policy.backoff(attempt) for _ in range(200)]
+            assert all(0 <= d <= ceiling for d in delays)
+            # ジッターにより値がばらつく
+            assert len(set(delays)) > 1
+
+    def test_non_retryable_errors_are_not_retried(self):
+        """リトライ不可のエラーはリトライしないことを確認"""
+        policy = RetryPolicy(deadline=30)
+        assert policy.next_delay(ErrorClass.CLIENT, 1, remaining=30, last_latency=0.1) is None
+
+    def test_retry_matrix_limits_attempts(self):
+        """エラー分類ごとのリトライ上限を超えないことを確認"""
+        policy = RetryPolicy(retry_matrix={ErrorClass.THROTTLING: 2})
+        assert policy.next_delay(ErrorClass.THROTTLING, 2, remaining=30, last_latency=0.1) is not None
+        assert policy.next_delay(ErrorClass.THROTTLING, 3, remaining=30, last_latency=0.1) is None
+
+    def test_retry_stops_when_deadline_would_be_exceeded(self):
+        """期限内に次の試行が終わらない見込みならリトライしないことを確認"""
+        policy = RetryPolicy(base_delay=0.5)
+        assert policy.next_delay(ErrorClass.SERVER, 1, remaining=2.0, last_latency=3.0) is None
+
+
+class TestBedrockServiceRetry:
+    """BedrockServiceのリトライ動作のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_validation_error_fails_without_retry(self):
+        """ValidationExceptionは1回で失敗し、メトリクスに記録されることを確認"""
+        class Runtime:
+            def invoke_model(self, **kwargs):
+                raise client_error("ValidationException")
+
+        service = BedrockService()
+        service.bedrock_runtime = Runtime()
+
+        with patch("src.services.bedrock_service.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            with pytest.raises(ClientError):
+                await service.generate_text("テスト")
+
+        mock_sleep.assert_not_awaited()
+        stats = service.metrics.snapshot()[service.model_id]
+        assert stats["attempts"] == 1
+        assert stats["outcomes"] == {"client": 1}
+
+    @pytest.mark.asyncio
+    async def test_throttling_is_retried_until_success(self):
+        """スロットリングはリトライされ、試行ごとのレイテンシが記録されることを確認"""
+        calls = {"count": 0}
+
+        class Runtime:
+            def invoke_model(self, **kwargs):
+                calls["count"] += 1
+                if calls["count"] <= 3:
+                    raise client_error("ThrottlingException")
+                payload = {"output": {"message": {"content": [{"text": "応答"}]}}}
+                return {"body": io.BytesIO(json.dumps(payload).encode("utf-8"))}
+
+        service = BedrockService()
+        service.bedrock_runtime = Runtime()
+
+        with patch("src.services.bedrock_service.asyncio.sleep", new_callable=AsyncMock):
+            assert await service.generate_text("テスト") == "応答"
+
+        stats = service.metrics.snapshot()[service.model_id]
+        assert stats["attempts"] == 4
+        assert stats["outcomes"]["throttling"] == 3
+        assert stats["outcomes"]["success"] == 1
+        assert stats["latency_p50"] is not None
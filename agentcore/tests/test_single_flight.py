@@ -0,0 +1,150 @@
+"""シングルフライトのユニットテスト"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.utils.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """SingleFlightのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        """同じキーの同時呼び出しが1回の実行にまとめられることを確認"""
+        single_flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"value": 1}
+
+        results = await asyncio.gather(
+            *(single_flight.do("key", work) for _ in range(5))
+        )
+
+        assert calls == 1
+        assert results == [{"value": 1}] * 5
+        assert single_flight.coalesced == 4
+        assert len(single_flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_separately(self):
+        """異なるキーはそれぞれ実行されることを確認"""
+        single_flight = SingleFlight()
+        calls = []
+
+        async def work(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        results = await asyncio.gather(
+            single_flight.do("a", lambda: work("a")),
+            single_flight.do("b", lambda: work("b")),
+        )
+
+        assert results == ["a", "b"]
+        assert sorted(calls) == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_cancelling_waiter_does_not_cancel_shared_work(self):
+        """最初の呼び出し元がキャンセルされても共有の処理は継続することを確認"""
+        single_flight = SingleFlight()
+        finished = asyncio.Event()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            finished.set()
+            return "done"
+
+        first = asyncio.create_task(single_flight.do("key", work))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(single_flight.do("key", work))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        assert await second == "done"
+        assert finished.is_set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    @pytest.mark.asyncio
+    async def test_exception_is_propagated_to_all_waiters(self):
+        """共有の処理の例外がすべての待機側に伝わることを確認"""
+        single_flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("失敗")
+
+        results = await asyncio.gather(
+            single_flight.do("key", work),
+            single_flight.do("key", work),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(r, ValueError) for r in results)
+
+
+class TestAgentRouterSingleFlight:
+    """AgentRouter.routeのシングルフライトのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_duplicate_recommendation_requests_are_coalesced(self):
+        """同時に届いた同一の推薦リクエストでBedrock呼び出しが重複しないことを確認"""
+        from src.agent import create_router
+
+        taste = json.dumps(
+            {"preferred_tastes": [], "disliked_tastes": [], "analysis_summary": "要約"},
+            ensure_ascii=False,
+        )
+        recommendation = json.dumps(
+            {
+                "best_recommend": {
+                    "brand": "獺祭",
+                    "brand_description": "山口の華やかな純米大吟醸",
+                    "expected_experience": "華やかな香りが広がります",
+                    "match_score": 95,
+                },
+                "recommendations": [],
+            },
+            ensure_ascii=False,
+        )
+
+        async def slow_generate(prompt, *args, **kwargs):
+            await asyncio.sleep(0.05)
+            return taste if mock_generate.await_count == 1 else recommendation
+
+        params = {
+            "user_id": "test_user",
+            "drinking_records": [
+                {
+                    "id": "rec_001",
+                    "user_id": "test_user",
+                    "brand": "獺祭",
+                    "impression": "華やか",
+                    "rating": "好き",
+                }
+            ],
+            "menu_brands": None,
+            "max_recommendations": 10,
+        }
+
+        with patch(
+            "src.services.bedrock_service.BedrockService.generate_text",
+            new_callable=AsyncMock,
+            side_effect=slow_generate,
+        ) as mock_generate:
+            router = create_router()
+            results = await asyncio.gather(
+                *(router.route("recommendation", params) for _ in range(3))
+            )
+
+        assert mock_generate.await_count == 2
+        assert all(r["best_recommend"]["brand"] == "獺祭" for r in results)
@@ -0,0 +1,73 @@
+"""構造化出力の定義のテスト"""
+
+import json
+
+from src.models import BestRecommendation, Recommendation
+from src.services.recommendation_service import RecommendationService
+from src.services.structured_output import (
+    FUSED_RECOMMENDATION_TOOL,
+    RECOMMENDATION_TOOL,
+    model_schema,
+    without_brand_description,
+)
+
+
+class TestOutputTools:
+    """出力ツールのスキーマのテスト"""
+
+    def test_recommendation_schema_is_derived_from_models(self):
+        """推薦のスキーマがPydanticモデルの制約を含むことを確認"""
+        properties = RECOMMENDATION_TOOL.schema["properties"]
+
+        assert properties["best_recommend"] == model_schema(BestRecommendation)
+        items = properties["recommendations"]["items"]
+        assert items == model_schema(Recommendation)
+        assert items["properties"]["category"]["maxLength"] == 10
+        assert properties["recommendations"]["maxItems"] == 9
+
+    def test_fused_schema_requires_taste_profile(self):
+        """fusedモードのスキーマが味の好み分析を含むことを確認"""
+        schema = FUSED_RECOMMENDATION_TOOL.schema
+
+        assert "taste_profile" in schema["required"]
+        assert schema["properties"]["best_recommend"] == model_schema(BestRecommendation)
+
+    def test_tool_config_forces_tool(self):
+        """toolConfigでツールの呼び出しを強制することを確認"""
+        config = RECOMMENDATION_TOOL.tool_config()
+
+        assert config["toolChoice"] == {"tool": {"name": RECOMMENDATION_TOOL.name}}
+        spec = config["tools"][0]["toolSpec"]
+        assert spec["inputSchema"]["json"] is RECOMMENDATION_TOOL.schema
+
+    def test_without_brand_description(self):
+        """brand_descriptionを除いたツールは元のスキーマを変更しないことを確認"""
+        tool = without_brand_description(FUSED_RECOMMENDATION_TOOL)
+
+        properties = tool.schema["properties"]
+        for item in (properties["best_recommend"], properties["recommendations"]["items"]):
+            assert "brand_description" not in item["properties"]
+            assert "brand_description" not in item["required"]
+        assert tool.name == FUSED_RECOMMENDATION_TOOL.name
+        assert "taste_profile" in tool.schema["required"]
+        assert FUSED_RECOMMENDATION_TOOL.schema["properties"]["best_recommend"] == model_schema(
+            BestRecommendation
+        )
+
+
+class TestParseMetrics:
+    """パース結果のメトリクスのテスト"""
+
+    def test_parse_outcomes_are_recorded_per_model(self):
+        """パースの成否が応答したモデルごとに記録されることを確認"""
+        service = RecommendationService()
+        metrics = service.bedrock_service.metrics
+        # メトリクスは試行の記録があるモデルのみ出力する
+        metrics.record_attempt(service.bedrock_service.model_id, 1, 0.1, "success")
+
+        service._parse_recommendations(json.dumps({"best_recommend": None}))
+        service._parse_recommendations('途中で切れた {"best_recommend": {')
+
+        stats = metrics.snapshot()[service.bedrock_service.model_id]
+        assert stats["parses"] == {"text": 2, "text_failed": 1}
+        assert stats["parse_failure_rate"] == 0.5
@@ -0,0 +1,149 @@
+"""味の好み分析キャッシュのユニットテスト"""
+
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.models import DrinkingRecord
+from src.services.recommendation_service import (
+    TASTE_ANALYSIS_SYSTEM_PROMPT,
+    TASTE_PROFILE_UPDATE_SYSTEM_PROMPT,
+    RecommendationService,
+)
+from src.services.taste_profile_cache import TasteProfileCache
+
+ANALYSIS_RESPONSE = json.dumps(
+    {
+        "preferred_tastes": ["華やか"],
+        "disliked_tastes": ["辛口"],
+        "analysis_summary": "華やかな香りを好む傾向",
+    },
+    ensure_ascii=False,
+)
+
+
+def make_records(count: int) -> list[DrinkingRecord]:
+    return [
+        DrinkingRecord(
+            id=f"rec_{i}",
+            user_id="test_user",
+            brand=f"銘柄{i}",
+            impression=f"感想{i}",
+            rating="好き",
+        )
+        for i in range(count)
+    ]
+
+
+class TestTasteProfileCache:
+    """TasteProfileCacheのテスト"""
+
+    def test_hit_is_order_insensitive(self):
+        """記録の順序が違っても同じ記録集合ならヒットすることを確認"""
+        cache = TasteProfileCache(max_entries=10, ttl=0, incremental_max_records=2)
+        records = make_records(3)
+        cache.store("u1", records, {"analysis_summary": "要約"})
+
+        result = cache.lookup("u1", list(reversed(records)))
+
+        assert result.kind == "hit"
+        assert result.previous.analysis == {"analysis_summary": "要約"}
+
+    def test_few_added_records_are_incremental(self):
+        """数件の追加のみの場合は差分更新になることを確認"""
+        cache = TasteProfileCache(max_entries=10, ttl=0, incremental_max_records=2)
+        records = make_records(5)
+        cache.store("u1", records[:3], {"analysis_summary": "要約"})
+
+        result = cache.lookup("u1", records)
+
+        assert result.kind == "incremental"
+        assert [r.id for r in result.new_records] == ["rec_3", "rec_4"]
+
+    def test_many_added_or_edited_records_miss(self):
+        """追加が多い場合や既存の記録が変更された場合は再分析になることを確認"""
+        cache = TasteProfileCache(max_entries=10, ttl=0, incremental_max_records=2)
+        records = make_records(6)
+        cache.store("u1", records[:3], {"analysis_summary": "要約"})
+
+        assert cache.lookup("u1", records).kind == "miss"
+
+        edited = records[:2] + [records[2].model_copy(update={"impression": "変更"})]
+        assert cache.lookup("u1", edited).kind == "miss"
+
+    def test_ttl_and_lru_eviction(self):
+        """TTL切れとユーザー数の上限で破棄されることを確認"""
+        now = [0.0]
+        cache = TasteProfileCache(
+            max_entries=1, ttl=10, incremental_max_records=2, clock=lambda: now[0]
+        )
+        records = make_records(1)
+        cache.store("u1", records, {})
+        cache.store("u2", records, {})
+        assert cache.lookup("u1", records).kind == "miss"
+        assert cache.lookup("u2", records).kind == "hit"
+
+        now[0] = 11.0
+        assert cache.lookup("u2", records).kind == "miss"
+
+
+class TestAnalyzeTastePreferenceCaching:
+    """analyze_taste_preferenceのキャッシュ利用のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_unchanged_history_skips_llm_call(self):
+        """記録が変わっていなければBedrockを呼び出さないことを確認"""
+        service = RecommendationService()
+        records = make_records(3)
+
+        with patch.object(
+            service.bedrock_service,
+            "generate_text",
+            new=AsyncMock(return_value=ANALYSIS_RESPONSE),
+        ) as mock_generate:
+            first = await service.analyze_taste_preference("test_user", records)
+            second = await service.analyze_taste_preference("test_user", records)
+
+        assert mock_generate.await_count == 1
+        assert first == second
+
+    @pytest.mark.asyncio
+    async def test_added_records_use_update_prompt(self):
+        """記録が数件追加された場合は差分更新プロンプトで分析することを確認"""
+        service = RecommendationService()
+        records = make_records(4)
+
+        with patch.object(
+            service.bedrock_service,
+            "generate_text",
+            new=AsyncMock(return_value=ANALYSIS_RESPONSE),
+        ) as mock_generate:
+            await service.analyze_taste_preference("test_user", records[:3])
+            analysis = await service.analyze_taste_preference("test_user", records)
+
+        first_call, second_call = mock_generate.await_args_list
+        assert first_call.kwargs["system_prompt"] == TASTE_ANALYSIS_SYSTEM_PROMPT
+        assert second_call.kwargs["system_prompt"] == TASTE_PROFILE_UPDATE_SYSTEM_PROMPT
+        update_prompt = second_call.args[0]
+        assert "華やかな香りを好む傾向" in update_prompt
+        assert "銘柄3" in update_prompt
+        assert "銘柄0" not in update_prompt
+        assert analysis["rating_distribution"] == {"好き": 4}
+
+    @pytest.mark.asyncio
+    async def test_failed_analysis_is_not_cached(self):
+        """パースに失敗した分析結果はキャッシュしないことを確認"""
+        service = RecommendationService()
+        records = make_records(2)
+
+        with patch.object(
+            service.bedrock_service,
+            "generate_text",
+            new=AsyncMock(side_effect=["不正な応答", ANALYSIS_RESPONSE]),
+        ) as mock_generate:
+            await service.analyze_taste_preference("test_user", records)
+            analysis = await service.analyze_taste_preference("test_user", records)
+
+        assert mock_generate.await_count == 2
+        assert analysis["analysis_summary"] == "華やかな香りを好む傾向"